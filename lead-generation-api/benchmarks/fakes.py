@@ -0,0 +1,359 @@
+"""
+Local stand-ins for the pipeline's external services
+
+One FastAPI app serves all three over real HTTP, so the service's own clients
+(openai, apify-client, supabase/postgrest) are exercised unchanged:
+
+- an OpenAI-compatible /v1/chat/completions endpoint (plain and streamed)
+- the Apify actor-run and dataset endpoints, writing generated Apollo-shaped
+  records over the configured actor duration
+- a PostgREST /rest/v1/leads table kept in memory, plus the save_search_leads
+  function from supabase/migrations
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+
+def apollo_record(run_id: str, index: int) -> Dict[str, Any]:
+    """One record shaped like the Apollo scraper's output, including fields the service never reads"""
+    person = f"{run_id[:8]}{index}"
+    return {
+        "id": f"{run_id}-{index}",
+        "firstName": "Alex",
+        "lastName": f"Chen{index}",
+        "name": f"Alex Chen{index}",
+        "email": f"alex.{person}@fintech-{index % 97}.example.com",
+        "email_status": "verified",
+        "phone": None,
+        "linkedin_url": f"https://www.linkedin.com/in/alex-{person}",
+        "title": "Chief Technology Officer",
+        "headline": "CTO building payments infrastructure",
+        "photo_url": f"https://static.example.com/photos/{person}.jpg",
+        "organization": {
+            "name": f"Fintech {index % 97}",
+            "website_url": f"https://fintech-{index % 97}.example.com",
+            "phone": "+886 2 1234 5678",
+            "estimated_num_employees": 50 + index % 400,
+            "industry": "financial services",
+            "keywords": ["payments", "fintech", "banking"],
+        },
+        "organizationNumEmployees": 50 + index % 400,
+        "city": "Taipei",
+        "state": "Taipei City",
+        "country": "Taiwan",
+        "industry": "financial services",
+        "organizationIndustry": "financial services",
+        "keywords": "payments, fintech, cloud",
+        "organizationKeywords": ["payments", "fintech", "banking"],
+        "employment_history": [
+            {
+                "organization_name": f"Bank {year}",
+                "title": "Engineering Manager",
+                "start_date": f"{year}-01-01",
+                "end_date": f"{year + 3}-01-01",
+                "description": "Led platform and payments teams. " * 4,
+            }
+            for year in (2008, 2011, 2014, 2017)
+        ],
+        "departments": ["master_engineering_technical"],
+        "seniority": "c_suite",
+    }
+
+class FakeBackend:
+    """
+    Fake OpenAI, Apify and PostgREST endpoints served from a background thread
+
+    Args:
+        llm_latency: Seconds before the first completion token
+        llm_chunk_delay: Seconds between streamed completion chunks
+        actor_duration: Seconds an actor run takes to write its whole dataset
+        db_latency: Seconds added to every PostgREST request
+    """
+
+    def __init__(
+        self,
+        llm_latency: float = 0.2,
+        llm_chunk_delay: float = 0.01,
+        actor_duration: float = 0.5,
+        db_latency: float = 0.005
+    ):
+        self.llm_latency = llm_latency
+        self.llm_chunk_delay = llm_chunk_delay
+        self.actor_duration = actor_duration
+        self.db_latency = db_latency
+        self.runs: Dict[str, Dict[str, Any]] = {}
+        self.leads: Dict[str, Dict[str, Any]] = {}
+        self.counts = {"llm": 0, "actor_runs": 0, "dataset_pages": 0, "db_requests": 0}
+        self.app = self._build_app()
+        self.port = _free_port()
+        self._server: Optional[uvicorn.Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self):
+        config = uvicorn.Config(self.app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="off")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Fake backend did not start")
+            time.sleep(0.01)
+
+    def stop(self):
+        if self._server:
+            self._server.should_exit = True
+            self._thread.join(timeout=5)
+
+    # --- Apify ---
+
+    def _visible_items(self, run: Dict[str, Any]) -> int:
+        if self.actor_duration <= 0:
+            return run["total"]
+        progress = (time.monotonic() - run["started"]) / self.actor_duration
+        return min(run["total"], int(run["total"] * progress))
+
+    def _run_body(self, run: Dict[str, Any]) -> Dict[str, Any]:
+        finished = self._visible_items(run) >= run["total"]
+        now = datetime.now(timezone.utc).isoformat()
+        return {"data": {
+            "id": run["id"],
+            "actId": run["actor_id"],
+            "userId": "bench",
+            "startedAt": run["started_at"],
+            "finishedAt": now if finished else None,
+            "status": "SUCCEEDED" if finished else "RUNNING",
+            "meta": {"origin": "API"},
+            "stats": {},
+            "options": {"build": "latest", "timeoutSecs": 3600, "memoryMbytes": 1024, "diskMbytes": 2048},
+            "buildId": "bench-build",
+            "defaultKeyValueStoreId": f"kvs-{run['id']}",
+            "defaultDatasetId": run["dataset_id"],
+            "defaultRequestQueueId": f"rq-{run['id']}",
+        }}
+
+    # --- PostgREST ---
+
+    @staticmethod
+    def _parse_list(value: str) -> List[str]:
+        inner = value[1:-1] if value.startswith("(") else value
+        return [item.strip('"') for item in re.findall(r'"(?:[^"\\]|\\.)*"|[^,]+', inner)]
+
+    def _matches(self, row: Dict[str, Any], filters: List[tuple]) -> bool:
+        for column, op, value in filters:
+            field = row.get(column)
+            if op == "eq" and str(field) != value:
+                return False
+            if op == "in" and str(field) not in value:
+                return False
+            if op == "gte" and (field is None or str(field) < value):
+                return False
+            if op == "gt" and (field is None or str(field) <= value):
+                return False
+        return True
+
+    def _filters(self, request: Request) -> List[tuple]:
+        filters = []
+        for column, raw in request.query_params.multi_items():
+            if column in ("select", "on_conflict", "order", "limit", "offset", "columns"):
+                continue
+            op, _, value = raw.partition(".")
+            filters.append((column, op, set(self._parse_list(value)) if op == "in" else value))
+        return filters
+
+    @staticmethod
+    def _project(row: Dict[str, Any], select: Optional[str]) -> Dict[str, Any]:
+        if not select or select == "*":
+            return row
+        return {column.strip(): row.get(column.strip()) for column in select.split(",")}
+
+    def _save_search_leads(self, user_id: str, records: List[Dict[str, Any]]) -> Dict[str, int]:
+        """In-memory version of supabase/migrations/*_save_search_leads.sql"""
+        owned = [row for row in self.leads.values() if row["user_id"] == user_id]
+        emails = {record["email"] for record in records if record.get("email")}
+        email_matches = [row["email"] for row in owned if row.get("email") in emails]
+        records = [record for record in records if not record.get("email") or record["email"] not in email_matches]
+
+        ids = {record["id"] for record in records}
+        id_matches = [row["id"] for row in owned if row["tab"] in ("new", "saved") and row["id"] in ids]
+        records = [record for record in records if record["id"] not in id_matches]
+
+        ids = {record["id"] for record in records}
+        restored = [row["id"] for row in owned if row["tab"] == "archived" and row["id"] in ids]
+        for lead_id in restored:
+            self.leads[lead_id]["tab"] = "new"
+
+        to_insert = {}
+        for record in records:
+            if record["id"] not in restored:
+                to_insert.setdefault(record["id"], record)
+        for lead_id, record in to_insert.items():
+            self.leads.setdefault(lead_id, record)
+
+        return {
+            "saved": len(to_insert),
+            "restored": len(restored),
+            "email_duplicates": len(email_matches),
+            "id_duplicates": len(id_matches),
+        }
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.post("/v1/chat/completions")
+        async def chat_completions(request: Request):
+            body = await request.json()
+            self.counts["llm"] += 1
+            prompt = body["messages"][-1]["content"]
+            digest = hashlib.md5(prompt.encode()).hexdigest()[:12]
+            content = json.dumps({
+                "searchUrl": (
+                    "https://app.apollo.io/#/people?page=1&contactEmailStatusV2[]=verified"
+                    f"&personTitles[]=cto&personLocations[]=taipei&qKeywords=bench-{digest}"
+                ),
+                "explanation": "CTOs in Taipei fintech companies, verified emails only."
+            })
+            usage = {"prompt_tokens": 900, "completion_tokens": 60, "total_tokens": 960}
+            await asyncio.sleep(self.llm_latency)
+
+            if not body.get("stream"):
+                return {
+                    "id": f"chatcmpl-{digest}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body["model"],
+                    "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+                    "usage": usage,
+                }
+
+            async def events():
+                base = {"id": f"chatcmpl-{digest}", "object": "chat.completion.chunk", "created": int(time.time()), "model": body["model"]}
+                for offset in range(0, len(content), 16):
+                    delta = {"content": content[offset:offset + 16]}
+                    yield f"data: {json.dumps({**base, 'choices': [{'index': 0, 'delta': delta, 'finish_reason': None}]})}\n\n"
+                    await asyncio.sleep(self.llm_chunk_delay)
+                yield f"data: {json.dumps({**base, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]})}\n\n"
+                yield f"data: {json.dumps({**base, 'choices': [], 'usage': usage})}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        @app.post("/v2/actors/{actor_id}/runs")
+        @app.post("/v2/acts/{actor_id}/runs")
+        async def start_actor(actor_id: str, request: Request):
+            run_input = await request.json()
+            self.counts["actor_runs"] += 1
+            run_id = uuid.uuid4().hex
+            run = {
+                "id": run_id,
+                "actor_id": actor_id,
+                "dataset_id": f"ds-{run_id}",
+                "total": int(run_input.get("totalRecords", 0)),
+                "started": time.monotonic(),
+                "started_at": datetime.now(timezone.utc).isoformat(),
+            }
+            self.runs[run_id] = run
+            self.runs[run["dataset_id"]] = run
+            return JSONResponse(self._run_body(run), status_code=201)
+
+        @app.get("/v2/actor-runs/{run_id}")
+        async def get_run(run_id: str, waitForFinish: Optional[float] = None):
+            run = self.runs[run_id]
+            deadline = time.monotonic() + (waitForFinish or 0)
+            while self._visible_items(run) < run["total"] and time.monotonic() < deadline:
+                await asyncio.sleep(0.02)
+            return self._run_body(run)
+
+        @app.get("/v2/datasets/{dataset_id}/items")
+        async def list_items(dataset_id: str, offset: int = 0, limit: int = 1000, fields: Optional[str] = None):
+            self.counts["dataset_pages"] += 1
+            run = self.runs[dataset_id]
+            visible = self._visible_items(run)
+            stop = min(offset + limit, visible)
+            items = [apollo_record(run["id"], index) for index in range(offset, stop)]
+            if fields:
+                wanted = fields.split(",")
+                items = [{key: item[key] for key in wanted if key in item} for item in items]
+            return JSONResponse(items, headers={
+                "x-apify-pagination-total": str(visible),
+                "x-apify-pagination-offset": str(offset),
+                "x-apify-pagination-count": str(len(items)),
+                "x-apify-pagination-limit": str(limit),
+                "x-apify-pagination-desc": "false",
+            })
+
+        @app.get("/rest/v1/leads")
+        async def select_leads(request: Request):
+            self.counts["db_requests"] += 1
+            await asyncio.sleep(self.db_latency)
+            filters = self._filters(request)
+            rows = [row for row in self.leads.values() if self._matches(row, filters)]
+            if request.query_params.get("order"):
+                column = request.query_params["order"].split(".")[0]
+                rows.sort(key=lambda row: str(row.get(column)))
+            if request.query_params.get("limit"):
+                rows = rows[:int(request.query_params["limit"])]
+            select = request.query_params.get("select")
+            body = [self._project(row, select) for row in rows]
+            return JSONResponse(body, headers={"content-range": f"0-{max(len(body) - 1, 0)}/{len(body)}"})
+
+        @app.post("/rest/v1/leads")
+        async def upsert_leads(request: Request):
+            self.counts["db_requests"] += 1
+            await asyncio.sleep(self.db_latency)
+            records = await request.json()
+            records = records if isinstance(records, list) else [records]
+            inserted = []
+            for record in records:
+                if record["id"] in self.leads:
+                    continue
+                self.leads[record["id"]] = record
+                inserted.append(record)
+            return JSONResponse(inserted, status_code=201)
+
+        @app.patch("/rest/v1/leads")
+        async def update_leads(request: Request):
+            self.counts["db_requests"] += 1
+            await asyncio.sleep(self.db_latency)
+            changes = await request.json()
+            filters = self._filters(request)
+            updated = []
+            for row in self.leads.values():
+                if self._matches(row, filters):
+                    row.update(changes)
+                    updated.append(row)
+            return JSONResponse(updated)
+
+        @app.post("/rest/v1/rpc/save_search_leads")
+        async def save_search_leads(request: Request):
+            self.counts["db_requests"] += 1
+            await asyncio.sleep(self.db_latency)
+            params = await request.json()
+            return self._save_search_leads(params["p_user_id"], params["p_leads"])
+
+        @app.get("/{path:path}")
+        async def not_found(path: str):
+            return Response(status_code=404)
+
+        return app
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
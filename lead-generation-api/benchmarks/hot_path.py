@@ -0,0 +1,177 @@
+"""
+Microbenchmarks for the CPU-bound lead-processing hot path
+
+Times each function over synthetic Apollo records at several batch sizes and
+reports time per record and memory per record (tracemalloc, in a separate
+pass so tracing does not distort the timings).
+
+    python -m benchmarks.hot_path
+    python -m benchmarks.hot_path --sizes 10,500 --repeat 7 --only convert
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from leadgen_app.models.lead_models import ApifyLeadData, convert_apify_batch, convert_apify_to_processed
+from leadgen_app.models.request_models import LeadSearchRequest
+from leadgen_app.routers.leads import _format_n8n_leads
+from leadgen_app.services.ai_service import AIService
+from leadgen_app.utils.helpers import merge_lead_data, normalize_company_name
+from leadgen_app.utils.validators import contains_harmful_content
+
+# Keyword list sizes seen in real exports (json_to_csv_converter.py sample: 0, 4, 71 and 88)
+KEYWORD_COUNTS = (0, 4, 71, 88)
+
+KEYWORD_POOL = [
+    "sustainability", "green beauty", "hair care", "skin care", "zero carbon", "carbon footprint",
+    "sdgs", "esg", "natural ingredients", "eco-friendly", "biodegradable packaging", "private label",
+    "herbal skincare", "personal care", "plant-based ingredients", "body wash", "clean products",
+    "atopic dermatitis", "psoriasis", "eczema", "retail", "e-commerce", "b2b", "b2c", "cosmetics",
+    "fragrance", "anti-aging", "dermatology", "spa", "wellness", "beauty devices", "k-beauty",
+]
+
+COMPANY_NAMES = [
+    "Phoenix Medical Taiwan Co., Ltd", "O'right Inc.", "De Ce Jour", "ELEMIS Limited",
+    "Memebox Corporation", "Beauty & Co.", "Acme Holdings LLC", "Taipei Fintech Corp",
+]
+
+QUERIES = [
+    "I'm looking for the contact information of CEOs, CMOs, Marketing managers at cosmetics companies based in Taiwan",
+    "Find heads of engineering at fintech startups in Singapore with 50-200 employees",
+    "Procurement directors at hospital groups in Tokyo and Osaka who handle medical devices",
+]
+
+SOURCE = {"mainQuery": QUERIES[0], "filters": {"location": "Taiwan"}}
+
+def apollo_record(index: int) -> Dict[str, Any]:
+    """One projected Apify record (the fields APIFY_LEAD_FIELDS downloads)"""
+    count = KEYWORD_COUNTS[index % len(KEYWORD_COUNTS)]
+    keywords = [f"{KEYWORD_POOL[(index + k) % len(KEYWORD_POOL)]} {k // len(KEYWORD_POOL) or ''}".strip() for k in range(count)]
+    return {
+        "id": f"5f{index:022x}",
+        "firstName": "Lucy",
+        "lastName": f"Wang{index}",
+        "name": f"Lucy Wang{index}",
+        "email": f"lucy.wang{index}@phoenixtaiwan.com" if index % 5 else None,
+        "phone": None,
+        "linkedin_url": f"http://www.linkedin.com/in/wang-lucy-{index}",
+        "title": "Marketing Manager",
+        "organization": {
+            "name": COMPANY_NAMES[index % len(COMPANY_NAMES)],
+            "estimated_num_employees": 2 + index % 500,
+            "phone": "+886227015157",
+        },
+        "organizationNumEmployees": 2 + index % 500,
+        "city": "Taipei",
+        "state": None,
+        "country": "Taiwan",
+        "industry": "cosmetics",
+        "organizationIndustry": "cosmetics",
+        "keywords": ", ".join(keywords[:8]),
+        "organizationKeywords": keywords,
+    }
+
+def build_inputs(size: int) -> Dict[str, Any]:
+    raw = [apollo_record(i) for i in range(size)]
+    leads, _ = convert_apify_batch(raw, "bench-user", SOURCE)
+    lead_dicts = [lead.model_dump(mode="json") for lead in leads]
+    return {
+        "raw": raw,
+        "models": [ApifyLeadData(**record) for record in raw],
+        "leads": leads,
+        "lead_pairs": list(zip(lead_dicts, lead_dicts[1:] + lead_dicts[:1])),
+        "companies": [COMPANY_NAMES[i % len(COMPANY_NAMES)] for i in range(size)],
+        "queries": [f"{QUERIES[i % len(QUERIES)]} #{i}" for i in range(size)],
+    }
+
+def make_cases(service: AIService, request: LeadSearchRequest) -> Dict[str, Callable[[Dict[str, Any]], Any]]:
+    """Benchmark name -> function of the prepared inputs, processing every record once"""
+    loop = asyncio.new_event_loop()
+    return {
+        "convert_apify_to_processed": lambda inputs: [convert_apify_to_processed(model, SOURCE) for model in inputs["models"]],
+        "convert_apify_batch": lambda inputs: convert_apify_batch(inputs["raw"], "bench-user", SOURCE),
+        "process_apify_leads": lambda inputs: loop.run_until_complete(
+            service._process_apify_leads(inputs["raw"], request, "bench-user")
+        ),
+        "generate_metrics": lambda inputs: service._generate_metrics(inputs["leads"], 1.0, 1),
+        "normalize_company_name": lambda inputs: [normalize_company_name(name) for name in inputs["companies"]],
+        "contains_harmful_content": lambda inputs: [contains_harmful_content(query) for query in inputs["queries"]],
+        "merge_lead_data": lambda inputs: [merge_lead_data(a, b) for a, b in inputs["lead_pairs"]],
+        "leaddata_model_dump_json": lambda inputs: [lead.model_dump_json() for lead in inputs["leads"]],
+        "n8n_response_json": lambda inputs: json.dumps(_format_n8n_leads(inputs["leads"])),
+    }
+
+def measure(case: Callable[[Dict[str, Any]], Any], inputs: Dict[str, Any], size: int, repeat: int) -> Dict[str, Any]:
+    """Best and median time per record over `repeat` runs, then one traced run for memory"""
+    case(inputs)  # warm-up (imports, regex compilation)
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        case(inputs)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    baseline_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.reset_peak()
+    start_bytes, _ = tracemalloc.get_traced_memory()
+    result = case(inputs)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    retained_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename")) - baseline_blocks
+    tracemalloc.stop()
+    del result
+
+    return {
+        "best_us_per_record": round(min(timings) / size * 1e6, 3),
+        "median_us_per_record": round(statistics.median(timings) / size * 1e6, 3),
+        "peak_bytes_per_record": round((peak_bytes - start_bytes) / size, 1),
+        "retained_blocks_per_record": round(retained_blocks / size, 2),
+    }
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=lambda value: [int(v) for v in value.split(",")], default=[10, 500, 10000])
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case and size")
+    parser.add_argument("--only", help="comma-separated substrings of case names to run")
+    parser.add_argument("--output", type=Path, help="write results JSON here")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    service = AIService()
+    request = LeadSearchRequest(main_query=QUERIES[0])
+    cases = make_cases(service, request)
+    if args.only:
+        wanted = args.only.split(",")
+        cases = {name: case for name, case in cases.items() if any(w in name for w in wanted)}
+
+    results = []
+    print(f"{'case':<28} {'records':>7} {'best us/rec':>12} {'median us/rec':>14} {'peak B/rec':>11} {'kept blk/rec':>13}")
+    try:
+        for size in args.sizes:
+            inputs = build_inputs(size)
+            for name, case in cases.items():
+                result = {"case": name, "records": size, **measure(case, inputs, size, args.repeat)}
+                results.append(result)
+                print(
+                    f"{name:<28} {size:>7} {result['best_us_per_record']:>12} {result['median_us_per_record']:>14} "
+                    f"{result['peak_bytes_per_record']:>11} {result['retained_blocks_per_record']:>13}",
+                    flush=True
+                )
+    finally:
+        asyncio.run(service.close())
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({"python": sys.version.split()[0], "results": results}, indent=2) + "\n")
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+"""
+Offline end-to-end benchmark of POST /api/v1/leads/search
+
+Runs the real app in-process against the local fakes in benchmarks/fakes.py
+and reports throughput and p50/p95/p99 latency per (result size, concurrency).
+
+    python -m benchmarks.pipeline --sizes 10,50,200 --concurrency 1,4,16
+    python -m benchmarks.pipeline --save-baseline          # record benchmarks/baselines/pipeline.json
+    python -m benchmarks.pipeline --compare                # diff against that baseline
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.fakes import FakeBackend
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "pipeline.json"
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (q in 0-1)"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+def configure_environment(backend: FakeBackend, log_level: str):
+    """Point the service at the fakes; must run before leadgen_app is imported"""
+    os.environ.update({
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_BASE_URL": f"{backend.url}/v1",
+        "ANTHROPIC_API_KEY": "",
+        "LLM_HEDGE_MODEL": "",
+        "APIFY_API_TOKEN": "bench",
+        "APIFY_API_URL": backend.url,
+        "SUPABASE_URL": backend.url,
+        "SUPABASE_SERVICE_ROLE_KEY": "bench",
+        "MAX_LEADS_PER_REQUEST": "500",
+        "CRAWL_MAX_CONCURRENT_RUNS": "64",
+        "TRACE_EXPORT_PATH": "",
+        "LOG_LEVEL": log_level,
+    })
+
+async def run_level(
+    client: Any,
+    tokens: List[str],
+    size: int,
+    concurrency: int,
+    requests: int,
+    mode: str,
+    label: str = "benchmark"
+) -> Dict[str, Any]:
+    """Issue `requests` searches from `concurrency` workers and summarize them"""
+    latencies: List[float] = []
+    errors = 0
+    empty = 0
+    leads = 0
+    counter = iter(range(requests))
+
+    async def worker(worker_id: int):
+        nonlocal errors, empty, leads
+        headers = {"Authorization": f"Bearer {tokens[worker_id]}"}
+        for n in counter:
+            body = {
+                # Unique per request so neither the URL cache nor crawl coalescing short-circuits it
+                "main_query": f"CTOs at fintech companies in Taipei ({label} {mode}/{size}/{concurrency}/{n})",
+                "max_results": size,
+            }
+            start = time.perf_counter()
+            response = await client.post(f"/api/v1/leads/search?mode={mode}", json=body, headers=headers)
+            content = response.content
+            latencies.append(time.perf_counter() - start)
+
+            if response.status_code != 200:
+                errors += 1
+                continue
+            found = 0
+            if mode == "sync":
+                data = json.loads(content)
+                if not data.get("success"):
+                    errors += 1
+                    continue
+                found = len(data["data"][0]["leads_data"])
+            else:
+                for line in content.splitlines():
+                    frame = json.loads(line)
+                    if frame["type"] == "leads":
+                        found += len(frame["data"][0]["leads_data"])
+                    elif frame["type"] == "error":
+                        errors += 1
+            leads += found
+            # A search that found nothing skipped most of the pipeline; don't let it look fast
+            empty += 0 if found else 1
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*[worker(i) for i in range(concurrency)])
+    wall = time.perf_counter() - wall_start
+
+    completed = len(latencies) - errors
+    return {
+        "mode": mode,
+        "size": size,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "empty": empty,
+        "throughput_rps": round(completed / wall, 3) if wall else None,
+        "leads_per_second": round(leads / wall, 1) if wall else None,
+        "mean": round(sum(latencies) / len(latencies), 4) if latencies else None,
+        "p50": round(percentile(latencies, 0.50), 4) if latencies else None,
+        "p95": round(percentile(latencies, 0.95), 4) if latencies else None,
+        "p99": round(percentile(latencies, 0.99), 4) if latencies else None,
+    }
+
+async def run_benchmark(args: argparse.Namespace, backend: FakeBackend) -> List[Dict[str, Any]]:
+    import httpx
+    import jwt
+
+    from leadgen_app.main import app
+    from leadgen_app.services.ai_service import ai_service
+
+    max_concurrency = max(args.concurrency)
+    # One user per worker, as separate users would search in production
+    tokens = [
+        jwt.encode({"sub": f"bench-user-{i}", "role": "authenticated"}, "benchmark-secret-the-service-does-not-verify", algorithm="HS256")
+        for i in range(max_concurrency)
+    ]
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+            for mode in args.modes:
+                for size in args.sizes:
+                    # Warm-up: first-use imports and connection pools
+                    await run_level(client, tokens, size, 1, 1, mode, label="warm-up")
+                    for concurrency in args.concurrency:
+                        result = await run_level(client, tokens, size, concurrency, args.requests, mode)
+                        results.append(result)
+                        print(_format_row(result), flush=True)
+    finally:
+        await ai_service.close()
+    return results
+
+def _format_row(result: Dict[str, Any]) -> str:
+    return (
+        f"{result['mode']:>6} size={result['size']:<4} conc={result['concurrency']:<3} "
+        f"req={result['requests']:<4} err={result['errors']:<3} empty={result['empty']:<3} "
+        f"rps={result['throughput_rps']:<8} leads/s={result['leads_per_second']:<8} "
+        f"p50={result['p50']:.3f}s p95={result['p95']:.3f}s p99={result['p99']:.3f}s"
+    )
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any]):
+    """Print each level's change against the baseline (negative latency change is better)"""
+    previous = {(r["mode"], r["size"], r["concurrency"]): r for r in baseline["results"]}
+    print(f"\nCompared with baseline {baseline['meta'].get('commit')} ({baseline['meta'].get('created_at')}):")
+    for result in results:
+        before = previous.get((result["mode"], result["size"], result["concurrency"]))
+        if before is None:
+            continue
+        changes = []
+        for key in ("throughput_rps", "p50", "p95", "p99"):
+            if before.get(key):
+                changes.append(f"{key} {100 * (result[key] - before[key]) / before[key]:+.1f}%")
+        print(f"{result['mode']:>6} size={result['size']:<4} conc={result['concurrency']:<3} " + "  ".join(changes))
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ints = lambda value: [int(v) for v in value.split(",")]
+    parser.add_argument("--sizes", type=ints, default=[10, 50, 200], help="max_results per search")
+    parser.add_argument("--concurrency", type=ints, default=[1, 4, 16], help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=32, help="searches per (size, concurrency) level")
+    parser.add_argument("--modes", type=lambda value: value.split(","), default=["sync"], help="sync and/or ndjson")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="fake LLM time to first token (s)")
+    parser.add_argument("--actor-duration", type=float, default=0.5, help="fake actor run duration (s)")
+    parser.add_argument("--db-latency", type=float, default=0.005, help="fake PostgREST latency per request (s)")
+    parser.add_argument("--log-level", default="WARNING", help="service log level during the run")
+    parser.add_argument("--output", type=Path, help="write results JSON here")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, type=Path, help="save results as the baseline")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, type=Path, help="compare with a saved baseline")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    backend = FakeBackend(
+        llm_latency=args.llm_latency,
+        actor_duration=args.actor_duration,
+        db_latency=args.db_latency
+    )
+    backend.start()
+    configure_environment(backend, args.log_level)
+
+    try:
+        results = asyncio.run(run_benchmark(args, backend))
+    finally:
+        backend.stop()
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "requests_per_level": args.requests,
+            "fakes": {
+                "llm_latency": args.llm_latency,
+                "actor_duration": args.actor_duration,
+                "db_latency": args.db_latency,
+            },
+            "backend_calls": backend.counts,
+        },
+        "results": results,
+    }
+
+    if args.compare:
+        compare(results, json.loads(args.compare.read_text()))
+    for path in filter(None, (args.output, args.save_baseline)):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Results written to {path}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,6 +5,7 @@ Configuration management for Lead Generation API
 from pydantic_settings import BaseSettings
 from typing import List, Optional
 import os
+import tempfile
 from functools import lru_cache
 
 class Settings(BaseSettings):
@@ -34,14 +35,57 @@ class Settings(BaseSettings):
     SUPABASE_URL: str = "https://example.supabase.co"  # Default placeholder
     SUPABASE_SERVICE_ROLE_KEY: str = "placeholder-service-role-key"  # For server-side operations
     SUPABASE_JWT_SECRET: str = "placeholder-jwt-secret"        # For JWT verification
+    SUPABASE_SAVE_RPC: bool = True  # Save searches through the save_search_leads function (supabase/migrations)
     
     # AI Services
     OPENAI_API_KEY: Optional[str] = None
     ANTHROPIC_API_KEY: Optional[str] = None
     HUGGINGFACE_API_KEY: Optional[str] = None
     
+    # LLM client
+    OPENAI_MODEL: str = "gpt-5-nano"
+    OPENAI_BASE_URL: Optional[str] = None
+    LLM_MAX_CONCURRENCY: int = 32  # Concurrent in-flight LLM calls per process
+    LLM_MAX_CONNECTIONS: int = 64
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_TIMEOUT: float = 60.0  # Per-call timeout in seconds
+    ANTHROPIC_MODEL: str = "claude-haiku-4-5"
+    LLM_STREAM_URL: bool = True  # Stream URL generation and stop once searchUrl is complete
+    
+    # LLM hedging (second request to another provider when the first stalls)
+    LLM_HEDGE_ENABLED: bool = True
+    LLM_HEDGE_MODEL: Optional[str] = None  # Extra OpenAI model to hedge with, e.g. when Anthropic is not configured
+    LLM_HEDGE_PERCENTILE: float = 0.95  # Hedge once the primary is slower than this share of its recent calls
+    LLM_HEDGE_DEFAULT_DELAY: float = 8.0  # Hedge delay in seconds until enough latency samples exist
+    LLM_HEDGE_MIN_DELAY: float = 1.0
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    
+    # Apollo URL cache
+    URL_CACHE_MAX_ENTRIES: int = 1024
+    URL_CACHE_TTL: int = 3600  # 1 hour in seconds
+    
     # Apify (Required for n8n workflow replication)
     APIFY_API_TOKEN: Optional[str] = None
+    APIFY_API_URL: str = "https://api.apify.com"  # Override to point at a local stand-in (benchmarks)
+    APIFY_DATASET_PAGE_SIZE: int = 1000  # Items fetched per dataset request
+    APIFY_STREAM_PAGE_SIZE: int = 50  # Items fetched per request while streaming a running crawl
+    APIFY_STREAM_POLL_INTERVAL: float = 2.0  # Seconds between dataset polls while the actor runs
+    
+    # Crawl planning
+    CRAWL_OVERSCAN_FACTOR: float = 1.2  # Extra records crawled on top of the expected need
+    CRAWL_MIN_RECORDS: int = 25
+    CRAWL_MAX_RECORDS: int = 500
+    CRAWL_DEFAULT_LOSS_RATE: float = 0.1  # Assumed dedupe loss for users without history
+    CRAWL_MAX_CONCURRENT_RUNS: int = 8  # Actor runs in progress at once, across all users
+    CRAWL_MAX_RUNS_PER_USER: int = 2
+    
+    # Surplus lead buffer ("load more" pages)
+    SURPLUS_BUFFER_TTL: int = 1800  # 30 minutes in seconds
+    SURPLUS_BUFFER_MAX_SEARCHES: int = 1000
+    
+    # Background search jobs
+    SEARCH_JOB_RETENTION: int = 1800  # Seconds results stay retrievable after completion
+    SEARCH_JOB_MAX_JOBS: int = 1000
     
     # Lead Enrichment Services
     APOLLO_API_KEY: Optional[str] = None
@@ -55,10 +99,28 @@ class Settings(BaseSettings):
     # Processing
     MAX_LEADS_PER_REQUEST: int = 50
     REQUEST_TIMEOUT: int = 300  # 5 minutes
+    LEAD_IMPORT_MAX_LEADS: int = 50000  # Leads accepted by one /leads/import request
+    LEAD_IMPORT_CHUNK_SIZE: int = 500  # Leads saved per call when the import does not go through COPY
     
-    # Database
-    DATABASE_POOL_SIZE: int = 10
-    DATABASE_MAX_OVERFLOW: int = 20
+    # Database (PostgREST over a shared HTTP/2 client)
+    DATABASE_POOL_SIZE: int = 10  # Connections kept alive
+    DATABASE_MAX_OVERFLOW: int = 20  # Extra connections under load; pool size + overflow bounds concurrent calls
+    DATABASE_TIMEOUT: float = 30.0  # Per-call timeout in seconds
+    DATABASE_URL: Optional[str] = None  # Direct Postgres connection (e.g. the Supabase session pooler) for COPY bulk loads
+    DATABASE_COPY_THRESHOLD: int = 5000  # Batches at least this large (lead imports) load with COPY when DATABASE_URL is set
+    LEAD_COUNTS_RECONCILE_INTERVAL: int = 21600  # Seconds between lead counter reconciliations (6 hours); 0 disables
+
+    # Lead dedupe filter (per-user Bloom filter over lead IDs and emails)
+    LEAD_FILTER_ENABLED: bool = True
+    LEAD_FILTER_ERROR_RATE: float = 0.01  # Target false positive rate
+    LEAD_FILTER_MIN_CAPACITY: int = 1024  # Smallest filter, in IDs and emails
+    LEAD_FILTER_TTL: int = 86400  # Seconds before a filter is rebuilt from the database (24 hours)
+    LEAD_FILTER_MAX_USERS: int = 1000  # Filters kept in memory per process
+    LEAD_FILTER_SNAPSHOT_DIR: str = os.path.join(tempfile.gettempdir(), "leadgen-lead-filters")  # Shared by workers on one host
+
+    # Monitoring
+    METRICS_ENABLED: bool = True  # Serve Prometheus metrics at /metrics
+    TRACE_EXPORT_PATH: Optional[str] = None  # Append each search's spans as JSON lines to this file
     
     class Config:
         env_file = ".env"
@@ -3,20 +3,25 @@ FastAPI Lead Generation Service
 Replaces n8n workflow for AI-powered lead discovery
 """
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends, Request, status
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 import uvicorn
 import json
 
 from leadgen_app.config import settings
 from leadgen_app.routers import leads, health
+from leadgen_app.services.ai_service import ai_service
+from leadgen_app.services.job_service import job_manager
+from leadgen_app.services.supabase_service import close_supabase_service, reconcile_lead_counts_periodically
 from leadgen_app.services.auth_service import verify_jwt_token
 from leadgen_app.utils.logger import setup_logging
+from leadgen_app.utils import metrics
 
 # Setup logging
 setup_logging()
@@ -26,8 +31,16 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
     logger.info("🚀 Lead Generation API starting up...")
+    reconciler = None
+    if settings.LEAD_COUNTS_RECONCILE_INTERVAL > 0:
+        reconciler = asyncio.create_task(reconcile_lead_counts_periodically(settings.LEAD_COUNTS_RECONCILE_INTERVAL))
     yield
     logger.info("🛑 Lead Generation API shutting down...")
+    if reconciler:
+        reconciler.cancel()
+    await job_manager.shutdown()
+    await ai_service.close()
+    await close_supabase_service()
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -109,6 +122,12 @@ async def root():
         "docs": "/docs" if settings.ENVIRONMENT == "development" else "disabled"
     }
 
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics():
+        """Pipeline stage latency, dependency errors and saturation in Prometheus text format"""
+        return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
 if __name__ == "__main__":
     uvicorn.run(
         "app.main:app",
@@ -2,12 +2,15 @@
 Lead-specific data models and utilities
 """
 
-from pydantic import BaseModel, Field, validator
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, TypeAdapter, validator
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 from enum import Enum
+import hashlib
 import uuid
 
+from leadgen_app.models.response_models import LeadData, ConfidenceLevel
+
 class LeadSource(str, Enum):
     """Lead source types"""
     APOLLO = "apollo"
@@ -152,3 +155,138 @@ def convert_apify_to_processed(apify_lead: ApifyLeadData, source_criteria: Dict[
         lead_source=LeadSource.APOLLO,
         lead_quality=LeadQuality.HIGH if apify_lead.email else LeadQuality.MEDIUM
     )
+
+# Raw string fields ApifyLeadData would reject when not a string
+_APIFY_STR_FIELDS = (
+    "id", "firstName", "lastName", "name", "email", "phone", "linkedin_url", "title",
+    "city", "state", "country", "industry", "organizationIndustry", "apolloUrl", "scrapedAt"
+)
+_EMPLOYEE_COUNT = TypeAdapter(Optional[int])
+
+def apify_lead_id(user_id: str, base_id: str) -> str:
+    """User-specific lead ID, so the same Apollo person never collides across users"""
+    return hashlib.md5(f"{user_id}_{base_id}".encode()).hexdigest()
+
+def convert_apify_to_lead_data(
+    raw_lead: Dict[str, Any],
+    user_id: str,
+    source_criteria: Dict[str, Any]
+) -> LeadData:
+    """
+    Convert a raw Apify record straight to LeadData in a single pass
+
+    Produces the same lead as ApifyLeadData -> convert_apify_to_processed ->
+    LeadData, and rejects the same records, but validates only once (as
+    LeadData) instead of building three models per record.
+
+    Args:
+        raw_lead: Raw record from the Apify dataset
+        user_id: User the lead is saved for
+        source_criteria: Source query criteria stored with the lead
+
+    Returns:
+        Validated LeadData
+
+    Raises:
+        ValueError: If the record is not a valid Apify lead
+    """
+    get = raw_lead.get
+    for field in _APIFY_STR_FIELDS:
+        value = get(field)
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"{field} must be a string, got {type(value).__name__}")
+    employee_count = get("organizationNumEmployees")
+    if employee_count is not None and type(employee_count) is not int:
+        _EMPLOYEE_COUNT.validate_python(employee_count)
+
+    city, state, country = get("city"), get("state"), get("country")
+    location = ", ".join([part for part in (city, state, country) if part])
+
+    industries = []
+    industry = get("industry")
+    organization_industry = get("organizationIndustry")
+    if industry:
+        industries.append(industry)
+    if organization_industry and organization_industry not in industries:
+        industries.append(organization_industry)
+
+    keywords = []
+    raw_keywords = get("keywords")
+    if raw_keywords:
+        if isinstance(raw_keywords, str):
+            keywords.extend([kw.strip() for kw in raw_keywords.split(',') if kw.strip()])
+        elif isinstance(raw_keywords, list):
+            keywords.extend(raw_keywords)
+
+    organization_keywords = get("organizationKeywords")
+    if organization_keywords is not None and not isinstance(organization_keywords, list):
+        raise ValueError("organizationKeywords must be a list")
+    if organization_keywords:
+        keywords.extend(organization_keywords)
+    # Deduplicate in first-seen order
+    keywords = list(dict.fromkeys(keywords))
+
+    organization = get("organization")
+    company_name = None
+    company_size = None
+    phone = None
+    if isinstance(organization, str):
+        company_name = organization
+    elif isinstance(organization, dict):
+        company_name = organization.get('name') or organization.get('organization_name')
+        employees = organization.get("estimated_num_employees")
+        company_size = str(employees) if employees else None
+        phone = organization.get("phone")
+
+    first_name, last_name = get("firstName"), get("lastName")
+    name = get("name")
+    if not name:
+        # Same as ProcessedLead.generate_name, including how a missing half renders
+        name = f"{first_name} {last_name}".strip() if first_name or last_name else None
+
+    linkedin_url = get("linkedin_url")
+    if linkedin_url and not linkedin_url.startswith(('http://', 'https://')):
+        linkedin_url = f"https://{linkedin_url}"
+
+    email = get("email")
+    base_id = get("id") or str(uuid.uuid4())
+
+    return LeadData.model_validate({
+        "id": apify_lead_id(user_id, base_id),
+        "first_name": first_name,
+        "last_name": last_name,
+        "name": name,
+        "email": email,
+        "phone": phone,
+        "linkedin_url": linkedin_url,
+        "job_title": get("title"),
+        "company_name": company_name,
+        "company_size": company_size,
+        "industry": industries,
+        "location": location or None,
+        "keywords": keywords,
+        "confidence_score": 0.8,
+        "confidence_level": ConfidenceLevel.HIGH if email else ConfidenceLevel.MEDIUM,
+        "source_query_criteria": source_criteria,
+        "created_at": datetime.now()
+    })
+
+def convert_apify_batch(
+    raw_leads: List[Dict[str, Any]],
+    user_id: str,
+    source_criteria: Dict[str, Any]
+) -> Tuple[List[LeadData], List[str]]:
+    """
+    Convert a batch of raw Apify records, skipping invalid ones
+
+    Returns:
+        Tuple of (converted leads, error messages for skipped records)
+    """
+    leads = []
+    errors = []
+    for raw_lead in raw_leads:
+        try:
+            leads.append(convert_apify_to_lead_data(raw_lead, user_id, source_criteria))
+        except Exception as e:
+            errors.append(str(e))
+    return leads, errors
@@ -6,6 +6,8 @@ from pydantic import BaseModel, Field, validator
 from typing import List, Optional, Dict, Any, Union
 from enum import Enum
 
+from leadgen_app.models.response_models import LeadData
+
 def to_camel(string: str) -> str:
     words = string.split('_')
     return words[0] + ''.join(word.capitalize() for word in words[1:])
@@ -153,3 +155,8 @@ class BulkLeadRequest(BaseModel):
         if not v:
             raise ValueError("At least one lead ID is required")
         return list(set(v))  # Remove duplicates
+
+class LeadImportRequest(BaseModel):
+    """Request model for importing leads from another source (e.g. a CSV export)"""
+    leads: List[LeadData] = Field(..., min_items=1, description="Leads to import")
+    source: Optional[str] = Field(None, max_length=200, description="Where the leads come from")
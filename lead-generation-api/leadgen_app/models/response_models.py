@@ -16,6 +16,13 @@ class LeadStatus(str, Enum):
     QUALIFIED = "qualified"
     CONVERTED = "converted"
 
+class JobStatus(str, Enum):
+    """Background search job states"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
 class ConfidenceLevel(str, Enum):
     """Confidence levels for AI-generated data"""
     HIGH = "high"
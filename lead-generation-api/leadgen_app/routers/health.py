@@ -7,6 +7,7 @@ from datetime import datetime
 from fastapi import APIRouter, HTTPException
 from leadgen_app.models.response_models import HealthResponse
 from leadgen_app.config import settings
+from leadgen_app.services.ai_service import ai_service
 from leadgen_app.services.supabase_service import get_supabase_service
 
 logger = logging.getLogger(__name__)
@@ -45,7 +46,7 @@ async def detailed_health_check():
     # Check Supabase connection
     try:
         # Try a simple query to test database connectivity
-        test_result = await supabase_service.get_user_lead_count("health-check-user")
+        test_result = await get_supabase_service().get_user_lead_count("health-check-user")
         dependencies["supabase"] = "healthy"
     except Exception as e:
         logger.warning(f"Supabase health check failed: {str(e)}")
@@ -90,7 +91,7 @@ async def readiness_check():
     """
     try:
         # Test critical dependencies
-        await supabase_service.get_user_lead_count("readiness-check")
+        await get_supabase_service().get_user_lead_count("readiness-check")
         
         return {"status": "ready", "timestamp": datetime.utcnow()}
         
@@ -107,4 +108,18 @@ async def liveness_check():
     """
     Kubernetes liveness probe endpoint
     """
-    return {"status": "alive", "timestamp": datetime.utcnow()}
\ No newline at end of file
+    return {"status": "alive", "timestamp": datetime.utcnow()}
+
+@router.get(
+    "/llm",
+    summary="LLM latency",
+    description="Per-provider LLM latency histograms and hedging counters"
+)
+async def llm_latency():
+    """
+    LLM provider latency, for tuning LLM_HEDGE_PERCENTILE
+    """
+    if not ai_service.llm:
+        return {"status": "not_configured", "timestamp": datetime.utcnow()}
+    
+    return {"status": "configured", "timestamp": datetime.utcnow(), **ai_service.llm.stats()}
@@ -2,13 +2,15 @@
 Lead generation API routes - n8n workflow replication
 """
 
+import json
 import logging
 import uuid
-from typing import Dict, Any
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, status
-from fastapi.responses import JSONResponse
+from datetime import datetime
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Header, Query, status
+from fastapi.responses import JSONResponse, StreamingResponse
 
-from leadgen_app.models.request_models import LeadSearchRequest, LeadEnrichmentRequest, BulkLeadRequest
+from leadgen_app.models.request_models import LeadSearchRequest, LeadEnrichmentRequest, BulkLeadRequest, LeadImportRequest
 from leadgen_app.models.response_models import (
     LeadSearchResponse, 
     ErrorResponse, 
@@ -16,14 +18,60 @@ from leadgen_app.models.response_models import (
     BulkOperationResponse
 )
 from leadgen_app.services.auth_service import require_authenticated_user, get_current_user
-from leadgen_app.services.ai_service import ai_service
+from leadgen_app.services.ai_service import ai_service, ProgressCallback
+from leadgen_app.services.crawl_planner import crawl_planner
+from leadgen_app.services.crawl_scheduler import crawl_scheduler
+from leadgen_app.services.job_service import SearchJob, job_manager
 from leadgen_app.services.supabase_service import get_supabase_service
+from leadgen_app.utils.metrics import SEARCHES_IN_FLIGHT, time_stage
+from leadgen_app.utils.tracing import current_trace, span, start_trace
 from leadgen_app.utils.validators import validate_search_request
 from leadgen_app.config import settings
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+def _build_source_query_criteria(
+    request: LeadSearchRequest,
+    request_id: str,
+    metrics: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Source query criteria stored with each saved lead"""
+    return {
+        "mainQuery": request.main_query or "",
+        "filters": request.filters.model_dump(),
+        "maxResults": request.max_results,
+        "includeEnrichment": request.include_enrichment,
+        "requestId": request_id,
+        "timestamp": metrics.get("timestamp", "")
+    }
+
+def _format_n8n_leads(leads_data: List[Any]) -> List[Dict[str, Any]]:
+    """Format leads to match the exact n8n output structure"""
+    return [
+        {
+            "leads_data": [
+                {
+                    "first_name": lead.first_name,
+                    "last_name": lead.last_name,
+                    "name": lead.name,
+                    "job_title": lead.job_title,
+                    "company_name": lead.company_name,
+                    "company_size": lead.company_size,
+                    "industry": lead.industry,
+                    "location": lead.location,
+                    "email": lead.email,
+                    "phone": lead.phone,
+                    "linkedin_url": lead.linkedin_url,
+                    "keywords": lead.keywords,
+                    "source_query_criteria": lead.source_query_criteria,
+                    "icebreaker": None
+                }
+                for lead in leads_data
+            ]
+        }
+    ]
+
 @router.post(
     "/search",
     summary="Search for leads using AI - n8n workflow replication",
@@ -31,6 +79,14 @@ router = APIRouter()
 )
 async def search_leads(
     request: LeadSearchRequest,
+    mode: str = Query(
+        "sync",
+        pattern="^(sync|job|ndjson|sse)$",
+        description=(
+            "'sync' waits for the full pipeline; 'job' returns a job id immediately; "
+            "'ndjson' and 'sse' stream lead batches as they are crawled"
+        )
+    ),
     user_id: str = Depends(require_authenticated_user)
 ):
     """
@@ -39,107 +95,301 @@ async def search_leads(
     2. Run Apify crawler to scrape Apollo.io
     3. Process and return lead data in n8n format
     4. Save results to Supabase
+    
+    In job mode the pipeline runs in the background; poll GET /jobs/{job_id}
+    or follow GET /jobs/{job_id}/events (server-sent events) for progress.
+    In ndjson/sse mode lead batches are streamed as the crawl produces them,
+    followed by a summary frame with the metrics.
     """
     request_id = str(uuid.uuid4())
     
-    try:
-        logger.info(f"Lead search request {request_id} from user {user_id} - n8n replication")
-        
-        # Validate request
-        validation_result = await validate_search_request(request, user_id)
-        if not validation_result["valid"]:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=validation_result["error"]
-            )
+    logger.info(f"Lead search request {request_id} from user {user_id} - n8n replication ({mode} mode)")
+    
+    # Validate request
+    validation_result = await validate_search_request(request, user_id)
+    if not validation_result["valid"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=validation_result["error"]
+        )
+    
+    if mode == "job":
+        async def run_job(job: SearchJob) -> Dict[str, Any]:
+            with SEARCHES_IN_FLIGHT.track_in_progress(mode="job"), \
+                    start_trace("search", request_id=request_id, user_id=user_id, mode="job"):
+                _, content = await _execute_search(request, user_id, request_id, progress=job.report)
+            return content
         
+        job = job_manager.submit(user_id, run_job)
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={
+                "message": "Search started. Poll the status URL or follow the events URL for progress.",
+                "success": True,
+                "request_id": request_id,
+                "job_id": job.id,
+                "status": job.status.value,
+                "status_url": f"/api/v1/leads/jobs/{job.id}",
+                "events_url": f"/api/v1/leads/jobs/{job.id}/events"
+            }
+        )
+    
+    if mode in ("ndjson", "sse"):
+        return StreamingResponse(
+            _stream_search(request, user_id, request_id, mode),
+            media_type="application/x-ndjson" if mode == "ndjson" else "text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    
+    with SEARCHES_IN_FLIGHT.track_in_progress(mode="sync"), \
+            start_trace("search", request_id=request_id, user_id=user_id, mode="sync"):
+        status_code, content = await _execute_search(request, user_id, request_id)
+    with time_stage("serialization"):
+        return JSONResponse(status_code=status_code, content=content)
+
+def _attach_timings(metrics: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the current trace's per-stage timings (seconds) to the search metrics"""
+    trace = current_trace()
+    if trace is not None:
+        metrics["timings"] = trace.timings()
+    return metrics
+
+def _stream_frame(mode: str, frame_type: str, payload: Dict[str, Any]) -> str:
+    """Encode one streamed frame as an NDJSON line or a server-sent event"""
+    with time_stage("serialization"):
+        if mode == "sse":
+            return f"event: {frame_type}\ndata: {json.dumps(payload)}\n\n"
+        return json.dumps({"type": frame_type, **payload}) + "\n"
+
+async def _stream_search(
+    request: LeadSearchRequest,
+    user_id: str,
+    request_id: str,
+    mode: str
+) -> AsyncIterator[str]:
+    """
+    Run the search pipeline, streaming each converted lead batch
+    
+    Frames: "leads" (one per batch, in n8n format), then "summary" after the
+    leads are saved, or "error" if the search fails.
+    """
+    leads_data = []
+    
+    with SEARCHES_IN_FLIGHT.track_in_progress(mode=mode), \
+            start_trace("search", request_id=request_id, user_id=user_id, mode=mode):
+        try:
+            metrics: Dict[str, Any] = {}
+            async for frame_type, payload in ai_service.stream_lead_search(request, user_id, request_id):
+                if frame_type == "leads":
+                    leads_data.extend(payload)
+                    yield _stream_frame(mode, "leads", {
+                        "request_id": request_id,
+                        "data": _format_n8n_leads(payload)
+                    })
+                else:
+                    metrics = payload
+            
+            save_summary = None
+            if leads_data:
+                save_summary = await save_leads_background(
+                    leads_data,
+                    user_id,
+                    _build_source_query_criteria(request, request_id, metrics),
+                    request_id
+                )
+                if not metrics.get("crawl_prechecked", True) and "error" not in save_summary:
+                    # Leads were not checked against the user's before streaming; the save's checks give the loss
+                    crawl_planner.record_dedupe(
+                        user_id,
+                        len(leads_data),
+                        save_summary["email_duplicates"] + save_summary["id_duplicates"]
+                    )
+            
+            if leads_data:
+                message = f"Search completed successfully. Found {len(leads_data)} leads matching your criteria."
+            else:
+                message = "Search completed but no leads found matching your criteria. Try adjusting your search parameters."
+            
+            yield _stream_frame(mode, "summary", {
+                "message": message,
+                "success": True,
+                "request_id": request_id,
+                "total": len(leads_data),
+                "has_more": metrics.get("surplus_buffered", 0) > 0,
+                "saved": save_summary,
+                "metrics": _attach_timings(metrics)
+            })
+            
+        except Exception as e:
+            logger.error(f"Error in streaming lead search {request_id}: {str(e)}", exc_info=True)
+            
+            yield _stream_frame(mode, "error", {
+                "message": f"Internal server error during lead search: {str(e)}",
+                "success": False,
+                "error": str(e),
+                "request_id": request_id
+            })
+
+async def _execute_search(
+    request: LeadSearchRequest,
+    user_id: str,
+    request_id: str,
+    progress: Optional[ProgressCallback] = None
+) -> Tuple[int, Dict[str, Any]]:
+    """
+    Run the search pipeline (LLM → crawl → process → save)
+    
+    Returns:
+        Tuple of (HTTP status code, response body)
+    """
+    report = progress or (lambda stage, data: None)
+    
+    try:
         # Process the search request using n8n workflow replication
-        leads_data, metrics = await ai_service.process_lead_search(request, user_id)
+        leads_data, metrics = await ai_service.process_lead_search(request, user_id, request_id, progress=progress)
         
         if not leads_data:
-            return JSONResponse(
-                status_code=200,
-                content={
-                    "message": "Search completed but no leads found matching your criteria. Try adjusting your search parameters.",
-                    "data": [{"leads_data": []}],
-                    "success": True,
-                    "request_id": request_id,
-                    "metrics": metrics
-                }
-            )
+            return 200, {
+                "message": "Search completed but no leads found matching your criteria. Try adjusting your search parameters.",
+                "data": [{"leads_data": []}],
+                "success": True,
+                "request_id": request_id,
+                "metrics": _attach_timings(metrics)
+            }
         
         # Prepare source query criteria for database storage
-        source_query_criteria = {
-            "mainQuery": request.main_query or "",
-            "filters": request.filters.model_dump(),
-            "maxResults": request.max_results,
-            "includeEnrichment": request.include_enrichment,
-            "requestId": request_id,
-            "timestamp": metrics.get("timestamp", "")
-        }
+        source_query_criteria = _build_source_query_criteria(request, request_id, metrics)
         
         # Save leads to database
-        await save_leads_background(
+        save_summary = await save_leads_background(
             leads_data,
             user_id,
             source_query_criteria,
             request_id
         )
+        report("saved", save_summary)
+        
+        _attach_timings(metrics)
         
         # Format response to match exact n8n output structure
-        n8n_formatted_response = [
-            {
-                "leads_data": [
-                    {
-                        "first_name": lead.first_name,
-                        "last_name": lead.last_name,
-                        "name": lead.name,
-                        "job_title": lead.job_title,
-                        "company_name": lead.company_name,
-                        "company_size": lead.company_size,
-                        "industry": lead.industry,
-                        "location": lead.location,
-                        "email": lead.email,
-                        "phone": lead.phone,
-                        "linkedin_url": lead.linkedin_url,
-                        "keywords": lead.keywords,
-                        "source_query_criteria": lead.source_query_criteria,
-                        "icebreaker": None
-                    }
-                    for lead in leads_data
-                ]
-            }
-        ]
+        n8n_formatted_response = _format_n8n_leads(leads_data)
         
         success_message = f"Search completed successfully. Found {len(leads_data)} leads matching your criteria."
         if metrics.get("total_enriched", 0) > 0:
             success_message += f" {metrics['total_enriched']} leads were enriched with additional data."
         
-        return JSONResponse(
-            status_code=200,
-            content={
-                "message": success_message,
-                "data": n8n_formatted_response,
-                "success": True,
-                "request_id": request_id,
-                "metrics": metrics
-            }
+        return 200, {
+            "message": success_message,
+            "data": n8n_formatted_response,
+            "success": True,
+            "request_id": request_id,
+            "has_more": metrics.get("surplus_buffered", 0) > 0,
+            "metrics": metrics
+        }
+        
+    except Exception as e:
+        logger.error(f"Error in lead search {request_id}: {str(e)}", exc_info=True)
+        
+        return 500, {
+            "message": f"Internal server error during lead search: {str(e)}",
+            "success": False,
+            "error": str(e),
+            "request_id": request_id
+        }
+
+@router.get(
+    "/jobs/{job_id}",
+    summary="Get the status and result of a search job"
+)
+async def get_search_job(
+    job_id: str,
+    user_id: str = Depends(require_authenticated_user)
+):
+    """Poll a background search job"""
+    job = job_manager.get(user_id, job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Search job not found or expired"
         )
+    return {"success": True, **job.to_dict()}
+
+@router.get(
+    "/jobs/{job_id}/events",
+    summary="Stream search job progress as server-sent events"
+)
+async def stream_search_job_events(
+    job_id: str,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    user_id: str = Depends(require_authenticated_user)
+):
+    """Follow a background search job's stage events until it finishes"""
+    job = job_manager.get(user_id, job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Search job not found or expired"
+        )
+    
+    resume_after = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+    return StreamingResponse(
+        job_manager.stream_events(job, resume_after),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get(
+    "/search/{request_id}/next",
+    summary="Get the next page of a previous search",
+    description="Serve additional leads from the surplus of an earlier crawl without starting a new one"
+)
+async def next_search_page(
+    request_id: str,
+    page_size: Optional[int] = Query(None, ge=1, le=500, description="Leads per page (defaults to the search's max results)"),
+    user_id: str = Depends(require_authenticated_user)
+):
+    """Serve the next page of leads for a search from its surplus buffer"""
+    try:
+        with start_trace("next_page", request_id=request_id, user_id=user_id):
+            page = await ai_service.next_page(user_id, request_id, page_size)
+            if page is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="No further leads buffered for this search. Run a new search to get more results."
+                )
+            
+            leads_data, metrics, request = page
+            
+            if leads_data:
+                await save_leads_background(
+                    leads_data,
+                    user_id,
+                    _build_source_query_criteria(request, request_id, metrics),
+                    request_id
+                )
+                
+            _attach_timings(metrics)
+        
+        with time_stage("serialization"):
+            return JSONResponse(
+                status_code=200,
+                content={
+                    "message": f"Returned {len(leads_data)} more leads. {metrics['remaining']} remaining.",
+                    "data": _format_n8n_leads(leads_data),
+                    "success": True,
+                    "request_id": request_id,
+                    "has_more": metrics["has_more"],
+                    "metrics": metrics
+                }
+            )
         
     except HTTPException:
-        # Re-raise HTTP exceptions
         raise
     except Exception as e:
-        logger.error(f"Error in lead search {request_id}: {str(e)}", exc_info=True)
-        
-        return JSONResponse(
-            status_code=500,
-            content={
-                "message": f"Internal server error during lead search: {str(e)}",
-                "success": False,
-                "error": str(e),
-                "request_id": request_id
-            }
+        logger.error(f"Error serving next page for search {request_id}: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error retrieving next page of leads"
         )
 
 async def save_leads_background(
@@ -147,83 +397,131 @@ async def save_leads_background(
     user_id: str,
     source_query_criteria: dict,
     request_id: str
-):
+) -> Dict[str, Any]:
     """
     Background task to save leads to database
+    
+    Uses the one-round-trip save_search_leads function when available and the
+    step-by-step checks otherwise.
+    
+    Returns:
+        Summary of how many leads were saved, restored or skipped as duplicates
     """
-    try:
-        logger.info(f"Saving {len(leads_data)} leads for request {request_id}")
-        
-        # Check for email duplicates
-        emails = [lead.email for lead in leads_data if lead.email]
-        existing_emails = []
-        if emails:
-            existing_emails = await get_supabase_service().check_duplicate_leads(user_id, emails)
-            if existing_emails:
-                logger.info(f"Found {len(existing_emails)} duplicate emails, filtering out")
-                leads_data = [lead for lead in leads_data if lead.email not in existing_emails]
+    summary = {"saved": 0, "restored": 0, "email_duplicates": 0, "id_duplicates": 0}
+    with span("save"):
+        try:
+            logger.info(f"Saving {len(leads_data)} leads for request {request_id}")
+            
+            outcome = await get_supabase_service().save_search_leads(leads_data, user_id, source_query_criteria)
+            if outcome is None:
+                outcome = await _save_leads_stepwise(leads_data, user_id, source_query_criteria, request_id)
+            summary.update(outcome)
+            logger.info(
+                f"Saved {summary['saved']} leads for request {request_id} "
+                f"({summary['restored']} restored, {summary['email_duplicates']} email and "
+                f"{summary['id_duplicates']} ID duplicates skipped)"
+            )
+                
+        except Exception as e:
+            summary["error"] = str(e)
+            logger.error(f"Error in background lead save for request {request_id}: {str(e)}")
         
-        # Check for ID duplicates in active tabs (new, saved)
-        lead_ids = [lead.id for lead in leads_data if lead.id]
-        logger.info(f"Checking {len(lead_ids)} lead IDs for duplicates: {lead_ids}")
-        existing_ids = []
-        archived_ids = []
+    return summary
+
+async def _save_leads_stepwise(
+    leads_data: list,
+    user_id: str,
+    source_query_criteria: dict,
+    request_id: str
+) -> Dict[str, Any]:
+    """
+    Dedupe and save leads with one query per step
+    
+    Returns:
+        Summary of how many leads were saved, restored or skipped as duplicates
+    """
+    summary = {"saved": 0, "restored": 0, "email_duplicates": 0, "id_duplicates": 0}
+    
+    # Check for email duplicates
+    emails = [lead.email for lead in leads_data if lead.email]
+    existing_emails = []
+    if emails:
+        existing_emails = await get_supabase_service().check_duplicate_leads(user_id, emails)
+        if existing_emails:
+            logger.info(f"Found {len(existing_emails)} duplicate emails, filtering out")
+            leads_data = [lead for lead in leads_data if lead.email not in existing_emails]
+    
+    # Check for ID duplicates in active tabs (new, saved)
+    lead_ids = [lead.id for lead in leads_data if lead.id]
+    logger.info(f"Checking {len(lead_ids)} lead IDs for duplicates: {lead_ids}")
+    existing_ids = []
+    archived_ids = []
+    
+    if lead_ids:
+        existing_ids = await get_supabase_service().check_duplicate_ids(user_id, lead_ids)
+        logger.info(f"Found {len(existing_ids)} duplicate IDs in active tabs: {existing_ids}")
+        if existing_ids:
+            logger.info(f"Filtering out {len(existing_ids)} duplicate IDs from active tabs")
+            leads_data = [lead for lead in leads_data if lead.id not in existing_ids]
         
-        if lead_ids:
-            existing_ids = await get_supabase_service().check_duplicate_ids(user_id, lead_ids)
-            logger.info(f"Found {len(existing_ids)} duplicate IDs in active tabs: {existing_ids}")
-            if existing_ids:
-                logger.info(f"Filtering out {len(existing_ids)} duplicate IDs from active tabs")
-                leads_data = [lead for lead in leads_data if lead.id not in existing_ids]
-            
-            # Check for leads in archived tab and restore them to new
-            remaining_ids = [lead.id for lead in leads_data if lead.id]
-            logger.info(f"Checking {len(remaining_ids)} remaining IDs for archived leads: {remaining_ids}")
-            if remaining_ids:
-                archived_ids = await get_supabase_service().check_archived_leads(user_id, remaining_ids)
-                logger.info(f"Found {len(archived_ids)} leads in archived tab: {archived_ids}")
-                if archived_ids:
-                    logger.info(f"Restoring {len(archived_ids)} leads from archived to new tab")
-                    restore_success = await get_supabase_service().restore_archived_leads(user_id, archived_ids)
-                    logger.info(f"Restore operation success: {restore_success}")
-                    # Filter out the restored leads from new insertion
-                    leads_data = [lead for lead in leads_data if lead.id not in archived_ids]
-                    logger.info(f"After filtering restored leads, {len(leads_data)} leads remain for insertion")
+        # Check for leads in archived tab and restore them to new
+        remaining_ids = [lead.id for lead in leads_data if lead.id]
+        logger.info(f"Checking {len(remaining_ids)} remaining IDs for archived leads: {remaining_ids}")
+        if remaining_ids:
+            archived_ids = await get_supabase_service().check_archived_leads(user_id, remaining_ids)
+            logger.info(f"Found {len(archived_ids)} leads in archived tab: {archived_ids}")
+            if archived_ids:
+                logger.info(f"Restoring {len(archived_ids)} leads from archived to new tab")
+                restore_success = await get_supabase_service().restore_archived_leads(user_id, archived_ids)
+                logger.info(f"Restore operation success: {restore_success}")
+                # Filter out the restored leads from new insertion
+                leads_data = [lead for lead in leads_data if lead.id not in archived_ids]
+                logger.info(f"After filtering restored leads, {len(leads_data)} leads remain for insertion")
+    
+    summary.update({
+        "restored": len(archived_ids),
+        "email_duplicates": len(existing_emails),
+        "id_duplicates": len(existing_ids)
+    })
+    
+    if leads_data:
+        total_duplicates = len(existing_emails) + len(existing_ids)
+        if total_duplicates > 0:
+            logger.info(f"Filtered out {total_duplicates} total duplicates ({len(existing_emails)} email, {len(existing_ids)} ID)")
         
-        if leads_data:
-            total_duplicates = len(existing_emails) + len(existing_ids)
-            if total_duplicates > 0:
-                logger.info(f"Filtered out {total_duplicates} total duplicates ({len(existing_emails)} email, {len(existing_ids)} ID)")
-            
-            # Final safety check: ensure all leads have unique IDs within this batch
-            unique_leads = {}
-            for lead in leads_data:
-                if lead.id not in unique_leads:
-                    unique_leads[lead.id] = lead
-                else:
-                    logger.warning(f"Found duplicate ID within batch: {lead.id}, keeping first occurrence")
-            
-            final_leads_data = list(unique_leads.values())
-            if len(final_leads_data) != len(leads_data):
-                logger.info(f"Removed {len(leads_data) - len(final_leads_data)} intra-batch duplicates")
-            
-            # Save to database
-            save_result = await get_supabase_service().save_leads_batch(
-                final_leads_data,
-                user_id,
-                source_query_criteria
-            )
-            
-            if save_result["success"]:
-                logger.info(f"Successfully saved {save_result['inserted_count']} leads for request {request_id}")
+        # Final safety check: ensure all leads have unique IDs within this batch
+        unique_leads = {}
+        for lead in leads_data:
+            if lead.id not in unique_leads:
+                unique_leads[lead.id] = lead
             else:
-                logger.error(f"Failed to save leads for request {request_id}: {save_result.get('error')}")
+                logger.warning(f"Found duplicate ID within batch: {lead.id}, keeping first occurrence")
+        
+        final_leads_data = list(unique_leads.values())
+        if len(final_leads_data) != len(leads_data):
+            logger.info(f"Removed {len(leads_data) - len(final_leads_data)} intra-batch duplicates")
+        
+        # Save to database
+        save_result = await get_supabase_service().save_leads_batch(
+            final_leads_data,
+            user_id,
+            source_query_criteria
+        )
+        
+        # A failed save may still have written some leads
+        summary["saved"] = save_result["inserted_count"]
+        if save_result.get("rejected"):
+            summary["rejected"] = save_result["rejected"]
+        if save_result["success"]:
+            logger.info(f"Successfully saved {save_result['inserted_count']} leads for request {request_id}")
         else:
-            total_duplicates = len(existing_emails) + len(existing_ids)
-            logger.info(f"No new leads to save for request {request_id} (all {total_duplicates} were duplicates)")
-            
-    except Exception as e:
-        logger.error(f"Error in background lead save for request {request_id}: {str(e)}")
+            summary["error"] = save_result.get("error")
+            logger.error(f"Failed to save leads for request {request_id} after saving {save_result['inserted_count']}: {save_result.get('error')}")
+    else:
+        total_duplicates = len(existing_emails) + len(existing_ids)
+        logger.info(f"No new leads to save for request {request_id} (all {total_duplicates} were duplicates)")
+    
+    return summary
 
 @router.post(
     "/enrich/{lead_id}",
@@ -332,6 +630,58 @@ async def bulk_operation(
             detail="Error performing bulk operation"
         )
 
+@router.post(
+    "/import",
+    summary="Import leads from another source"
+)
+async def import_leads(
+    request: LeadImportRequest,
+    user_id: str = Depends(require_authenticated_user)
+):
+    """
+    Import leads with the same dedupe and restore rules as a search's save
+    
+    Imports large enough for the direct Postgres COPY path (DATABASE_URL and
+    DATABASE_COPY_THRESHOLD) are saved in one load; otherwise they are saved
+    LEAD_IMPORT_CHUNK_SIZE leads at a time.
+    """
+    if len(request.leads) > settings.LEAD_IMPORT_MAX_LEADS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"An import cannot exceed {settings.LEAD_IMPORT_MAX_LEADS} leads"
+        )
+    
+    import_id = str(uuid.uuid4())
+    source_query_criteria = {
+        "source": "import",
+        "importSource": request.source or "",
+        "requestId": import_id,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+    
+    leads_data = request.leads
+    chunk_size = len(leads_data)
+    if not get_supabase_service().use_bulk_load(len(leads_data)):
+        chunk_size = settings.LEAD_IMPORT_CHUNK_SIZE
+    
+    summary = {"saved": 0, "restored": 0, "email_duplicates": 0, "id_duplicates": 0}
+    for start in range(0, len(leads_data), chunk_size):
+        outcome = await save_leads_background(leads_data[start:start + chunk_size], user_id, source_query_criteria, import_id)
+        for key in summary:
+            summary[key] += outcome.get(key, 0)
+        if outcome.get("rejected"):
+            summary.setdefault("rejected", []).extend(outcome["rejected"])
+        if "error" in outcome:
+            summary["error"] = outcome["error"]
+            break
+    
+    return {
+        "success": "error" not in summary,
+        "import_id": import_id,
+        "received": len(leads_data),
+        "summary": summary
+    }
+
 @router.get(
     "/test-connection",
     summary="Test database connection and n8n workflow replication"
@@ -360,6 +710,8 @@ async def test_connection(
             },
             "database_stats": stats,
             "ai_services": ai_status,
+            "url_cache": ai_service.url_cache.stats(),
+            "crawl_scheduler": crawl_scheduler.stats(user_info["user_id"]),
             "workflow_components": {
                 "llm_to_apollo_url": ai_status["openai_available"] or ai_status["anthropic_available"],
                 "apify_crawler": ai_status["apify_available"],
@@ -5,98 +5,129 @@ Replicates n8n workflow: LLM -> Apollo URL -> Apify Crawler -> Lead Data
 
 import asyncio
 import logging
-import json
 import re
-import uuid
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, AsyncIterator, Callable, Optional, Tuple
 from datetime import datetime
-from openai import OpenAI # Use the official library
-from anthropic import Anthropic
 import httpx
-from apify_client import ApifyClient
+from apify_client import ApifyClientAsync
 
 from leadgen_app.config import settings
 from leadgen_app.models.request_models import LeadSearchRequest, LeadFilters
-from leadgen_app.models.response_models import LeadData, ConfidenceLevel
-from leadgen_app.models.lead_models import ApifyLeadData, ProcessedLead, convert_apify_to_processed
+from leadgen_app.models.response_models import LeadData
+from leadgen_app.models.lead_models import apify_lead_id, convert_apify_batch
+from leadgen_app.services.crawl_planner import crawl_planner
+from leadgen_app.services.crawl_scheduler import crawl_scheduler
+from leadgen_app.services.lead_buffer import lead_buffer
+from leadgen_app.services.apify_dataset import ApifyDatasetReader
+from leadgen_app.services.apify_runs import ActorRunHandle, ActorRunRegistry
+from leadgen_app.services.llm_client import AnthropicLLMClient, HedgedLLMRouter, LLMClient, OpenAILLMClient
+from leadgen_app.services.prompt_templates import RenderedPrompt, detect_input_mode, render_prompt
+from leadgen_app.services.supabase_service import get_supabase_service
+from leadgen_app.utils.apollo_url import (
+    ApolloUrlError,
+    canonical_request_key,
+    compile_apollo_params,
+    compile_apollo_url,
+    complete_search_url_json,
+    merge_apollo_params,
+    repair_apollo_url
+)
+from leadgen_app.utils.cache import TTLCache
 from leadgen_app.utils.helpers import log_processing_metrics
+from leadgen_app.utils.metrics import time_stage
+from leadgen_app.utils.singleflight import SingleFlight
+from leadgen_app.utils.tracing import span
 
 logger = logging.getLogger(__name__)
 
-# Apollo Industry ID Mapping (from n8n workflow)
-APOLLO_INDUSTRY_IDS = {
-    "information technology & services": "5567cd4773696439b10b0000",
-    "construction": "5567cd4773696439dd350000",
-    "marketing & advertising": "5567cd467369644d39040000",
-    "health, wellness & fitness": "5567cddb7369644d250c0000",
-    "pharmaceuticals": "5567e0eb73696410e4bd1200",
-    "biotechnology": "5567d08e7369645dbc4b0000",
-    "real estate": "5567cd477369645401010000",
-    "management consulting": "5567cdd47369643dbf260000",
-    "computer software": "5567cd4e7369643b70010000",
-    "internet": "5567cd4d736964397e020000",
-    "semiconductors": "5567e0d87369640e5aa30c00",
-    "retail": "5567ced173696450cb580000",
-    "financial services": "5567cdd67369643e64020000",
-    "consumer services": "5567d1127261697f2b1d0000",
-    "hospital & health care": "5567cdde73696439812c0000",
-    "automotive": "5567cdf27369644cfd800000",
-    "restaurants": "5567e0e0736964198de70700",
-    "education management": "5567ce9e736964540d540000",
-    "food & beverages": "5567ce1e7369643b806a0000",
-    "design": "5567cdbc73696439d90b0000",
-    "apparel & fashion": "5567cd82736964540d0b0000",
-    "import & export": "5567ce9d7369645430c50000",
-    "hospitality": "5567ce9d7369643bc19c0000",
-    "accounting": "5567ce1f7369643b78570000",
-    "events services": "5567cd8e7369645409450000",
-    "luxury goods & jewelry": "5567cda97369644cfd3e0000",
-    "cosmetics": "5567e1ae73696423dc040000",
-    "logistics & supply chain": "5567cd4973696439b9010000",
-    "warehousing": "5567e127736964181e700200",
-    "package/freight delivery": "5567e8bb7369641a658f0000"
-}
+# Progress callback: receives a stage name and stage details
+ProgressCallback = Callable[[str, Dict[str, Any]], None]
+
+# Apify actor scraping Apollo.io search results
+APOLLO_SCRAPER_ACTOR_ID = "jljBwyyQakqrL1wae"
 
 class AIService:
     """AI service replicating n8n workflow for lead generation"""
     
     def __init__(self):
-        self.openai_client = None
+        self.llm = None
         self.apify_client = None
+        self.dataset_reader = None
+        self.actor_runs = None
+        self.url_cache = TTLCache(
+            maxsize=settings.URL_CACHE_MAX_ENTRIES,
+            ttl=settings.URL_CACHE_TTL
+        )
+        self._url_flights = SingleFlight()
         
+        providers: List[LLMClient] = []
         if settings.OPENAI_API_KEY:
             logger.info("OpenAI API key is loaded. Initializing client.")
-            self.openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
+            providers.append(OpenAILLMClient(api_key=settings.OPENAI_API_KEY))
+        if settings.ANTHROPIC_API_KEY:
+            logger.info("Anthropic API key is loaded. Initializing client.")
+            providers.append(AnthropicLLMClient(api_key=settings.ANTHROPIC_API_KEY))
+        if settings.OPENAI_API_KEY and settings.LLM_HEDGE_MODEL:
+            providers.append(OpenAILLMClient(api_key=settings.OPENAI_API_KEY, model=settings.LLM_HEDGE_MODEL))
+        
+        if providers:
+            self.llm = HedgedLLMRouter(providers)
+            logger.info(f"LLM providers: {[provider.name for provider in providers]}")
         else:
-            logger.warning("OpenAI API key is NOT loaded. LLM functionality will be disabled.")
+            logger.warning("No LLM API key is loaded. LLM functionality will be disabled.")
             
         if settings.APIFY_API_TOKEN:
-            self.apify_client = ApifyClient(settings.APIFY_API_TOKEN)
+            self.apify_client = ApifyClientAsync(settings.APIFY_API_TOKEN, api_url=settings.APIFY_API_URL)
+            self.dataset_reader = ApifyDatasetReader(self.apify_client)
+            self.actor_runs = ActorRunRegistry(self.apify_client, APOLLO_SCRAPER_ACTOR_ID, crawl_scheduler)
     
     async def process_lead_search(
         self, 
         request: LeadSearchRequest, 
-        user_id: str
+        user_id: str,
+        request_id: Optional[str] = None,
+        progress: Optional[ProgressCallback] = None
     ) -> Tuple[List[LeadData], Dict[str, Any]]:
         """
         Main method replicating n8n workflow.
+        
+        When request_id is given, crawled records beyond max_results are kept
+        in the surplus buffer for next_page(). Stage progress is reported
+        through the optional progress callback.
         """
+        report = progress or (lambda stage, data: None)
         start_time = datetime.now()
         logger.info(f"--- URL Generation Debug Trace ---")
         logger.info(f"[1/5] Starting lead search for user {user_id}. Request data:\n{request.model_dump()}")
         
+        stage_metrics: Dict[str, Any] = {}
+        
         try:
-            apollo_url = await self._convert_to_apollo_url(request)
+            apollo_url = await self._convert_to_apollo_url(request, stage_metrics)
             
             logger.info(f"[6/6] Final URL passed to Apify crawler: {apollo_url}")
+            report("url_generated", {"apollo_url": apollo_url, "url_source": stage_metrics.get("url_source", "cache")})
             
-            raw_leads = await self._run_apify_crawler(apollo_url, request.max_results)
-            logger.info(f"Apify crawler returned {len(raw_leads)} leads")
+            crawl_plan = crawl_planner.plan(user_id, request.max_results)
+            report("crawl_running", {"planned_records": crawl_plan["planned_records"]})
+            with span("crawl"):
+                raw_leads, crawl_metrics = await self._run_apify_crawler(apollo_url, crawl_plan["planned_records"], user_id)
+            crawl_shared = crawl_metrics.get("crawl_coalesced", False)
+            stage_metrics.update(crawl_metrics)
+            report("crawl_completed", {"records": len(raw_leads), "shared": crawl_shared})
+            logger.info(f"Apify crawler returned {len(raw_leads)} leads{' (shared with a concurrent identical search)' if crawl_shared else ''}")
             
-            processed_leads = await self._process_apify_leads(raw_leads, request, user_id)
+            # Leads the user does not have yet come first; the overscan covers the expected duplicates
+            fresh_leads, known_leads = await self._split_known_leads(raw_leads, user_id)
+            used_leads = (fresh_leads + known_leads)[:request.max_results]
+            processed_leads = await self._process_apify_leads(used_leads, request, user_id)
+            report("processed", {"count": len(processed_leads)})
             
-            processing_time = (datetime.now() - start_time).total_seconds()
-            metrics = self._generate_metrics(processed_leads, processing_time, 1)
+            metrics = self._finalize_search(
+                request, user_id, request_id, processed_leads,
+                crawl_plan, len(raw_leads), len(used_leads), len(known_leads),
+                fresh_leads[request.max_results:], start_time, stage_metrics
+            )
             
             logger.info(f"Lead search completed: {len(processed_leads)} leads processed")
             return processed_leads, metrics
@@ -105,221 +136,399 @@ class AIService:
             logger.error(f"Error in lead search processing: {str(e)}")
             raise
     
-    async def _convert_to_apollo_url(self, request: LeadSearchRequest) -> str:
+    async def stream_lead_search(
+        self,
+        request: LeadSearchRequest,
+        user_id: str,
+        request_id: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
         """
-        Convert natural language input to Apollo.io search URL using LLM.
+        Streaming variant of process_lead_search.
+        
+        Reads the dataset while the actor is still writing it and converts it
+        page by page, so the first leads are available after the first page
+        instead of after the whole crawl.
+        
+        Each page skips leads the user already has only when the lead filter is
+        enabled, so that most pages need no database lookup. Without it, leads
+        are taken in crawl order and the save's duplicate checks measure the
+        dedupe loss instead (metrics["crawl_prechecked"] is False).
+        
+        Yields:
+            ("leads", List[LeadData]) for each converted batch, then
+            ("summary", metrics) once the crawl is drained
         """
-        # Log input mode detection
-        has_regular_input = request.main_query and request.main_query.strip()
-        has_advanced_input = any(
-            getattr(request.filters, field, None) and str(getattr(request.filters, field, '')).strip()
-            for field in ['job_title', 'industry', 'location', 'company_size', 'company_names', 'general_keywords']
-        )
+        start_time = datetime.now()
+        logger.info(f"Starting streaming lead search for user {user_id}. Request data:\n{request.model_dump()}")
         
-        input_mode = "regular" if has_regular_input and not has_advanced_input else "advanced"
-        logger.info(f"[2/5] Input mode detected: {input_mode}")
-        logger.info(f"      Regular input: {'Yes' if has_regular_input else 'No'}")
-        logger.info(f"      Advanced input: {'Yes' if has_advanced_input else 'No'}")
+        stage_metrics: Dict[str, Any] = {}
+        apollo_url = await self._convert_to_apollo_url(request, stage_metrics)
+        
+        crawl_plan = crawl_planner.plan(user_id, request.max_results)
+        planned_records = crawl_plan["planned_records"]
         
-        prompt = self._construct_llm_prompt(request)
-        logger.info(f"[3/5] Constructed LLM prompt for {input_mode} mode:\n{prompt}")
+        processed_leads: List[LeadData] = []
+        surplus: List[Dict[str, Any]] = []
+        known: List[Dict[str, Any]] = []
+        returned_count = 0
+        used_count = 0
+        precheck = get_supabase_service().lead_filters is not None
+        stage_metrics["crawl_prechecked"] = precheck
         
         try:
-            if not self.openai_client:
-                raise ValueError("OpenAI client not available. Please configure OPENAI_API_KEY.")
+            handle, crawl_shared = await self._start_apify_run(apollo_url, planned_records, user_id)
+            stage_metrics["crawl_coalesced"] = crawl_shared
+            if handle.ticket:
+                stage_metrics.update(handle.ticket.to_metrics())
             
-            response = await self._call_openai(prompt, max_tokens=1500)
-            logger.info(f"[4/5] Raw response from OpenAI:\n{response}")
-            
-            try:
-                result = json.loads(response.strip())
-                apollo_url = result.get("searchUrl", "")
+            async for page in self.dataset_reader.iter_live_pages(
+                handle.dataset_id,
+                handle.finished,
+                limit=planned_records,
+                page_size=settings.APIFY_STREAM_PAGE_SIZE
+            ):
+                returned_count += len(page)
+                # Leads the user already has wait until the crawl has no new ones left to fill max_results
+                if precheck:
+                    fresh_page, known_page = await self._split_known_leads(page, user_id)
+                else:
+                    fresh_page, known_page = page, []
+                known.extend(known_page)
+                used_page = fresh_page[:max(request.max_results - used_count, 0)]
+                surplus.extend(fresh_page[len(used_page):])
+                used_count += len(used_page)
                 
-                if not apollo_url or not apollo_url.startswith("https://app.apollo.io"):
-                    raise ValueError(f"LLM generated an invalid Apollo URL: {apollo_url}")
+                if used_page:
+                    batch = await self._process_apify_leads(used_page, request, user_id)
+                    if batch:
+                        if not processed_leads:
+                            stage_metrics["time_to_first_lead"] = round((datetime.now() - start_time).total_seconds(), 2)
+                        processed_leads.extend(batch)
+                        yield "leads", batch
                 
-                logger.info(f"[5/5] Successfully parsed URL from LLM response: {apollo_url}")
+                # Without a request id there is nowhere to keep the surplus
+                if not request_id and used_count >= request.max_results:
+                    break
+                    
+        except Exception as e:
+            logger.error(f"Apify crawler error: {str(e)}")
+        
+        shortfall = known[:max(request.max_results - used_count, 0)]
+        if shortfall:
+            used_count += len(shortfall)
+            batch = await self._process_apify_leads(shortfall, request, user_id)
+            if batch:
+                processed_leads.extend(batch)
+                yield "leads", batch
+        
+        metrics = self._finalize_search(
+            request, user_id, request_id, processed_leads,
+            crawl_plan, returned_count, used_count, len(known) if precheck else None,
+            surplus, start_time, stage_metrics
+        )
+        
+        logger.info(f"Streaming lead search completed: {len(processed_leads)} leads processed")
+        yield "summary", metrics
+    
+    def _finalize_search(
+        self,
+        request: LeadSearchRequest,
+        user_id: str,
+        request_id: Optional[str],
+        processed_leads: List[LeadData],
+        crawl_plan: Dict[str, Any],
+        returned_count: int,
+        used_count: int,
+        known_count: Optional[int],
+        surplus: List[Dict[str, Any]],
+        start_time: datetime,
+        stage_metrics: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Buffer the crawl surplus, feed the dedupe loss to the crawl planner and build the search metrics
+        
+        known_count is None when the crawled records were not checked against
+        the user's leads; the caller then records the loss from the save.
+        """
+        stage_metrics["crawl_planned_records"] = crawl_plan["planned_records"]
+        stage_metrics["crawl_returned_records"] = returned_count
+        stage_metrics["crawl_used_records"] = used_count
+        stage_metrics["crawl_known_records"] = known_count
+        stage_metrics["crawl_expected_loss_rate"] = crawl_plan["loss_rate"]
+        if known_count is not None:
+            crawl_planner.record_dedupe(user_id, returned_count, known_count)
+        
+        if request_id and surplus:
+            lead_buffer.put(user_id, request_id, request, surplus)
+        stage_metrics["surplus_buffered"] = len(surplus) if request_id else 0
+        
+        processing_time = (datetime.now() - start_time).total_seconds()
+        metrics = self._generate_metrics(processed_leads, processing_time, stage_metrics.get("ai_queries_used", 0))
+        metrics.update(stage_metrics)
+        return metrics
+    
+    async def next_page(
+        self,
+        user_id: str,
+        request_id: str,
+        page_size: Optional[int] = None
+    ) -> Optional[Tuple[List[LeadData], Dict[str, Any], LeadSearchRequest]]:
+        """
+        Serve the next page of a previous search from the surplus buffer.
+        
+        Returns:
+            Tuple of (leads, metrics, original request), or None if the search
+            has no buffered leads left
+        """
+        start_time = datetime.now()
+        buffered = lead_buffer.take(user_id, request_id, page_size)
+        if buffered is None:
+            return None
+        
+        request, raw_leads, remaining = buffered
+        processed_leads = await self._process_apify_leads(raw_leads, request, user_id)
+        
+        processing_time = (datetime.now() - start_time).total_seconds()
+        metrics = self._generate_metrics(processed_leads, processing_time, 0)
+        metrics["remaining"] = remaining
+        metrics["has_more"] = remaining > 0
+        
+        logger.info(f"Served {len(processed_leads)} buffered leads for request {request_id}, {remaining} remaining")
+        return processed_leads, metrics, request
+    
+    async def _convert_to_apollo_url(
+        self,
+        request: LeadSearchRequest,
+        stage_metrics: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Convert natural language input to Apollo.io search URL using LLM.
+        
+        Results are cached per canonical request, so repeated searches skip the LLM.
+        """
+        stage_metrics = stage_metrics if stage_metrics is not None else {}
+        cache_key = canonical_request_key(request)
+        cached_url = self.url_cache.get(cache_key)
+        stage_metrics["url_cache_hit"] = cached_url is not None
+        if cached_url:
+            logger.info(f"[2/5] Apollo URL cache hit: {cached_url} (cache stats: {self.url_cache.stats()})")
+            return cached_url
+        
+        async def generate() -> Tuple[str, Dict[str, Any]]:
+            # Metrics travel with the shared result so every caller reports the same generation
+            url_metrics: Dict[str, Any] = {}
+            return await self._generate_apollo_url(request, cache_key, url_metrics), url_metrics
+        
+        # Identical requests arriving together share one generation
+        with time_stage("url_generation"):
+            (apollo_url, url_metrics), shared = await self._url_flights.do(cache_key, generate)
+        stage_metrics.update(url_metrics)
+        stage_metrics["url_coalesced"] = shared
+        if shared:
+            logger.info(f"[5/5] Joined in-flight URL generation for identical request: {apollo_url}")
+        return apollo_url
+    
+    async def _generate_apollo_url(
+        self,
+        request: LeadSearchRequest,
+        cache_key: str,
+        stage_metrics: Dict[str, Any]
+    ) -> str:
+        """
+        Generate an Apollo URL (compiler first, LLM for the rest) and cache it.
+        """
+        input_mode = detect_input_mode(request)
+        logger.info(f"[2/5] Input mode detected: {input_mode}")
+        
+        # Advanced mode: map structured filters locally, leaving only unmappable filters to the LLM.
+        # Free text next to filters is context for those filters, never a reason to call the LLM.
+        compiled_params: Dict[str, List[str]] = {}
+        llm_request = request
+        if input_mode == "advanced":
+            compiled_params, unmapped_fields = compile_apollo_params(request.filters, request.main_query)
+            llm_fields = [field for field in unmapped_fields if field != "main_query"]
+            if not llm_fields:
+                apollo_url = compile_apollo_url(compiled_params)
+                stage_metrics["url_source"] = "compiler"
+                self.url_cache.set(cache_key, apollo_url)
+                logger.info(f"[5/5] Compiled Apollo URL locally without LLM: {apollo_url}")
                 return apollo_url
-                
-            except json.JSONDecodeError as e:
-                raise ValueError(f"Failed to parse LLM response as JSON: {str(e)}")
+            
+            logger.info(f"      Compiled {len(compiled_params)} parameters locally, LLM fallback for: {llm_fields}")
+            llm_request = request.model_copy(update={
+                "filters": LeadFilters(**{field: getattr(request.filters, field) for field in llm_fields})
+            })
+        
+        prompt = render_prompt(llm_request, mode=input_mode)
+        prompt_metrics = prompt.size_metrics()
+        stage_metrics.update(prompt_metrics)
+        logger.info(f"[3/5] Rendered LLM prompt for {prompt.mode} mode ({prompt_metrics['prompt_bytes']} bytes, ~{prompt_metrics['prompt_tokens']} tokens):\n{prompt.body}")
+        
+        try:
+            if not self.llm:
+                raise ValueError("LLM client not available. Please configure OPENAI_API_KEY or ANTHROPIC_API_KEY.")
+            
+            llm_start = datetime.now()
+            try:
+                apollo_url, repairs = await self._call_llm(prompt, self._parse_apollo_url, max_tokens=1500, usage=stage_metrics)
+            except ApolloUrlError as e:
+                # Only an unrepairable answer costs another round trip
+                logger.warning(f"[4/5] LLM URL could not be repaired ({str(e)}), re-prompting once")
+                stage_metrics["url_reprompted"] = True
+                apollo_url, repairs = await self._call_llm(
+                    prompt.with_correction(str(e)),
+                    self._parse_apollo_url,
+                    max_tokens=1500,
+                    usage=stage_metrics
+                )
+            finally:
+                stage_metrics["ai_queries_used"] = stage_metrics.get("llm_calls", 0)
+            
+            stage_metrics["url_repairs"] = repairs
+            stage_metrics["time_to_url"] = round((datetime.now() - llm_start).total_seconds(), 3)
+            # Compiled parameters replace whatever the LLM produced for the same fields
+            apollo_url = merge_apollo_params(apollo_url, compiled_params)
+            stage_metrics["url_source"] = "compiler+llm" if compiled_params else "llm"
+            self.url_cache.set(cache_key, apollo_url)
+            logger.info(f"[5/5] Successfully parsed URL from {stage_metrics.get('llm_provider')} response: {apollo_url}")
+            return apollo_url
                 
         except Exception as e:
             logger.error(f"Apollo URL generation failed: {str(e)}")
             raise
     
-    def _construct_llm_prompt(self, request: LeadSearchRequest) -> str:
-        """Constructs the prompt for the LLM based on input mode."""
-        
-        # Determine if we're in regular input mode or advanced input mode
-        has_regular_input = request.main_query and request.main_query.strip()
-        has_advanced_input = any(
-            getattr(request.filters, field, None) and str(getattr(request.filters, field, '')).strip()
-            for field in ['job_title', 'industry', 'location', 'company_size', 'company_names', 'general_keywords']
-        )
+    @staticmethod
+    def _parse_apollo_url(response: str) -> Tuple[str, List[str]]:
+        """
+        Extract the Apollo search URL from an LLM response, repairing it locally
         
-        if has_regular_input and not has_advanced_input:
-            # Regular input mode - LLM should parse and populate filter fields
-            return self._construct_regular_input_prompt(request)
-        else:
-            # Advanced input mode - directly insert entered values into prompt
-            return self._construct_advanced_input_prompt(request)
-    
-    def _construct_regular_input_prompt(self, request: LeadSearchRequest) -> str:
-        """Constructs prompt for regular input mode where LLM parses natural language."""
-        return f"""
-Your task is to convert a natural language description of prospects into a precise Apollo.io Search URL.
-
-**REGULAR INPUT MODE**: Parse the natural language input and extract all filter criteria from it.
-
-Process:
-1. **Parse the input description** to extract job titles, locations, company names, industry, and keywords
-2. **Generate the Apollo URL** using the extracted information as the main filters
-
-Example parsing:
-Input: "Marketing manager at OpenAI in California"
-Extracted filters:
-- Job Title: Marketing manager
-- Industry: Not specified  
-- Location: California
-- Company Size: Not specified
-- Company Names: OpenAI
-- Keywords: Not specified
-
-**Base URL (always start with this):**
-https://app.apollo.io/#/people?page=1
-
-Apollo URL Parameters:
-- `&contactEmailStatusV2[]=verified`: REQUIRED - must be included in every URL
-- `&personLocations[]`: Geographic locations (e.g., "United States", "NYC", "San Francisco")
-- `&personTitles[]`: Job titles (e.g., "project manager", "director")  
-- `&qOrganizationKeywordTags[]`: Specific company names (e.g., "Google", "OpenAI")
-- `&includedOrganizationKeywordFields[]=name`: Required when using qOrganizationKeywordTags
-- `&qAndedOrganizationKeywordTags[]`: Company-related concepts/keywords (e.g., "startup", "VC-backed")
-- `&includedAndedOrganizationKeywordFields[]=name`: Required when using qAndedOrganizationKeywordTags
-- `&includedAndedOrganizationKeywordFields[]=tags`: Additional field for keyword matching
-- `&organizationIndustryTagIds[]`: Industries (map name to ID from reference below)
-- `&organizationNumEmployeesRanges[]`: Company size ranges
-
-Company Size Mapping:
-- "1-10" → &organizationNumEmployeesRanges[]=1%2C10
-- "11-50" → &organizationNumEmployeesRanges[]=11%2C50  
-- "51-200" → &organizationNumEmployeesRanges[]=51%2C200
-- "201-500" → &organizationNumEmployeesRanges[]=201%2C500
-- "501-1000" → &organizationNumEmployeesRanges[]=501%2C1000
-- "1001-5000" → &organizationNumEmployeesRanges[]=1001%2C5000
-- "5001-10000" → &organizationNumEmployeesRanges[]=5001%2C10000
-- "10001+" → &organizationNumEmployeesRanges[]=10001%2C
-
-**IMPORTANT RULES:**
-- You **MUST** start with the base URL: https://app.apollo.io/#/people?page=1
-- You **MUST** include `&contactEmailStatusV2[]=verified` in every URL
-- Only use information explicitly mentioned in the input
-- Do not infer or add extra filters
-- URL encode spaces as %20 and special characters appropriately
-
-Industry ID Reference:
-{json.dumps(list(APOLLO_INDUSTRY_IDS.items()), indent=2)}
-
-Input Description: "{request.main_query or ''}"
-
-Return the generated URL in JSON format:
-{{"searchUrl":"Search URL goes here"}}
-"""
-
-    def _construct_advanced_input_prompt(self, request: LeadSearchRequest) -> str:
-        """Constructs prompt for advanced input mode where values are directly inserted."""
-        return f"""
-Your task is to convert specified filter criteria into a precise Apollo.io Search URL.
-
-**ADVANCED INPUT MODE**: Use the provided filter values directly to construct the URL.
-
-The following filter criteria have been specified:
-- Job Title: {request.filters.job_title or 'Not specified'}
-- Industry: {request.filters.industry or 'Not specified'}
-- Location: {request.filters.location or 'Not specified'}
-- Company Size: {request.filters.company_size or 'Not specified'}
-- Company Names: {request.filters.company_names or 'Not specified'}
-- Keywords: {request.filters.general_keywords or 'Not specified'}
-
-{f'Additional context from regular input: "{request.main_query}"' if request.main_query and request.main_query.strip() else ''}
-
-**Base URL (always start with this):**
-https://app.apollo.io/#/people?page=1
-
-Apollo URL Parameters:
-- `&contactEmailStatusV2[]=verified`: REQUIRED - must be included in every URL
-- `&personLocations[]`: Geographic locations (e.g., "United States", "NYC", "San Francisco")
-- `&personTitles[]`: Job titles (e.g., "project manager", "director")
-- `&qOrganizationKeywordTags[]`: Specific company names (e.g., "Google", "OpenAI")
-- `&includedOrganizationKeywordFields[]=name`: Required when using qOrganizationKeywordTags
-- `&qAndedOrganizationKeywordTags[]`: Company-related concepts/keywords (e.g., "startup", "VC-backed")
-- `&includedAndedOrganizationKeywordFields[]=name`: Required when using qAndedOrganizationKeywordTags
-- `&includedAndedOrganizationKeywordFields[]=tags`: Additional field for keyword matching
-- `&organizationIndustryTagIds[]`: Industries (map name to ID from reference below)
-- `&organizationNumEmployeesRanges[]`: Company size ranges
-
-Company Size Mapping:
-- "1-10" → &organizationNumEmployeesRanges[]=1%2C10
-- "11-50" → &organizationNumEmployeesRanges[]=11%2C50  
-- "51-200" → &organizationNumEmployeesRanges[]=51%2C200
-- "201-500" → &organizationNumEmployeesRanges[]=201%2C500
-- "501-1000" → &organizationNumEmployeesRanges[]=501%2C1000
-- "1001-5000" → &organizationNumEmployeesRanges[]=1001%2C5000
-- "5001-10000" → &organizationNumEmployeesRanges[]=5001%2C10000
-- "10001+" → &organizationNumEmployeesRanges[]=10001%2C
-
-Industry ID Reference:
-{json.dumps(list(APOLLO_INDUSTRY_IDS.items()), indent=2)}
-
-**IMPORTANT RULES:**
-- You **MUST** start with the base URL: https://app.apollo.io/#/people?page=1
-- You **MUST** include `&contactEmailStatusV2[]=verified` in every URL
-- Use only the specified filter values - do not infer additional criteria
-- For "Not specified" fields, do not include those parameters in the URL
-- URL encode spaces as %20 and special characters appropriately
-
-Return the generated URL in JSON format:
-{{"searchUrl":"Search URL goes here"}}
-"""
-
-
+        Returns:
+            Tuple of (Apollo URL, repairs applied)
+        
+        Raises:
+            ApolloUrlError: If no usable Apollo URL can be recovered
+        """
+        logger.info(f"[4/5] Raw response from LLM:\n{response}")
+        apollo_url, repairs = repair_apollo_url(response)
+        if repairs:
+            logger.info(f"      Repaired LLM URL locally: {repairs}")
+        return apollo_url, repairs
     
-    async def _run_apify_crawler(self, apollo_url: str, max_results: int) -> List[Dict[str, Any]]:
+    async def _run_apify_crawler(
+        self,
+        apollo_url: str,
+        total_records: int,
+        user_id: str
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
         """
         Run Apify crawler to scrape Apollo.io
+        
+        Identical concurrent crawls share one actor run (ActorRunRegistry);
+        each caller then reads the finished dataset itself.
+        
+        Args:
+            apollo_url: Apollo search URL
+            total_records: Number of records to crawl (from the crawl planner)
+            user_id: User the crawl is scheduled for
+        
+        Returns:
+            Tuple of (dataset items, crawl metrics: crawl_coalesced and queueing)
         """
         if not self.apify_client:
             raise ValueError("Apify client not initialized - missing APIFY_API_TOKEN")
         
+        queue_metrics: Dict[str, Any] = {}
         try:
-            run_input = {
-                "url": apollo_url,
-                "totalRecords": max(500, min(max_results, 500)),
-                "fileName": "Apollo Prospects"
-            }
-            
-            logger.info(f"Running Apify actor with input: {run_input}")
-            
-            run = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: self.apify_client.actor("jljBwyyQakqrL1wae").call(run_input=run_input)
-            )
+            handle, shared = await self._start_apify_run(apollo_url, total_records, user_id)
+            queue_metrics["crawl_coalesced"] = shared
+            if handle.ticket:
+                queue_metrics.update(handle.ticket.to_metrics())
+            await handle.finished.wait()
             
-            items = []
-            dataset_client = self.apify_client.dataset(run["defaultDatasetId"])
-            
-            for item in dataset_client.iterate_items():
-                items.append(item)
-                if len(items) >= max_results:
-                    break
+            with time_stage("dataset_download"):
+                items = await self.dataset_reader.read_all(handle.dataset_id, limit=total_records)
             
             logger.info(f"Apify crawler completed: {len(items)} items retrieved")
-            return items
+            return items, queue_metrics
             
         except Exception as e:
             logger.error(f"Apify crawler error: {str(e)}")
-            return []
+            return [], queue_metrics
+    
+    async def _start_apify_run(
+        self,
+        apollo_url: str,
+        total_records: int,
+        user_id: str
+    ) -> Tuple[ActorRunHandle, bool]:
+        """
+        Start the Apify crawler, or join an identical run already in progress.
+        
+        New runs wait for a crawl scheduler slot, weighted by the records requested.
+        
+        Returns:
+            Tuple of (run handle, whether the run is shared)
+        """
+        if not self.apify_client:
+            raise ValueError("Apify client not initialized - missing APIFY_API_TOKEN")
+        
+        run_input = {
+            "url": apollo_url,
+            "totalRecords": total_records,
+            "fileName": "Apollo Prospects"
+        }
+        
+        logger.info(f"Running Apify actor with input: {run_input}")
+        return await self.actor_runs.acquire(
+            (apollo_url, total_records),
+            run_input,
+            user_id=user_id,
+            cost=total_records
+        )
+    
+    async def _split_known_leads(
+        self,
+        raw_leads: List[Dict[str, Any]],
+        user_id: str
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Split crawled records into leads new to the user and leads they already have
+        
+        Applies the save's duplicate rules (email in any tab, ID in the new or
+        saved tab) before max_results are chosen; archived leads count as new
+        because saving restores them.
+        
+        Returns:
+            Tuple of (new records, already stored records), each in crawl order
+        """
+        if not raw_leads:
+            return [], []
+        
+        def base_id(raw_lead: Dict[str, Any]) -> Optional[str]:
+            value = raw_lead.get("id")
+            return value if isinstance(value, str) and value else None
+        
+        def email(raw_lead: Dict[str, Any]) -> Optional[str]:
+            value = raw_lead.get("email")
+            return value if isinstance(value, str) and value else None
+        
+        lead_ids = {apify_lead_id(user_id, base_id(raw)) for raw in raw_leads if base_id(raw)}
+        emails = {email(raw) for raw in raw_leads if email(raw)}
+        
+        supabase = get_supabase_service()
+        existing_emails, existing_ids = await asyncio.gather(
+            supabase.check_duplicate_leads(user_id, sorted(emails)),
+            supabase.check_duplicate_ids(user_id, sorted(lead_ids))
+        )
+        existing_emails, existing_ids = set(existing_emails), set(existing_ids)
+        
+        fresh, known = [], []
+        for raw in raw_leads:
+            stored = email(raw) in existing_emails or (
+                base_id(raw) is not None and apify_lead_id(user_id, base_id(raw)) in existing_ids
+            )
+            (known if stored else fresh).append(raw)
+        return fresh, known
     
     async def _process_apify_leads(
         self, 
@@ -331,59 +540,23 @@ Return the generated URL in JSON format:
         Process raw Apify data into structured LeadData format.
         """
         start_time = datetime.now()
-        processed_leads = []
-        error_count = 0
         
         source_query_criteria = {
             "mainQuery": request.main_query or "",
             "filters": request.filters.model_dump()
         }
         
-        for raw_lead in raw_leads:
-            try:
-                apify_lead = ApifyLeadData(**raw_lead)
-                processed_lead = convert_apify_to_processed(apify_lead, source_query_criteria)
-                
-                # Generate user-specific lead ID to avoid collisions across users
-                import hashlib
-                base_id = processed_lead.id or str(uuid.uuid4())
-                # Create a hash of user_id + base_id to ensure uniqueness per user
-                combined = f"{user_id}_{base_id}"
-                user_specific_id = hashlib.md5(combined.encode()).hexdigest()
-                
-                lead_data = LeadData(
-                    id=user_specific_id,
-                    user_id=user_id,
-                    first_name=processed_lead.first_name,
-                    last_name=processed_lead.last_name,
-                    name=processed_lead.name,
-                    email=processed_lead.email,
-                    phone=processed_lead.phone,
-                    linkedin_url=processed_lead.linkedin_url,
-                    job_title=processed_lead.job_title,
-                    company_name=processed_lead.company_name,
-                    company_size=processed_lead.company_size,
-                    industry=processed_lead.industry,
-                    location=processed_lead.location,
-                    keywords=processed_lead.keywords,
-                    confidence_score=processed_lead.confidence_score or 0.8,
-                    confidence_level=ConfidenceLevel.HIGH if processed_lead.email else ConfidenceLevel.MEDIUM,
-                    source_query_criteria=source_query_criteria,
-                    created_at=datetime.now()
-                )
-                
-                processed_leads.append(lead_data)
-                
-            except Exception as e:
-                logger.warning(f"Error processing lead: {str(e)}")
-                error_count += 1
-                continue
+        with time_stage("conversion"):
+            processed_leads, errors = convert_apify_batch(raw_leads, user_id, source_query_criteria)
+        
+        for error in errors:
+            logger.warning(f"Error processing lead: {error}")
         
         log_processing_metrics(
             "apify_lead_processing",
             start_time,
             len(processed_leads),
-            error_count,
+            len(errors),
             {"user_id": user_id, "raw_count": len(raw_leads)}
         )
         
@@ -419,19 +592,41 @@ Return the generated URL in JSON format:
             "confidence_distribution": confidence_dist
         }
     
-    async def _call_openai(self, prompt: str, max_tokens: int = 500) -> str:
-        """Call OpenAI API"""
+    async def _call_llm(
+        self,
+        prompt: RenderedPrompt,
+        parse: Callable[[str], Any],
+        max_tokens: int = 500,
+        usage: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        """
+        Call the LLM providers (hedged) without blocking the event loop.
+        
+        With LLM_STREAM_URL the completion is streamed and closed as soon as a
+        complete searchUrl has arrived.
+        """
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-5-nano",
-                messages=[{"role": "user", "content": prompt}],
-                max_completion_tokens=max_tokens,
-                response_format={"type": "json_object"},
+            return await self.llm.complete(
+                prompt.body,
+                parse,
+                max_tokens=max_tokens,
+                system=prompt.prefix,
+                usage=usage,
+                stop_when=complete_search_url_json if settings.LLM_STREAM_URL else None
             )
-            return response.choices[0].message.content.strip()
+        except asyncio.TimeoutError:
+            logger.error(f"LLM API call timed out after {self.llm.primary.timeout}s")
+            raise
         except Exception as e:
-            logger.error(f"OpenAI API error: {str(e)}")
+            logger.error(f"LLM API error: {str(e)}")
             raise
+    
+    async def close(self):
+        """Release pooled LLM connections and actor runs"""
+        if self.actor_runs:
+            await self.actor_runs.shutdown()
+        if self.llm:
+            await self.llm.close()
 
 # Global AI service instance
 ai_service = AIService()
\ No newline at end of file
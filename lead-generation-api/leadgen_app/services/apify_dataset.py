@@ -0,0 +1,182 @@
+"""
+Async paged reader for Apify datasets
+"""
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from apify_client import ApifyClientAsync
+
+from leadgen_app.config import settings
+from leadgen_app.utils.metrics import record_dependency_error
+
+logger = logging.getLogger(__name__)
+
+# Top-level fields read by convert_apify_to_processed; everything else the
+# Apollo scraper emits (employment history, photos, ...) is never downloaded
+APIFY_LEAD_FIELDS = [
+    "id",
+    "firstName",
+    "lastName",
+    "name",
+    "email",
+    "phone",
+    "linkedin_url",
+    "title",
+    "organization",
+    "organizationNumEmployees",
+    "city",
+    "state",
+    "country",
+    "industry",
+    "organizationIndustry",
+    "keywords",
+    "organizationKeywords",
+]
+
+def _run_value(run: Any, key: str, attribute: str) -> Any:
+    # Older apify-client versions return a dict, newer ones a Run model
+    if not run:
+        return None
+    if isinstance(run, dict):
+        return run.get(key)
+    return getattr(run, attribute, None)
+
+def get_run_dataset_id(run: Any) -> Optional[str]:
+    """Extract the default dataset ID from an actor run"""
+    return _run_value(run, "defaultDatasetId", "default_dataset_id")
+
+def get_run_id(run: Any) -> Optional[str]:
+    """Extract the run ID from an actor run"""
+    return _run_value(run, "id", "id")
+
+def get_run_status(run: Any) -> Optional[str]:
+    """Extract the status (e.g. "SUCCEEDED") from an actor run"""
+    status = _run_value(run, "status", "status")
+    return getattr(status, "value", status)
+
+class ApifyDatasetReader:
+    """Streams dataset items in large pages with field projection"""
+
+    def __init__(
+        self,
+        client: ApifyClientAsync,
+        page_size: int = settings.APIFY_DATASET_PAGE_SIZE,
+        fields: Optional[List[str]] = None
+    ):
+        self.client = client
+        self.page_size = page_size
+        self.fields = fields or APIFY_LEAD_FIELDS
+
+    async def _list_items(self, dataset_client: Any, offset: int, limit: int) -> Any:
+        """Fetch one projected page, counting failures against Apify"""
+        try:
+            return await dataset_client.list_items(offset=offset, limit=limit, fields=self.fields)
+        except Exception:
+            record_dependency_error("apify")
+            raise
+
+    async def iter_pages(
+        self,
+        dataset_id: str,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Yield dataset items page by page
+
+        Args:
+            dataset_id: Apify dataset ID
+            limit: Maximum number of items to read (None for all)
+
+        Yields:
+            Lists of projected item dictionaries
+        """
+        dataset_client = self.client.dataset(dataset_id)
+        offset = 0
+
+        while limit is None or offset < limit:
+            page_limit = self.page_size if limit is None else min(self.page_size, limit - offset)
+            page = await self._list_items(dataset_client, offset, page_limit)
+
+            if not page.items:
+                break
+
+            offset += len(page.items)
+            yield page.items
+
+            if offset >= page.total:
+                break
+
+    async def iter_live_pages(
+        self,
+        dataset_id: str,
+        finished: asyncio.Event,
+        limit: Optional[int] = None,
+        page_size: Optional[int] = None,
+        poll_interval: float = settings.APIFY_STREAM_POLL_INTERVAL
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Yield dataset items as a running actor writes them
+
+        Polls for new items until `finished` is set and the dataset is drained,
+        so the first page is available long before the run completes.
+
+        Args:
+            dataset_id: Apify dataset ID of the running actor
+            finished: Event set once the actor run has finished
+            limit: Maximum number of items to read (None for all)
+            page_size: Items per request (defaults to the reader's page size)
+            poll_interval: Maximum seconds to wait between empty polls
+
+        Yields:
+            Lists of projected item dictionaries
+        """
+        dataset_client = self.client.dataset(dataset_id)
+        page_size = page_size or self.page_size
+        offset = 0
+
+        while limit is None or offset < limit:
+            # Checked before reading, so one last read happens after the run finishes
+            run_finished = finished.is_set()
+            page_limit = page_size if limit is None else min(page_size, limit - offset)
+            page = await self._list_items(dataset_client, offset, page_limit)
+
+            if page.items:
+                offset += len(page.items)
+                yield page.items
+                continue
+
+            if run_finished:
+                break
+
+            try:
+                await asyncio.wait_for(finished.wait(), timeout=poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def iter_items(
+        self,
+        dataset_id: str,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield dataset items one at a time (fetched in pages)
+
+        Args:
+            dataset_id: Apify dataset ID
+            limit: Maximum number of items to read (None for all)
+
+        Yields:
+            Projected item dictionaries
+        """
+        async for items in self.iter_pages(dataset_id, limit):
+            for item in items:
+                yield item
+
+    async def read_all(self, dataset_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Read up to limit items into a list"""
+        items: List[Dict[str, Any]] = []
+        async for page in self.iter_pages(dataset_id, limit):
+            items.extend(page)
+        return items
@@ -0,0 +1,142 @@
+"""
+Shared Apify actor runs
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from apify_client import ApifyClientAsync
+
+from leadgen_app.services.apify_dataset import get_run_dataset_id, get_run_id, get_run_status
+from leadgen_app.services.crawl_scheduler import CrawlScheduler, CrawlTicket
+from leadgen_app.utils.metrics import STAGE_DURATION, record_dependency_error
+
+logger = logging.getLogger(__name__)
+
+class ActorRunHandle:
+    """A started actor run that callers can read from while it is running"""
+
+    def __init__(self, key: Hashable):
+        self.key = key
+        self.run_id: Optional[str] = None
+        self.dataset_id: Optional[str] = None
+        self.status: Optional[str] = None
+        self.error: Optional[str] = None
+        self.ticket: Optional[CrawlTicket] = None
+        self.started: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.finished = asyncio.Event()
+
+        # Retrieve a start failure even if every caller has gone away
+        self.started.add_done_callback(lambda future: future.cancelled() or future.exception())
+
+class ActorRunRegistry:
+    """
+    Starts at most one actor run per key and follows it to completion
+
+    acquire() returns as soon as the run has started, so callers can stream its
+    dataset while it is being written; `finished` is set once the run ends.
+    Concurrent identical searches share the run for its whole lifetime.
+
+    With a scheduler, each new run holds one of its slots from start to
+    finish; callers joining an existing run do not take another slot.
+    """
+
+    def __init__(self, client: ApifyClientAsync, actor_id: str, scheduler: Optional[CrawlScheduler] = None):
+        self.client = client
+        self.actor_id = actor_id
+        self.scheduler = scheduler
+        self._runs: Dict[Hashable, ActorRunHandle] = {}
+        self._tasks = set()
+
+    async def acquire(
+        self,
+        key: Hashable,
+        run_input: Dict[str, Any],
+        user_id: str = "",
+        cost: float = 1.0
+    ) -> Tuple[ActorRunHandle, bool]:
+        """
+        Start an actor run for key, or join the one already running
+
+        Args:
+            key: Coalescing key (e.g. Apollo URL and record count)
+            run_input: Actor input used if a new run is started
+            user_id: User a new run is scheduled for
+            cost: Scheduling cost of a new run (e.g. records requested)
+
+        Returns:
+            Tuple of (run handle, whether this caller joined an existing run)
+        """
+        handle = self._runs.get(key)
+        shared = handle is not None
+
+        if handle is None:
+            handle = ActorRunHandle(key)
+            self._runs[key] = handle
+            # Driven by its own task so a disconnecting caller never aborts a shared run
+            task = asyncio.create_task(self._schedule(handle, run_input, user_id, cost))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        await asyncio.shield(handle.started)
+        return handle, shared
+
+    async def _schedule(self, handle: ActorRunHandle, run_input: Dict[str, Any], user_id: str, cost: float):
+        if self.scheduler is None:
+            await self._drive(handle, run_input)
+            return
+
+        try:
+            async with self.scheduler.slot(user_id, cost) as ticket:
+                handle.ticket = ticket
+                STAGE_DURATION.observe(ticket.wait_time, stage="crawl_queue")
+                await self._drive(handle, run_input)
+        finally:
+            # Cancelled while queued: the run never started
+            if not handle.finished.is_set():
+                handle.started.cancel()
+                handle.finished.set()
+                if self._runs.get(handle.key) is handle:
+                    del self._runs[handle.key]
+
+    async def _drive(self, handle: ActorRunHandle, run_input: Dict[str, Any]):
+        start = time.perf_counter()
+        try:
+            run = await self.client.actor(self.actor_id).start(run_input=run_input)
+            handle.run_id = get_run_id(run)
+            handle.dataset_id = get_run_dataset_id(run)
+            if not handle.run_id or not handle.dataset_id:
+                raise ValueError(f"Apify actor run returned no dataset: {run}")
+            handle.started.set_result(run)
+            logger.info(f"Apify actor run {handle.run_id} started (dataset {handle.dataset_id})")
+
+            run = await self.client.run(handle.run_id).wait_for_finish()
+            handle.status = get_run_status(run)
+            STAGE_DURATION.observe(time.perf_counter() - start, stage="actor_run")
+            logger.info(f"Apify actor run {handle.run_id} finished with status {handle.status}")
+
+        except Exception as e:
+            handle.error = str(e)
+            record_dependency_error("apify")
+            if not handle.started.done():
+                handle.started.set_exception(e)
+            else:
+                logger.error(f"Lost track of Apify actor run {handle.run_id}: {str(e)}")
+
+        finally:
+            if not handle.started.done():
+                handle.started.cancel()
+            handle.finished.set()
+            if self._runs.get(handle.key) is handle:
+                del self._runs[handle.key]
+
+    def __len__(self) -> int:
+        """Number of runs currently in progress"""
+        return len(self._runs)
+
+    async def shutdown(self):
+        """Stop following runs that are still in progress"""
+        for task in list(self._tasks):
+            task.cancel()
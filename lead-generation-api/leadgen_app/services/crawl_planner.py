@@ -0,0 +1,89 @@
+"""
+Crawl sizing for Apify actor runs
+"""
+
+import logging
+import math
+from typing import Any, Dict
+
+from leadgen_app.config import settings
+from leadgen_app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+class CrawlPlanner:
+    """
+    Sizes actor runs from the requested result count
+
+    Each user's post-dedupe loss rate (share of crawled leads already in their
+    tabs) is tracked as an exponentially weighted average, so users who keep
+    re-finding the same prospects get a larger crawl and new users a smaller one.
+    """
+
+    def __init__(
+        self,
+        overscan_factor: float = settings.CRAWL_OVERSCAN_FACTOR,
+        min_records: int = settings.CRAWL_MIN_RECORDS,
+        max_records: int = settings.CRAWL_MAX_RECORDS,
+        default_loss_rate: float = settings.CRAWL_DEFAULT_LOSS_RATE,
+        max_loss_rate: float = 0.9,
+        smoothing: float = 0.3
+    ):
+        self.overscan_factor = overscan_factor
+        self.min_records = min_records
+        self.max_records = max_records
+        self.default_loss_rate = default_loss_rate
+        self.max_loss_rate = max_loss_rate
+        self.smoothing = smoothing
+        self._loss_rates = TTLCache(maxsize=10000, ttl=7 * 24 * 3600)
+
+    def loss_rate(self, user_id: str) -> float:
+        """Expected share of crawled leads lost to dedupe for a user"""
+        return self._loss_rates.get(user_id, self.default_loss_rate)
+
+    def record_dedupe(self, user_id: str, total: int, duplicates: int):
+        """
+        Fold the outcome of one save's duplicate checks into the user's loss rate
+
+        Args:
+            user_id: User identifier
+            total: Leads checked for duplicates
+            duplicates: Leads filtered out as duplicates
+        """
+        if total <= 0:
+            return
+        observed = min(duplicates / total, self.max_loss_rate)
+        previous = self._loss_rates.get(user_id)
+        if previous is None:
+            updated = observed
+        else:
+            updated = self.smoothing * observed + (1 - self.smoothing) * previous
+        self._loss_rates.set(user_id, updated)
+
+    def plan(self, user_id: str, max_results: int) -> Dict[str, Any]:
+        """
+        Plan the actor run size for a search
+
+        Args:
+            user_id: User identifier
+            max_results: Leads requested by the client
+
+        Returns:
+            Plan dictionary with the record count to request from the actor
+        """
+        loss_rate = min(self.loss_rate(user_id), self.max_loss_rate)
+        needed = math.ceil(max_results / (1 - loss_rate) * self.overscan_factor)
+        planned = max(self.min_records, max_results, needed)
+        planned = min(planned, self.max_records)
+
+        plan = {
+            "max_results": max_results,
+            "loss_rate": round(loss_rate, 4),
+            "overscan_factor": self.overscan_factor,
+            "planned_records": planned
+        }
+        logger.info(f"Crawl plan for user {user_id}: {plan}")
+        return plan
+
+# Global crawl planner instance
+crawl_planner = CrawlPlanner()
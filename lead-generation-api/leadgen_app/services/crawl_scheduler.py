@@ -0,0 +1,179 @@
+"""
+Bounded, per-user fair scheduling of Apify actor runs
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from leadgen_app.config import settings
+from leadgen_app.utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+class CrawlTicket:
+    """A queued or running crawl"""
+
+    def __init__(self, user_id: str, cost: float, start_tag: float, finish_tag: float, seq: int, queue_depth: int):
+        self.user_id = user_id
+        self.cost = cost
+        self.start_tag = start_tag
+        self.finish_tag = finish_tag
+        self.seq = seq
+        self.queue_depth = queue_depth
+        self.enqueued_at = time.monotonic()
+        self.wait_time = 0.0
+        self.granted: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    def to_metrics(self) -> Dict[str, Any]:
+        """Queueing details for the search metrics"""
+        return {
+            "crawl_queue_depth": self.queue_depth,
+            "crawl_queue_wait": round(self.wait_time, 3)
+        }
+
+class CrawlScheduler:
+    """
+    Caps concurrent actor runs globally and per user
+
+    Runs beyond the caps wait in a queue ordered by weighted fair queueing:
+    each crawl gets a virtual finish tag of
+    max(virtual time, user's previous finish tag) + cost / weight,
+    and the lowest tag among users below their cap starts next. A user
+    submitting many large crawls pushes their own tags further out, so other
+    users' crawls overtake them instead of waiting behind the whole backlog.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = settings.CRAWL_MAX_CONCURRENT_RUNS,
+        max_per_user: int = settings.CRAWL_MAX_RUNS_PER_USER
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self._weights: Dict[str, float] = {}
+        self._running: Dict[str, int] = {}
+        self._running_total = 0
+        self._waiting: List[CrawlTicket] = []
+        self._last_finish: Dict[str, float] = {}
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+
+    def set_weight(self, user_id: str, weight: float):
+        """Give a user a larger (or smaller) share of crawl slots"""
+        if weight <= 0:
+            raise ValueError("Crawl weight must be positive")
+        self._weights[user_id] = weight
+
+    @asynccontextmanager
+    async def slot(self, user_id: str, cost: float = 1.0) -> AsyncIterator[CrawlTicket]:
+        """
+        Hold a crawl slot for the duration of the block
+
+        Args:
+            user_id: User the crawl runs for
+            cost: Relative size of the crawl (e.g. records requested)
+        """
+        ticket = await self.acquire(user_id, cost)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    async def acquire(self, user_id: str, cost: float = 1.0) -> CrawlTicket:
+        """
+        Wait for a crawl slot
+
+        Args:
+            user_id: User the crawl runs for
+            cost: Relative size of the crawl (e.g. records requested)
+
+        Returns:
+            Ticket to pass to release()
+        """
+        weight = self._weights.get(user_id, 1.0)
+        start_tag = max(self._virtual_time, self._last_finish.get(user_id, 0.0))
+        finish_tag = start_tag + cost / weight
+        self._last_finish[user_id] = finish_tag
+
+        ticket = CrawlTicket(user_id, cost, start_tag, finish_tag, next(self._seq), len(self._waiting))
+        self._waiting.append(ticket)
+        self._dispatch()
+
+        if not ticket.granted.done():
+            logger.info(
+                f"Crawl for user {user_id} queued behind {ticket.queue_depth} others "
+                f"({self._running_total}/{self.max_concurrent} running)"
+            )
+
+        try:
+            await asyncio.shield(ticket.granted)
+        except asyncio.CancelledError:
+            if ticket.granted.done():
+                # Granted just as the caller gave up; hand the slot on
+                self.release(ticket)
+            else:
+                ticket.granted.cancel()
+                self._waiting.remove(ticket)
+                self._forget_idle(user_id)
+            raise
+
+        ticket.wait_time = time.monotonic() - ticket.enqueued_at
+        return ticket
+
+    def release(self, ticket: CrawlTicket):
+        """Free a slot taken by acquire() and start the next queued crawl"""
+        self._running[ticket.user_id] -= 1
+        if self._running[ticket.user_id] <= 0:
+            del self._running[ticket.user_id]
+        self._running_total -= 1
+        self._forget_idle(ticket.user_id)
+        self._dispatch()
+
+    def _dispatch(self):
+        while self._running_total < self.max_concurrent:
+            eligible = [
+                ticket for ticket in self._waiting
+                if self._running.get(ticket.user_id, 0) < self.max_per_user
+            ]
+            if not eligible:
+                return
+
+            ticket = min(eligible, key=lambda t: (t.finish_tag, t.seq))
+            self._waiting.remove(ticket)
+            self._running[ticket.user_id] = self._running.get(ticket.user_id, 0) + 1
+            self._running_total += 1
+            self._virtual_time = max(self._virtual_time, ticket.start_tag)
+            ticket.granted.set_result(True)
+
+    def _forget_idle(self, user_id: str):
+        # An idle user's finish tag only matters while it is ahead of virtual time
+        if (
+            user_id not in self._running
+            and not any(t.user_id == user_id for t in self._waiting)
+            and self._last_finish.get(user_id, 0.0) <= self._virtual_time
+        ):
+            self._last_finish.pop(user_id, None)
+
+    def stats(self, user_id: Optional[str] = None) -> Dict[str, Any]:
+        """Scheduler counters for monitoring"""
+        stats = {
+            "running": self._running_total,
+            "queued": len(self._waiting),
+            "max_concurrent": self.max_concurrent,
+            "max_per_user": self.max_per_user
+        }
+        if user_id is not None:
+            stats["user_running"] = self._running.get(user_id, 0)
+            stats["user_queued"] = sum(1 for t in self._waiting if t.user_id == user_id)
+        return stats
+
+# Global crawl scheduler instance
+crawl_scheduler = CrawlScheduler()
+
+CRAWL_RUNS = registry.gauge("leadgen_crawl_runs", "Actor runs holding or waiting for a crawl slot", ("state",))
+CRAWL_RUNS.track(lambda: crawl_scheduler.stats()["running"], state="running")
+CRAWL_RUNS.track(lambda: crawl_scheduler.stats()["queued"], state="queued")
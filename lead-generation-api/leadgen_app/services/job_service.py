@@ -0,0 +1,192 @@
+"""
+Background search jobs with progress events
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from leadgen_app.config import settings
+from leadgen_app.models.response_models import JobStatus
+from leadgen_app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+class SearchJob:
+    """A search running in the background, with its stage events and result"""
+
+    def __init__(self, user_id: str):
+        self.id = str(uuid.uuid4())
+        self.user_id = user_id
+        self.status = JobStatus.QUEUED
+        self.stage: Optional[str] = None
+        self.events: List[Dict[str, Any]] = []
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+        self._changed = asyncio.Event()
+
+    def report(self, stage: str, data: Optional[Dict[str, Any]] = None):
+        """
+        Record a progress event; used as the pipeline's progress callback
+
+        Args:
+            stage: Stage name (e.g. "url_generated", "crawl_running")
+            data: Stage details
+        """
+        self.stage = stage
+        self.events.append({
+            "id": len(self.events) + 1,
+            "stage": stage,
+            "status": self.status.value,
+            "data": data or {},
+            "timestamp": datetime.utcnow().isoformat()
+        })
+        # Wake everyone waiting on the current event, then arm a fresh one
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    async def wait_for_events(self, after: int, timeout: float) -> List[Dict[str, Any]]:
+        """
+        Wait until events newer than `after` exist (or the timeout elapses)
+
+        Args:
+            after: ID of the last event the caller has seen
+            timeout: Maximum seconds to wait
+
+        Returns:
+            Events with IDs greater than `after`
+        """
+        if len(self.events) <= after and not self.done:
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.events[after:]
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        """Serializable job status"""
+        job = {
+            "job_id": self.id,
+            "status": self.status.value,
+            "stage": self.stage,
+            "events": self.events,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "error": self.error
+        }
+        if include_result:
+            job["result"] = self.result
+        return job
+
+class SearchJobManager:
+    """
+    Runs searches as background tasks and keeps their results retrievable
+    for SEARCH_JOB_RETENTION seconds after completion
+    """
+
+    def __init__(
+        self,
+        retention: int = settings.SEARCH_JOB_RETENTION,
+        max_jobs: int = settings.SEARCH_JOB_MAX_JOBS
+    ):
+        self.retention = retention
+        # Running jobs are never evicted; they move to the bounded cache once finished
+        self._running: Dict[str, SearchJob] = {}
+        self._finished = TTLCache(maxsize=max_jobs, ttl=retention)
+        self._tasks = set()
+
+    def submit(
+        self,
+        user_id: str,
+        runner: Callable[[SearchJob], Awaitable[Dict[str, Any]]]
+    ) -> SearchJob:
+        """
+        Start a search job
+
+        Args:
+            user_id: Owner of the job
+            runner: Coroutine function running the search; receives the job
+                (for job.report) and returns the result payload
+
+        Returns:
+            The new job
+        """
+        job = SearchJob(user_id)
+        self._running[job.id] = job
+        task = asyncio.create_task(self._run(job, runner))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        logger.info(f"Search job {job.id} submitted for user {user_id}")
+        return job
+
+    async def _run(self, job: SearchJob, runner: Callable[[SearchJob], Awaitable[Dict[str, Any]]]):
+        job.status = JobStatus.RUNNING
+        job.report("started")
+        try:
+            job.result = await runner(job)
+            job.status = JobStatus.SUCCEEDED if job.result.get("success", True) else JobStatus.FAILED
+            job.error = job.result.get("error")
+        except asyncio.CancelledError:
+            job.status = JobStatus.FAILED
+            job.error = "Job cancelled"
+            raise
+        except Exception as e:
+            logger.error(f"Search job {job.id} failed: {str(e)}", exc_info=True)
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+        finally:
+            job.finished_at = datetime.utcnow()
+            job.report("completed" if job.status == JobStatus.SUCCEEDED else "failed")
+            self._finished.set(job.id, job)
+            self._running.pop(job.id, None)
+
+    def get(self, user_id: str, job_id: str) -> Optional[SearchJob]:
+        """Look up a job owned by user_id"""
+        job = self._running.get(job_id) or self._finished.get(job_id)
+        if job is None or job.user_id != user_id:
+            return None
+        return job
+
+    async def stream_events(
+        self,
+        job: SearchJob,
+        last_event_id: int = 0,
+        heartbeat: float = 15.0
+    ) -> AsyncIterator[str]:
+        """
+        Yield job events formatted as server-sent events until the job finishes
+
+        Args:
+            job: Job to follow
+            last_event_id: Resume after this event ID (Last-Event-ID header)
+            heartbeat: Seconds between keep-alive comments while idle
+        """
+        seen = last_event_id
+        while not (job.done and seen >= len(job.events)):
+            events = await job.wait_for_events(seen, timeout=heartbeat)
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+
+            for event in events:
+                seen = event["id"]
+                yield f"id: {event['id']}\nevent: {event['stage']}\ndata: {json.dumps(event)}\n\n"
+
+    async def shutdown(self):
+        """Cancel jobs that are still running"""
+        for task in list(self._tasks):
+            task.cancel()
+
+# Global job manager instance
+job_manager = SearchJobManager()
@@ -0,0 +1,94 @@
+"""
+Per-search buffer of crawled leads beyond the first page
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from leadgen_app.config import settings
+from leadgen_app.models.request_models import LeadSearchRequest
+from leadgen_app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+class SurplusLeadBuffer:
+    """
+    Keeps raw records a crawl returned beyond max_results so later pages of
+    the same search are served without another actor run
+
+    Entries are keyed by (user_id, request_id), so a user can only page
+    through their own searches, and expire after SURPLUS_BUFFER_TTL.
+    """
+
+    def __init__(
+        self,
+        ttl: int = settings.SURPLUS_BUFFER_TTL,
+        max_searches: int = settings.SURPLUS_BUFFER_MAX_SEARCHES
+    ):
+        self._entries = TTLCache(maxsize=max_searches, ttl=ttl)
+
+    def put(
+        self,
+        user_id: str,
+        request_id: str,
+        request: LeadSearchRequest,
+        records: List[Dict[str, Any]]
+    ):
+        """
+        Buffer surplus raw records for a search
+
+        Args:
+            user_id: User identifier
+            request_id: Search request identifier
+            request: Original search request
+            records: Raw Apify records not returned on the first page
+        """
+        if not records:
+            return
+        self._entries.set((user_id, request_id), {
+            "request": request,
+            "records": records,
+            "offset": 0
+        })
+        logger.info(f"Buffered {len(records)} surplus leads for request {request_id}")
+
+    def take(
+        self,
+        user_id: str,
+        request_id: str,
+        count: Optional[int] = None
+    ) -> Optional[Tuple[LeadSearchRequest, List[Dict[str, Any]], int]]:
+        """
+        Take the next page of buffered records
+
+        Args:
+            user_id: User identifier
+            request_id: Search request identifier
+            count: Page size (defaults to the search's max_results)
+
+        Returns:
+            Tuple of (original request, raw records, records still buffered),
+            or None if nothing is buffered for this search
+        """
+        key = (user_id, request_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        count = count or entry["request"].max_results
+        start = entry["offset"]
+        page = entry["records"][start:start + count]
+        entry["offset"] = start + len(page)
+        remaining = len(entry["records"]) - entry["offset"]
+
+        if remaining <= 0:
+            self._entries.pop(key)
+
+        return entry["request"], page, remaining
+
+    def stats(self) -> Dict[str, Any]:
+        """Buffer counters for monitoring"""
+        return self._entries.stats()
+
+# Global surplus buffer instance
+lead_buffer = SurplusLeadBuffer()
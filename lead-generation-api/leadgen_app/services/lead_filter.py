@@ -0,0 +1,288 @@
+"""
+Per-user lead membership filters for duplicate checks
+"""
+
+import fcntl
+import hashlib
+import logging
+import os
+import re
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from leadgen_app.config import settings
+from leadgen_app.utils.bloom import BloomFilter
+from leadgen_app.utils.cache import TTLCache
+from leadgen_app.utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Loads every (id, email) pair a user has in the leads table, across all tabs
+KeyLoader = Callable[[str], Awaitable[Iterable[Tuple[Optional[str], Optional[str]]]]]
+
+# File timestamps come from a coarse kernel clock that can trail time.time_ns()
+_MTIME_SLACK_NS = 1_000_000_000
+
+def id_key(lead_id: str) -> str:
+    return f"id:{lead_id}"
+
+def email_key(email: str) -> str:
+    return f"email:{email.strip().lower()}"
+
+def record_keys(records: Iterable[Dict[str, Any]]) -> List[str]:
+    """Filter keys for lead rows: the ID and the normalized email of each"""
+    keys = []
+    for record in records:
+        if record.get("id"):
+            keys.append(id_key(record["id"]))
+        if record.get("email"):
+            keys.append(email_key(record["email"]))
+    return keys
+
+@dataclass
+class _Entry:
+    filter: BloomFilter
+    mtime: int  # st_mtime_ns of the snapshot this entry matches
+    deleted: int = 0
+
+class LeadFilters:
+    """
+    Bloom filter per user over the IDs and normalized emails of all their leads
+
+    Duplicate checks ask the database only about keys the filter reports as
+    possibly present; a key the filter rules out is certainly not stored, so
+    most searches skip the dedupe queries entirely.
+
+    A user's filter is built from the database on first use and kept in a
+    snapshot file that every worker on the host reads and writes: each save
+    adds its keys to the snapshot under an exclusive lock, and workers reload
+    it when its mtime changes. A rebuild never overwrites keys another worker
+    added while it was reading the database; it merges them or gives up.
+    Deletes cannot be removed from a Bloom filter, so they only leave false
+    positives until enough pile up to force a rebuild. Filters are also
+    rebuilt after LEAD_FILTER_TTL to pick up writes made outside this service.
+
+    Snapshot I/O is synchronous; files are a few KB to a few hundred KB.
+    """
+
+    def __init__(
+        self,
+        load_keys: KeyLoader,
+        snapshot_dir: str = settings.LEAD_FILTER_SNAPSHOT_DIR,
+        error_rate: float = settings.LEAD_FILTER_ERROR_RATE,
+        min_capacity: int = settings.LEAD_FILTER_MIN_CAPACITY,
+        ttl: float = settings.LEAD_FILTER_TTL,
+        max_users: int = settings.LEAD_FILTER_MAX_USERS,
+        rebuild_deleted_share: float = 0.25
+    ):
+        self.load_keys = load_keys
+        self.snapshot_dir = snapshot_dir
+        self.error_rate = error_rate
+        self.min_capacity = min_capacity
+        self.ttl = ttl
+        self.rebuild_deleted_share = rebuild_deleted_share
+        self._entries = TTLCache(maxsize=max_users, ttl=ttl)
+        self._builds = SingleFlight()
+
+    async def candidates(self, user_id: str, values: List[str], key: Callable[[str], str] = id_key) -> List[str]:
+        """
+        Values the user may already have stored
+
+        Args:
+            user_id: User identifier
+            values: Lead IDs or emails to check
+            key: id_key or email_key
+
+        Returns:
+            The values the filter cannot rule out (all of them when no filter is available)
+        """
+        bloom = await self._filter(user_id)
+        if bloom is None:
+            return values
+        return [value for value in values if key(value) in bloom]
+
+    def add(self, user_id: str, records: Iterable[Dict[str, Any]]):
+        """
+        Record saved leads in the user's filter and snapshot
+
+        Args:
+            user_id: User identifier
+            records: Lead rows that now exist (keys already present are harmless)
+        """
+        keys = record_keys(records)
+        if not keys:
+            return
+
+        try:
+            with self._locked(user_id):
+                stat = self._stat(self._snapshot_path(user_id))
+                if stat is None:
+                    # No filter yet: tell any rebuild in flight that its database read may miss these rows
+                    self._entries.pop(user_id)
+                    self._touch(self._pending_path(user_id))
+                    return
+
+                entry = self._entries.get(user_id)
+                if entry is None or entry.mtime != stat.st_mtime_ns:
+                    entry = _Entry(self._read(user_id), stat.st_mtime_ns, entry.deleted if entry else 0)
+                for item in keys:
+                    entry.filter.add(item)
+                entry.mtime = self._write(user_id, entry.filter)
+                self._entries.set(user_id, entry)
+        except (OSError, ValueError) as e:
+            logger.error(f"Error updating lead filter for user {user_id}: {str(e)}")
+            self.invalidate(user_id)
+
+    def remove(self, user_id: str, count: int):
+        """
+        Note deleted leads; the filter is rebuilt once deletes reach its rebuild share
+
+        Args:
+            user_id: User identifier
+            count: Leads deleted
+        """
+        entry = self._entries.get(user_id)
+        if entry is None or count <= 0:
+            return
+        entry.deleted += count
+        if entry.deleted > entry.filter.count * self.rebuild_deleted_share:
+            logger.info(f"Rebuilding lead filter for user {user_id} after {entry.deleted} deletes")
+            self.invalidate(user_id)
+
+    def invalidate(self, user_id: str):
+        """Drop the user's filter on every worker; the next check rebuilds it"""
+        self._entries.pop(user_id)
+        try:
+            with self._locked(user_id):
+                os.unlink(self._snapshot_path(user_id))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Error removing lead filter snapshot for user {user_id}: {str(e)}")
+
+    async def _filter(self, user_id: str) -> Optional[BloomFilter]:
+        try:
+            bloom = self._sync(user_id)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable lead filter snapshot for user {user_id}, rebuilding: {str(e)}")
+            self.invalidate(user_id)
+            bloom = None
+        if bloom is not None:
+            return bloom
+
+        try:
+            bloom, _ = await self._builds.do(user_id, lambda: self._rebuild(user_id))
+        except Exception as e:
+            logger.error(f"Error building lead filter for user {user_id}: {str(e)}")
+            return None
+        return bloom
+
+    def _usable(self, bloom: BloomFilter) -> bool:
+        return time.time() - bloom.built_at < self.ttl and bloom.count <= bloom.capacity
+
+    def _sync(self, user_id: str) -> Optional[BloomFilter]:
+        """The user's filter as of the current snapshot, or None when it needs a rebuild"""
+        stat = self._stat(self._snapshot_path(user_id))
+        entry = self._entries.get(user_id)
+        if stat is None:
+            # Never built, or invalidated by a worker since: keys saved meanwhile are in no filter
+            if entry is not None:
+                self._entries.pop(user_id)
+            return None
+
+        if entry is None or entry.mtime != stat.st_mtime_ns:
+            entry = _Entry(self._read(user_id), stat.st_mtime_ns, entry.deleted if entry else 0)
+            self._entries.set(user_id, entry)
+        return entry.filter if self._usable(entry.filter) else None
+
+    async def _rebuild(self, user_id: str) -> Optional[BloomFilter]:
+        """
+        Build the user's filter from the database and publish it as the snapshot
+
+        Returns:
+            The filter, or None when leads were saved during the build in a way it cannot account for
+        """
+        # Fail fast when the snapshot directory is unusable instead of loading every key first
+        with self._locked(user_id):
+            started = time.time_ns() - _MTIME_SLACK_NS
+        rows = list(await self.load_keys(user_id))
+        keys = record_keys({"id": lead_id, "email": email} for lead_id, email in rows)
+
+        capacity = self.min_capacity
+        while capacity < 2 * len(keys):
+            capacity *= 2
+        bloom = BloomFilter.for_capacity(capacity, self.error_rate)
+        for item in keys:
+            bloom.add(item)
+
+        with self._locked(user_id):
+            pending = self._stat(self._pending_path(user_id))
+            if pending is not None and pending.st_mtime_ns >= started:
+                logger.info(f"Leads saved while building the lead filter for user {user_id}; rebuilding on next check")
+                return None
+
+            stat = self._stat(self._snapshot_path(user_id))
+            if stat is not None and stat.st_mtime_ns >= started:
+                # Another worker wrote the snapshot after our read began; keep what it added
+                current = self._read(user_id)
+                if current.same_geometry(bloom):
+                    bloom.merge(current)
+                elif self._usable(current):
+                    self._entries.set(user_id, _Entry(current, stat.st_mtime_ns))
+                    return current
+                else:
+                    return None
+
+            mtime = self._write(user_id, bloom)
+        self._entries.set(user_id, _Entry(bloom, mtime))
+        logger.info(f"Built lead filter for user {user_id}: {len(rows)} leads, {len(bloom.bits)} bytes")
+        return bloom
+
+    def _file_stem(self, user_id: str) -> str:
+        if re.fullmatch(r"[\w-]+", user_id):
+            return user_id
+        return hashlib.sha256(user_id.encode("utf-8")).hexdigest()
+
+    def _snapshot_path(self, user_id: str) -> str:
+        return os.path.join(self.snapshot_dir, f"{self._file_stem(user_id)}.bloom")
+
+    def _pending_path(self, user_id: str) -> str:
+        return os.path.join(self.snapshot_dir, f"{self._file_stem(user_id)}.pending")
+
+    @contextmanager
+    def _locked(self, user_id: str) -> Iterator[None]:
+        """Hold the user's snapshot lock, shared by all workers on the host"""
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        fd = os.open(os.path.join(self.snapshot_dir, f"{self._file_stem(user_id)}.lock"), os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _stat(path: str) -> Optional[os.stat_result]:
+        try:
+            return os.stat(path)
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _touch(path: str):
+        with open(path, "a"):
+            os.utime(path)
+
+    def _read(self, user_id: str) -> BloomFilter:
+        with open(self._snapshot_path(user_id), "rb") as f:
+            return BloomFilter.from_bytes(f.read())
+
+    def _write(self, user_id: str, bloom: BloomFilter) -> int:
+        """Atomically replace the user's snapshot (caller holds the lock) and return its mtime"""
+        path = self._snapshot_path(user_id)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(bloom.to_bytes())
+        os.replace(temp_path, path)
+        return os.stat(path).st_mtime_ns
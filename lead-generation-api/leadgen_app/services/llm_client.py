@@ -0,0 +1,453 @@
+"""
+Async LLM clients used for Apollo URL generation
+"""
+
+import asyncio
+import logging
+import re
+import time
+from abc import ABC, abstractmethod
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, TypeVar
+
+import anthropic
+import httpx
+from anthropic import AsyncAnthropic
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from leadgen_app.config import settings
+from leadgen_app.utils.metrics import LatencyHistogram, record_dependency_error
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Called with the streamed text so far; a non-None return ends the stream
+# early and becomes the completion
+StopCondition = Callable[[str], Optional[str]]
+
+_CODE_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS
+    )
+
+class LLMClient(ABC):
+    """
+    Base for non-blocking LLM providers: a process-wide concurrency limit,
+    a per-call timeout and a latency histogram per provider
+
+    Providers implement _complete and _stream.
+    """
+
+    provider = "llm"
+
+    def __init__(
+        self,
+        model: str,
+        max_concurrency: int = settings.LLM_MAX_CONCURRENCY,
+        timeout: float = settings.LLM_TIMEOUT
+    ):
+        self.model = model
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.latency = LatencyHistogram()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight = 0
+
+    @property
+    def name(self) -> str:
+        """Provider and model, e.g. "openai:gpt-5-nano\""""
+        return f"{self.provider}:{self.model}"
+
+    @property
+    def in_flight(self) -> int:
+        """Number of LLM calls currently holding a concurrency slot"""
+        return self._in_flight
+
+    async def complete(
+        self,
+        prompt: str,
+        max_tokens: int = 500,
+        system: Optional[str] = None,
+        usage: Optional[Dict[str, Any]] = None,
+        stop_when: Optional[StopCondition] = None
+    ) -> str:
+        """
+        Run a JSON completion
+
+        Args:
+            prompt: User prompt
+            max_tokens: Completion token budget
+            system: Optional static system prefix, sent first so the provider can cache it
+            usage: Optional dict that receives the provider's token usage
+            stop_when: Optional stop condition; the completion is then streamed
+                and closed as soon as the condition returns a result
+
+        Returns:
+            Stripped completion text
+
+        Raises:
+            asyncio.TimeoutError: If the call exceeds the per-call timeout
+        """
+        async with self._semaphore:
+            # Create the coroutine only once a slot is held, so a caller
+            # cancelled while waiting leaves no un-awaited coroutine behind
+            if stop_when is None:
+                call = self._complete(prompt, max_tokens, system, usage)
+            else:
+                call = self._complete_streaming(prompt, max_tokens, system, usage, stop_when)
+            self._in_flight += 1
+            start = time.monotonic()
+            try:
+                text = await asyncio.wait_for(call, timeout=self.timeout)
+            except asyncio.CancelledError:
+                # Hedge losers are cancelled; the time they had run is a lower
+                # bound on their latency. Leaving them out would bias the
+                # hedge percentile toward fast calls and hedge ever sooner.
+                self.latency.observe(time.monotonic() - start)
+                raise
+            except Exception:
+                self.latency.observe(time.monotonic() - start)
+                record_dependency_error(self.provider)
+                raise
+            finally:
+                self._in_flight -= 1
+
+        self.latency.observe(time.monotonic() - start)
+        return text
+
+    async def _complete_streaming(
+        self,
+        prompt: str,
+        max_tokens: int,
+        system: Optional[str],
+        usage: Optional[Dict[str, Any]],
+        stop_when: StopCondition
+    ) -> str:
+        """Stream the completion, closing the stream once stop_when is satisfied"""
+        usage = usage if usage is not None else {}
+        start = time.monotonic()
+        text = ""
+
+        async with aclosing(self._stream(prompt, max_tokens, system, usage)) as deltas:
+            async for delta in deltas:
+                text += delta
+                # A string value can only complete on a closing quote
+                if '"' not in delta:
+                    continue
+                result = stop_when(text)
+                if result is not None:
+                    usage["llm_time_to_result"] = round(time.monotonic() - start, 3)
+                    usage["llm_stream_closed_early"] = True
+                    return result
+
+        usage["llm_time_to_result"] = round(time.monotonic() - start, 3)
+        usage["llm_stream_closed_early"] = False
+        return self._finish_text(text)
+
+    @abstractmethod
+    async def _complete(
+        self,
+        prompt: str,
+        max_tokens: int,
+        system: Optional[str],
+        usage: Optional[Dict[str, Any]]
+    ) -> str:
+        """Run the completion in one request and return its text"""
+
+    @abstractmethod
+    def _stream(
+        self,
+        prompt: str,
+        max_tokens: int,
+        system: Optional[str],
+        usage: Dict[str, Any]
+    ) -> AsyncIterator[str]:
+        """Yield completion text deltas; closing the iterator closes the stream"""
+
+    def _finish_text(self, text: str) -> str:
+        return text.strip()
+
+    async def close(self):
+        """Close the pooled HTTP connections"""
+
+class OpenAILLMClient(LLMClient):
+    """OpenAI chat completions in JSON mode over a pooled HTTP connection"""
+
+    provider = "openai"
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = settings.OPENAI_MODEL,
+        max_concurrency: int = settings.LLM_MAX_CONCURRENCY,
+        timeout: float = settings.LLM_TIMEOUT,
+        base_url: Optional[str] = settings.OPENAI_BASE_URL
+    ):
+        super().__init__(model, max_concurrency, timeout)
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=timeout,
+            max_retries=1,
+            http_client=DefaultAsyncHttpxClient(limits=_pool_limits())
+        )
+
+    def _messages(self, prompt: str, system: Optional[str]) -> List[Dict[str, str]]:
+        messages = [{"role": "user", "content": prompt}]
+        if system:
+            messages.insert(0, {"role": "system", "content": system})
+        return messages
+
+    @staticmethod
+    def _record_usage(response_usage: Any, usage: Optional[Dict[str, Any]]):
+        if usage is None or not response_usage:
+            return
+        usage["llm_prompt_tokens"] = response_usage.prompt_tokens
+        usage["llm_completion_tokens"] = response_usage.completion_tokens
+        details = getattr(response_usage, "prompt_tokens_details", None)
+        usage["llm_cached_prompt_tokens"] = getattr(details, "cached_tokens", 0) or 0
+
+    async def _complete(self, prompt, max_tokens, system, usage) -> str:
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(prompt, system),
+            max_completion_tokens=max_tokens,
+            response_format={"type": "json_object"},
+        )
+        self._record_usage(response.usage, usage)
+        return self._finish_text(response.choices[0].message.content or "")
+
+    async def _stream(self, prompt, max_tokens, system, usage) -> AsyncIterator[str]:
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(prompt, system),
+            max_completion_tokens=max_tokens,
+            response_format={"type": "json_object"},
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        try:
+            async for chunk in stream:
+                # Usage arrives in a final chunk without choices (never seen if closed early)
+                self._record_usage(chunk.usage, usage)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
+
+    async def close(self):
+        await self.client.close()
+
+class AnthropicLLMClient(LLMClient):
+    """Anthropic messages over a pooled HTTP connection, with the system prefix cached"""
+
+    provider = "anthropic"
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = settings.ANTHROPIC_MODEL,
+        max_concurrency: int = settings.LLM_MAX_CONCURRENCY,
+        timeout: float = settings.LLM_TIMEOUT
+    ):
+        super().__init__(model, max_concurrency, timeout)
+        self.client = AsyncAnthropic(
+            api_key=api_key,
+            timeout=timeout,
+            max_retries=1,
+            http_client=anthropic.DefaultAsyncHttpxClient(limits=_pool_limits())
+        )
+
+    def _request(self, prompt: str, max_tokens: int, system: Optional[str]) -> Dict[str, Any]:
+        request: Dict[str, Any] = {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+        if system:
+            request["system"] = [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]
+        return request
+
+    async def _complete(self, prompt, max_tokens, system, usage) -> str:
+        response = await self.client.messages.create(**self._request(prompt, max_tokens, system))
+
+        if usage is not None and response.usage:
+            usage["llm_prompt_tokens"] = response.usage.input_tokens
+            usage["llm_completion_tokens"] = response.usage.output_tokens
+            usage["llm_cached_prompt_tokens"] = response.usage.cache_read_input_tokens or 0
+
+        return self._finish_text("".join(block.text for block in response.content if block.type == "text"))
+
+    async def _stream(self, prompt, max_tokens, system, usage) -> AsyncIterator[str]:
+        stream = await self.client.messages.create(**self._request(prompt, max_tokens, system), stream=True)
+        try:
+            async for event in stream:
+                if event.type == "message_start":
+                    usage["llm_prompt_tokens"] = event.message.usage.input_tokens
+                    usage["llm_cached_prompt_tokens"] = event.message.usage.cache_read_input_tokens or 0
+                elif event.type == "message_delta":
+                    usage["llm_completion_tokens"] = event.usage.output_tokens
+                elif event.type == "content_block_delta" and event.delta.type == "text_delta":
+                    yield event.delta.text
+        finally:
+            await stream.close()
+
+    def _finish_text(self, text: str) -> str:
+        # No JSON mode here; drop a markdown fence if the model adds one
+        return _CODE_FENCE.sub("", text.strip())
+
+    async def close(self):
+        await self.client.close()
+
+class HedgedLLMRouter:
+    """
+    Sends each completion to the primary provider and, once it has been
+    pending past the primary's recent latency percentile, a hedged copy to
+    the next provider. The first response that parses wins; the other call
+    is cancelled. A call that fails or does not parse fails over to the next
+    provider immediately.
+    """
+
+    def __init__(
+        self,
+        providers: List[LLMClient],
+        hedge_enabled: bool = settings.LLM_HEDGE_ENABLED,
+        hedge_percentile: float = settings.LLM_HEDGE_PERCENTILE,
+        default_delay: float = settings.LLM_HEDGE_DEFAULT_DELAY,
+        min_delay: float = settings.LLM_HEDGE_MIN_DELAY,
+        min_samples: int = settings.LLM_HEDGE_MIN_SAMPLES
+    ):
+        if not providers:
+            raise ValueError("At least one LLM provider is required")
+        self.providers = providers
+        self.hedge_enabled = hedge_enabled
+        self.hedge_percentile = hedge_percentile
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.hedges_sent = 0
+        self.hedges_won = 0
+
+    @property
+    def primary(self) -> LLMClient:
+        return self.providers[0]
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait on the primary before sending the hedged request"""
+        if self.primary.latency.samples < self.min_samples:
+            return self.default_delay
+        return max(self.min_delay, self.primary.latency.percentile(self.hedge_percentile))
+
+    async def complete(
+        self,
+        prompt: str,
+        parse: Callable[[str], T],
+        max_tokens: int = 500,
+        system: Optional[str] = None,
+        usage: Optional[Dict[str, Any]] = None,
+        stop_when: Optional[StopCondition] = None
+    ) -> T:
+        """
+        Complete a prompt, hedging slow calls across providers
+
+        Args:
+            prompt: User prompt
+            parse: Turns a completion into the result; raising rejects it
+            max_tokens: Completion token budget
+            system: Optional static system prefix
+            usage: Optional dict that receives the winning call's token usage,
+                provider name and whether a hedge was sent; `llm_calls` is
+                incremented by the number of calls made
+            stop_when: Optional stop condition for streaming (see LLMClient.complete)
+
+        Returns:
+            The first successfully parsed completion
+        """
+        remaining = list(self.providers)
+        pending: Dict[asyncio.Task, Any] = {}
+        calls = 0
+        hedged = False
+        last_error: Optional[Exception] = None
+
+        def launch():
+            nonlocal calls
+            provider = remaining.pop(0)
+            call_usage: Dict[str, Any] = {}
+            task = asyncio.create_task(provider.complete(prompt, max_tokens, system, call_usage, stop_when))
+            pending[task] = (provider, call_usage)
+            calls += 1
+
+        launch()
+        deadline = self.hedge_delay() if self.hedge_enabled and remaining else None
+
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=deadline,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    logger.info(f"{self.primary.name} pending for {deadline:.2f}s, sending hedged request to {remaining[0].name}")
+                    launch()
+                    hedged = True
+                    self.hedges_sent += 1
+                    deadline = None
+                    continue
+
+                for task in done:
+                    provider, call_usage = pending.pop(task)
+                    try:
+                        result = parse(task.result())
+                    except Exception as e:
+                        logger.warning(f"LLM call to {provider.name} failed: {str(e)}")
+                        last_error = e
+                        continue
+
+                    if hedged and provider is not self.primary:
+                        self.hedges_won += 1
+                    if usage is not None:
+                        usage.update(call_usage)
+                        usage["llm_provider"] = provider.name
+                        usage["llm_hedged"] = hedged
+                    return result
+
+                if remaining and not pending:
+                    launch()
+                    deadline = None
+
+            raise last_error
+        finally:
+            if usage is not None:
+                usage["llm_calls"] = usage.get("llm_calls", 0) + calls
+            for task in pending:
+                task.cancel()
+            # Let the losers unwind (and release their connections) before returning
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-provider latency histograms and hedging counters"""
+        return {
+            "hedge_enabled": self.hedge_enabled,
+            "hedge_percentile": self.hedge_percentile,
+            "hedge_delay": round(self.hedge_delay(), 3),
+            "hedges_sent": self.hedges_sent,
+            "hedges_won": self.hedges_won,
+            "providers": {
+                provider.name: {
+                    "in_flight": provider.in_flight,
+                    "latency": provider.latency.snapshot()
+                }
+                for provider in self.providers
+            }
+        }
+
+    async def close(self):
+        """Close every provider's connections"""
+        for provider in self.providers:
+            await provider.close()
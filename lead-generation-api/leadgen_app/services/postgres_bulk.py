@@ -0,0 +1,131 @@
+"""
+Direct Postgres bulk loads for large lead batches
+"""
+
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import asyncpg
+
+from leadgen_app.config import settings
+from leadgen_app.utils.metrics import record_dependency_error, time_stage
+
+logger = logging.getLogger(__name__)
+
+# Columns written for a new lead; the same keys SupabaseService._lead_record builds
+LEAD_COLUMNS = (
+    "id", "user_id", "tab", "lead_status", "first_name", "last_name", "name", "email", "phone",
+    "linkedin_url", "job_title", "company_name", "company_size", "industry", "location",
+    "keywords", "source_query_criteria", "created_at"
+)
+
+class PostgresBulkLoader:
+    """
+    Loads lead records into Postgres with COPY instead of one PostgREST request
+
+    Records are copied as JSON into a transaction-scoped staging table and
+    converted to leads rows with jsonb_populate_record, so every column is
+    parsed the same way PostgREST parses it.
+    """
+
+    def __init__(self, dsn: str, pool_size: int):
+        self.dsn = dsn
+        self.pool_size = pool_size
+        self._pool: Optional[asyncpg.Pool] = None
+        self._pool_lock = asyncio.Lock()
+
+    async def _get_pool(self) -> asyncpg.Pool:
+        async with self._pool_lock:
+            if self._pool is None:
+                self._pool = await asyncpg.create_pool(
+                    self.dsn,
+                    min_size=0,
+                    max_size=self.pool_size,
+                    # Prepared statements do not survive transaction-mode poolers (Supavisor, PgBouncer)
+                    statement_cache_size=0
+                )
+        return self._pool
+
+    @asynccontextmanager
+    async def _staged(self, records: List[Dict[str, Any]]) -> AsyncIterator[asyncpg.Connection]:
+        """Open a transaction with the records COPYed into lead_staging (ord, record)"""
+        pool = await self._get_pool()
+        async with pool.acquire() as conn, conn.transaction():
+            await conn.execute(
+                "create temp table lead_staging (ord bigint not null, record jsonb not null) on commit drop"
+            )
+            await conn.copy_records_to_table(
+                "lead_staging",
+                records=((ord, json.dumps(record, default=str)) for ord, record in enumerate(records)),
+                columns=("ord", "record")
+            )
+            yield conn
+
+    async def insert_leads(self, records: List[Dict[str, Any]]) -> int:
+        """
+        Insert lead records, skipping ids that already exist
+
+        Args:
+            records: Lead row dictionaries
+
+        Returns:
+            Number of rows inserted
+        """
+        columns = ", ".join(LEAD_COLUMNS)
+        try:
+            with time_stage("copy"):
+                async with self._staged(records) as conn:
+                    status = await conn.execute(
+                        f"insert into public.leads ({columns}) "
+                        f"select {columns} from lead_staging "
+                        "cross join lateral jsonb_populate_record(null::public.leads, lead_staging.record) "
+                        "order by lead_staging.ord "
+                        "on conflict (id) do nothing"
+                    )
+        except Exception:
+            record_dependency_error("postgres")
+            raise
+
+        inserted = int(status.rsplit(" ", 1)[-1])
+        logger.info(f"Bulk loaded {inserted} of {len(records)} lead records with COPY")
+        return inserted
+
+    async def save_search_leads(self, user_id: str, records: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Run the save_search_leads database function over COPYed records
+
+        Args:
+            user_id: User identifier
+            records: Lead row dictionaries
+
+        Returns:
+            Counts of saved, restored, email_duplicates and id_duplicates
+        """
+        try:
+            with time_stage("copy"):
+                async with self._staged(records) as conn:
+                    result = await conn.fetchval(
+                        "select public.save_search_leads("
+                        "$1, (select coalesce(jsonb_agg(record order by ord), '[]') from lead_staging))",
+                        user_id
+                    )
+        except Exception:
+            record_dependency_error("postgres")
+            raise
+
+        return json.loads(result)
+
+    async def close(self):
+        """Close the connection pool"""
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+def create_bulk_loader() -> Optional[PostgresBulkLoader]:
+    """Bulk loader for DATABASE_URL, or None when direct Postgres access is not configured"""
+    if not settings.DATABASE_URL:
+        return None
+    return PostgresBulkLoader(settings.DATABASE_URL, settings.DATABASE_POOL_SIZE)
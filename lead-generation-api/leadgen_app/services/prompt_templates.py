@@ -0,0 +1,191 @@
+"""
+Prompt templates for Apollo URL generation
+
+The static instructions (parameter reference, company-size mapping, industry
+IDs and output format) are rendered once at import time into a single prefix
+shared by every request. Request-specific text is appended after it, so the
+prefix stays byte-identical across calls and can be served from the provider's
+prompt cache.
+"""
+
+import math
+from typing import Optional
+
+from leadgen_app.models.request_models import LeadSearchRequest
+from leadgen_app.utils.apollo_url import APOLLO_INDUSTRY_IDS, FILTER_FIELDS
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+except Exception:  # tiktoken is optional; fall back to a byte-based estimate
+    _ENCODING = None
+
+def count_tokens(text: str) -> int:
+    """
+    Count (or estimate) prompt tokens
+
+    Uses tiktoken when installed, otherwise roughly four bytes per token.
+    """
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return math.ceil(len(text.encode("utf-8")) / 4)
+
+_INDUSTRY_REFERENCE = "\n".join(
+    f"- {name} → {industry_id}" for name, industry_id in APOLLO_INDUSTRY_IDS.items()
+)
+
+STATIC_PREFIX = f"""Your task is to convert a description of prospects into a precise Apollo.io Search URL.
+
+**Base URL (always start with this):**
+https://app.apollo.io/#/people?page=1
+
+Apollo URL Parameters:
+- `&contactEmailStatusV2[]=verified`: REQUIRED - must be included in every URL
+- `&personLocations[]`: Geographic locations (e.g., "United States", "NYC", "San Francisco")
+- `&personTitles[]`: Job titles (e.g., "project manager", "director")
+- `&qOrganizationKeywordTags[]`: Specific company names (e.g., "Google", "OpenAI")
+- `&includedOrganizationKeywordFields[]=name`: Required when using qOrganizationKeywordTags
+- `&qAndedOrganizationKeywordTags[]`: Company-related concepts/keywords (e.g., "startup", "VC-backed")
+- `&includedAndedOrganizationKeywordFields[]=name`: Required when using qAndedOrganizationKeywordTags
+- `&includedAndedOrganizationKeywordFields[]=tags`: Additional field for keyword matching
+- `&organizationIndustryTagIds[]`: Industries (map name to ID from reference below)
+- `&organizationNumEmployeesRanges[]`: Company size ranges
+
+Company Size Mapping:
+- "1-10" → &organizationNumEmployeesRanges[]=1%2C10
+- "11-50" → &organizationNumEmployeesRanges[]=11%2C50
+- "51-200" → &organizationNumEmployeesRanges[]=51%2C200
+- "201-500" → &organizationNumEmployeesRanges[]=201%2C500
+- "501-1000" → &organizationNumEmployeesRanges[]=501%2C1000
+- "1001-5000" → &organizationNumEmployeesRanges[]=1001%2C5000
+- "5001-10000" → &organizationNumEmployeesRanges[]=5001%2C10000
+- "10001+" → &organizationNumEmployeesRanges[]=10001%2C
+
+Industry ID Reference (name → ID):
+{_INDUSTRY_REFERENCE}
+
+**IMPORTANT RULES:**
+- You **MUST** start with the base URL: https://app.apollo.io/#/people?page=1
+- You **MUST** include `&contactEmailStatusV2[]=verified` in every URL
+- URL encode spaces as %20 and special characters appropriately
+
+Return the generated URL in JSON format:
+{{"searchUrl":"Search URL goes here"}}
+"""
+
+STATIC_PREFIX_BYTES = len(STATIC_PREFIX.encode("utf-8"))
+STATIC_PREFIX_TOKENS = count_tokens(STATIC_PREFIX)
+
+_REGULAR_TEMPLATE = """**REGULAR INPUT MODE**: Parse the natural language input and extract all filter criteria from it.
+
+Process:
+1. **Parse the input description** to extract job titles, locations, company names, industry, and keywords
+2. **Generate the Apollo URL** using the extracted information as the main filters
+
+Example parsing:
+Input: "Marketing manager at OpenAI in California"
+Extracted filters:
+- Job Title: Marketing manager
+- Industry: Not specified
+- Location: California
+- Company Size: Not specified
+- Company Names: OpenAI
+- Keywords: Not specified
+
+Rules for this mode:
+- Only use information explicitly mentioned in the input
+- Do not infer or add extra filters
+
+Input Description: "{main_query}"
+"""
+
+_ADVANCED_TEMPLATE = """**ADVANCED INPUT MODE**: Use the provided filter values directly to construct the URL.
+
+Rules for this mode:
+- Use only the specified filter values - do not infer additional criteria
+- For "Not specified" fields, do not include those parameters in the URL
+
+The following filter criteria have been specified:
+- Job Title: {job_title}
+- Industry: {industry}
+- Location: {location}
+- Company Size: {company_size}
+- Company Names: {company_names}
+- Keywords: {general_keywords}
+{context}"""
+
+_CORRECTION_TEMPLATE = """
+Your previous answer could not be used: {problem}
+Return only the JSON object {{"searchUrl": "..."}} containing a complete Apollo URL with the filters above.
+"""
+
+class RenderedPrompt:
+    """A prompt split into its cacheable static prefix and request-specific body"""
+
+    def __init__(self, mode: str, body: str):
+        self.mode = mode
+        self.prefix = STATIC_PREFIX
+        self.body = body
+
+    @property
+    def text(self) -> str:
+        """Full prompt as a single string"""
+        return self.prefix + "\n" + self.body
+
+    def with_correction(self, problem: str) -> "RenderedPrompt":
+        """Same prompt with a note explaining why the previous answer was rejected"""
+        return RenderedPrompt(self.mode, self.body + _CORRECTION_TEMPLATE.format(problem=problem))
+
+    def size_metrics(self) -> dict:
+        """Prompt size accounting for per-request metrics"""
+        body_bytes = len(self.body.encode("utf-8"))
+        return {
+            "prompt_mode": self.mode,
+            "prompt_bytes": STATIC_PREFIX_BYTES + body_bytes,
+            "prompt_prefix_bytes": STATIC_PREFIX_BYTES,
+            "prompt_tokens": STATIC_PREFIX_TOKENS + count_tokens(self.body),
+            "prompt_prefix_tokens": STATIC_PREFIX_TOKENS
+        }
+
+def detect_input_mode(request: LeadSearchRequest) -> str:
+    """
+    Determine whether a request is free text only ("regular") or carries
+    structured filters ("advanced")
+    """
+    has_regular_input = bool(request.main_query and request.main_query.strip())
+    has_advanced_input = any(
+        getattr(request.filters, field, None) and str(getattr(request.filters, field, '')).strip()
+        for field in FILTER_FIELDS
+    )
+    return "regular" if has_regular_input and not has_advanced_input else "advanced"
+
+def render_prompt(request: LeadSearchRequest, mode: Optional[str] = None) -> RenderedPrompt:
+    """
+    Render the request-specific part of the URL generation prompt
+
+    Args:
+        request: Lead search request
+        mode: Input mode if already detected
+
+    Returns:
+        RenderedPrompt with the shared prefix and request body
+    """
+    mode = mode or detect_input_mode(request)
+
+    if mode == "regular":
+        return RenderedPrompt(mode, _REGULAR_TEMPLATE.format(main_query=request.main_query or ''))
+
+    filters = request.filters
+    context = ""
+    if request.main_query and request.main_query.strip():
+        context = f'\nAdditional context from regular input: "{request.main_query}"\n'
+
+    return RenderedPrompt(mode, _ADVANCED_TEMPLATE.format(
+        job_title=filters.job_title or 'Not specified',
+        industry=filters.industry or 'Not specified',
+        location=filters.location or 'Not specified',
+        company_size=filters.company_size or 'Not specified',
+        company_names=filters.company_names or 'Not specified',
+        general_keywords=filters.general_keywords or 'Not specified',
+        context=context
+    ))
@@ -4,26 +4,136 @@ Supabase service for database operations
 
 import logging
 import uuid
-from typing import List, Dict, Any, Optional
+from contextlib import nullcontext
+from typing import List, Dict, Any, Awaitable, Callable, Optional, Tuple, TypeVar
 from datetime import datetime
-from supabase import create_client, Client
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from postgrest import AsyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
 
 from leadgen_app.config import settings
 from leadgen_app.models.response_models import LeadData
+from leadgen_app.services.lead_filter import LeadFilters, email_key, id_key
+from leadgen_app.services.postgres_bulk import create_bulk_loader
+from leadgen_app.utils.metrics import (
+    DEDUPE_LOOKUPS,
+    POOL_LIMIT,
+    POOL_TASKS,
+    record_dependency_error,
+    time_stage
+)
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+USER_STATS_KEYS = ("new_count", "saved_count", "archived_count", "total_count", "recent_count")
+
+# PostgREST errors caused by the request body rather than the server (PGRST102: invalid body)
+ROW_ERROR_POSTGREST_CODES = {"PGRST102"}
+
+def _is_duplicate_error(error: Exception) -> bool:
+    return getattr(error, "code", None) == "23505" or "duplicate key value violates unique constraint" in str(error)
+
+def _is_row_error(error: Exception) -> bool:
+    """Whether a failed write was caused by the rows sent rather than the connection or server"""
+    code = getattr(error, "code", None)
+    if not isinstance(code, str):
+        return False
+    # SQLSTATE classes 22 (data exception) and 23 (integrity constraint violation)
+    return code.startswith(("22", "23")) or code in ROW_ERROR_POSTGREST_CODES
+
 class SupabaseService:
     """Service for Supabase database operations"""
     
     def __init__(self):
-        self.client: Client = create_client(
-            settings.SUPABASE_URL,
-            settings.SUPABASE_SERVICE_ROLE_KEY
+        # Database calls in flight at once: the pool plus its overflow
+        self.pool_limit = settings.DATABASE_POOL_SIZE + settings.DATABASE_MAX_OVERFLOW
+        self.http_client = httpx.AsyncClient(
+            http2=True,
+            follow_redirects=True,
+            timeout=settings.DATABASE_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=self.pool_limit,
+                max_keepalive_connections=settings.DATABASE_POOL_SIZE
+            )
+        )
+        self.client = AsyncPostgrestClient(
+            f"{settings.SUPABASE_URL}/rest/v1",
+            headers={
+                **DEFAULT_POSTGREST_CLIENT_HEADERS,
+                "apikey": settings.SUPABASE_SERVICE_ROLE_KEY,
+                "Authorization": f"Bearer {settings.SUPABASE_SERVICE_ROLE_KEY}"
+            },
+            http_client=self.http_client
         )
-        self.executor = ThreadPoolExecutor(max_workers=5)
+        self._slots = asyncio.Semaphore(self.pool_limit)
+        # Direct Postgres COPY path for batches of DATABASE_COPY_THRESHOLD or more (None without DATABASE_URL)
+        self.bulk_loader = create_bulk_loader()
+        self._submitted = 0
+        # Database functions (supabase/migrations) to skip in favour of per-step queries
+        self._unavailable_functions = set() if settings.SUPABASE_SAVE_RPC else {"save_search_leads"}
+        # Per-user Bloom filters that let duplicate checks skip keys the user cannot have
+        self.lead_filters = (
+            LeadFilters(self._load_lead_keys, snapshot_dir=settings.LEAD_FILTER_SNAPSHOT_DIR)
+            if settings.LEAD_FILTER_ENABLED else None
+        )
+        
+        POOL_LIMIT.set(self.pool_limit, pool="supabase")
+        POOL_TASKS.track(lambda: min(self._submitted, self.pool_limit), pool="supabase", state="running")
+        POOL_TASKS.track(lambda: max(self._submitted - self.pool_limit, 0), pool="supabase", state="queued")
+    
+    async def _execute(self, func: Callable[[], Awaitable[T]], stage: Optional[str] = None) -> T:
+        """
+        Run a PostgREST call once a pool slot is free
+        
+        Args:
+            func: Zero-argument callable returning the query's awaitable
+            stage: Optional pipeline stage the call (including its wait) is timed as
+            
+        Returns:
+            The awaited result
+        """
+        self._submitted += 1
+        try:
+            with time_stage(stage) if stage else nullcontext():
+                async with self._slots:
+                    return await func()
+        except Exception:
+            record_dependency_error("supabase")
+            raise
+        finally:
+            self._submitted -= 1
+    
+    async def _rpc(self, function: str, params: Dict[str, Any], stage: Optional[str] = None) -> Optional[Any]:
+        """
+        Call a database function from supabase/migrations
+        
+        Args:
+            function: Function name
+            params: Named arguments
+            stage: Optional pipeline stage the call is timed as
+            
+        Returns:
+            The function's result, or None when it failed or is not deployed
+        """
+        if function in self._unavailable_functions:
+            return None
+        
+        try:
+            result = await self._execute(lambda: self.client.rpc(function, params).execute(), stage=stage)
+        except Exception as e:
+            if getattr(e, "code", None) == "PGRST202":
+                # Function not deployed; stop trying until the service restarts
+                self._unavailable_functions.add(function)
+                logger.warning(f"{function} database function not found, using per-step queries. Apply supabase/migrations to enable it.")
+            else:
+                logger.error(f"Error calling database function {function}: {str(e)}")
+            return None
+        
+        return result.data
     
     async def save_leads_batch(
         self, 
@@ -40,57 +150,41 @@ class SupabaseService:
             source_query_criteria: Original search criteria
             
         Returns:
-            Dictionary with save results
+            Dictionary with save results, including rows the database rejected and why
         """
         try:
             # Prepare lead records for insertion
-            lead_records = []
-            
-            for lead in leads:
-                # Generate unique ID if not present
-                lead_id = lead.id or str(uuid.uuid4())
-                
-                record = {
-                    "id": lead_id,
-                    "user_id": user_id,
-                    "tab": "new",  # New leads start in 'new' tab
-                    "lead_status": "new",
-                    "first_name": lead.first_name,
-                    "last_name": lead.last_name,
-                    "name": lead.name,
-                    "email": lead.email,
-                    "phone": lead.phone,
-                    "linkedin_url": lead.linkedin_url,
-                    "job_title": lead.job_title,
-                    "company_name": lead.company_name,
-                    "company_size": lead.company_size,
-                    "industry": lead.industry,
-                    "location": lead.location,
-                    "keywords": lead.keywords,
-                    "source_query_criteria": {
-                        **source_query_criteria,
-                        "confidence_score": lead.confidence_score,
-                        "confidence_level": lead.confidence_level.value if lead.confidence_level else None
-                    },
-                    "created_at": datetime.utcnow().isoformat()
-                }
-                
-                lead_records.append(record)
-            
-            # Execute database insertion in thread pool
-            result = await asyncio.get_event_loop().run_in_executor(
-                self.executor,
-                self._insert_leads_sync,
-                lead_records
-            )
-            
-            logger.info(f"Successfully saved {len(lead_records)} leads for user {user_id}")
-            logger.info(f"Saved lead records details: {[{'id': r['id'], 'tab': r['tab'], 'user_id': r['user_id'], 'name': r.get('name', 'N/A')} for r in lead_records]}")
+            lead_records = [self._lead_record(lead, user_id, source_query_criteria) for lead in leads]
+            
+            rejected = []
+            if not await self._bulk_insert(lead_records):
+                result = await self._execute(lambda: self._insert_leads(lead_records), stage="upsert")
+                rejected = result["rejected"]
+                if not result["success"]:
+                    # Some halves were written before the retry failed
+                    inserted = result["data"]
+                    self._remember_leads(user_id, inserted)
+                    logger.error(f"Saved {len(inserted)} of {len(lead_records)} leads for user {user_id} before failing: {result['error']}")
+                    return {
+                        "success": False,
+                        "error": result["error"],
+                        "inserted_count": len(inserted),
+                        "lead_ids": [record["id"] for record in inserted],
+                        "rejected": rejected
+                    }
+            
+            rejected_ids = {rejection["id"] for rejection in rejected}
+            saved_records = [record for record in lead_records if record["id"] not in rejected_ids]
+            self._remember_leads(user_id, saved_records)
+            
+            logger.info(f"Successfully saved {len(saved_records)} leads for user {user_id}")
+            logger.info(f"Saved lead records details: {[{'id': r['id'], 'tab': r['tab'], 'user_id': r['user_id'], 'name': r.get('name', 'N/A')} for r in saved_records]}")
             
             return {
                 "success": True,
-                "inserted_count": len(lead_records),
-                "lead_ids": [record["id"] for record in lead_records]
+                "inserted_count": len(saved_records),
+                "lead_ids": [record["id"] for record in saved_records],
+                "rejected": rejected
             }
             
         except Exception as e:
@@ -101,24 +195,140 @@ class SupabaseService:
                 "inserted_count": 0
             }
     
-    def _insert_leads_sync(self, lead_records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    @staticmethod
+    def _lead_record(lead: LeadData, user_id: str, source_query_criteria: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build the leads table row for a new lead
+        
+        Args:
+            lead: Lead to store
+            user_id: User identifier
+            source_query_criteria: Original search criteria
+            
+        Returns:
+            Row dictionary for insertion
+        """
+        return {
+            "id": lead.id or str(uuid.uuid4()),  # Generate unique ID if not present
+            "user_id": user_id,
+            "tab": "new",  # New leads start in 'new' tab
+            "lead_status": "new",
+            "first_name": lead.first_name,
+            "last_name": lead.last_name,
+            "name": lead.name,
+            "email": lead.email,
+            "phone": lead.phone,
+            "linkedin_url": lead.linkedin_url,
+            "job_title": lead.job_title,
+            "company_name": lead.company_name,
+            "company_size": lead.company_size,
+            "industry": lead.industry,
+            "location": lead.location,
+            "keywords": lead.keywords,
+            "source_query_criteria": {
+                **source_query_criteria,
+                "confidence_score": lead.confidence_score,
+                "confidence_level": lead.confidence_level.value if lead.confidence_level else None
+            },
+            "created_at": datetime.utcnow().isoformat()
+        }
+    
+    async def save_search_leads(
+        self,
+        leads: List[LeadData],
+        user_id: str,
+        source_query_criteria: Dict[str, Any]
+    ) -> Optional[Dict[str, int]]:
+        """
+        Dedupe, restore and insert a search's leads in one database round trip
+        
+        Calls the save_search_leads database function (supabase/migrations), which
+        applies the same rules as check_duplicate_leads, check_duplicate_ids,
+        check_archived_leads, restore_archived_leads and save_leads_batch in a
+        single statement.
+        
+        Args:
+            leads: List of LeadData objects
+            user_id: User identifier
+            source_query_criteria: Original search criteria
+            
+        Returns:
+            Counts of saved, restored, email_duplicates and id_duplicates, or None
+            when the caller should fall back to the step-by-step save
+        """
+        lead_records = [self._lead_record(lead, user_id, source_query_criteria) for lead in leads]
+        result = await self._bulk_save_search_leads(user_id, lead_records)
+        if result is None:
+            result = await self._rpc(
+                "save_search_leads",
+                {"p_user_id": user_id, "p_leads": lead_records},
+                stage="save_rpc"
+            )
+        if result is None:
+            return None
+        self._remember_leads(user_id, lead_records)
+        
+        counts = {key: int(result.get(key, 0)) for key in ("saved", "restored", "email_duplicates", "id_duplicates")}
+        logger.info(f"Saved leads for user {user_id} in one round trip: {counts}")
+        return counts
+    
+    def use_bulk_load(self, record_count: int) -> bool:
+        """Whether a batch this large goes through the direct Postgres COPY path"""
+        return self.bulk_loader is not None and record_count >= settings.DATABASE_COPY_THRESHOLD
+    
+    async def _bulk_save_search_leads(self, user_id: str, lead_records: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Run save_search_leads over COPYed records for a large batch
+        
+        Returns:
+            The function's counts, or None when the batch is small or the bulk path failed
+        """
+        if not self.use_bulk_load(len(lead_records)) or "save_search_leads" in self._unavailable_functions:
+            return None
+        
+        try:
+            return await self.bulk_loader.save_search_leads(user_id, lead_records)
+        except Exception as e:
+            if getattr(e, "sqlstate", None) == "42883":  # undefined_function
+                self._unavailable_functions.add("save_search_leads")
+                logger.warning("save_search_leads database function not found, using per-step queries. Apply supabase/migrations to enable it.")
+            else:
+                logger.error(f"Bulk save of {len(lead_records)} leads failed, falling back to PostgREST: {str(e)}")
+            return None
+    
+    async def _bulk_insert(self, lead_records: List[Dict[str, Any]]) -> bool:
+        """
+        Insert a large batch with COPY
+        
+        Returns:
+            True when the records were loaded, False when the caller should use PostgREST
+        """
+        if not self.use_bulk_load(len(lead_records)):
+            return False
+        
+        try:
+            await self.bulk_loader.insert_leads(lead_records)
+            return True
+        except Exception as e:
+            logger.error(f"Bulk load of {len(lead_records)} leads failed, falling back to PostgREST upsert: {str(e)}")
+            return False
+    
+    async def _insert_leads(self, lead_records: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
-        Synchronous lead insertion (runs in thread pool)
+        Insert lead records, skipping duplicates (runs inside one pool slot)
         
         Args:
             lead_records: List of lead record dictionaries
             
         Returns:
-            Insertion result
+            Insertion result, with the rows rejected by the fallback and why. If
+            the fallback fails partway, success is False and data holds the rows
+            already written, with the error attached.
         """
         try:
             # Use upsert to handle duplicates gracefully
             # This will insert new records and ignore duplicates
-            result = self.client.table("leads").upsert(
-                lead_records,
-                on_conflict="id",
-                ignore_duplicates=True
-            ).execute()
+            result = await self._upsert_leads(lead_records)
             
             logger.info(f"Upsert result: inserted {len(result.data) if result.data else 0} records")
             if result.data:
@@ -127,36 +337,91 @@ class SupabaseService:
             return {
                 "success": True,
                 "data": result.data,
-                "count": len(result.data) if result.data else 0
+                "count": len(result.data) if result.data else 0,
+                "rejected": []
             }
             
         except Exception as e:
-            error_str = str(e)
-            logger.error(f"Synchronous lead insertion error: {error_str}")
-            
-            # If upsert fails, try individual insertions to identify problematic records
-            if "duplicate key value violates unique constraint" in error_str or "upsert" in error_str.lower():
-                logger.warning("Upsert failed, trying individual insertions to handle duplicates")
-                successful_inserts = []
-                
-                for record in lead_records:
-                    try:
-                        individual_result = self.client.table("leads").insert([record]).execute()
-                        if individual_result.data:
-                            successful_inserts.extend(individual_result.data)
-                    except Exception as individual_error:
-                        if "duplicate key value violates unique constraint" in str(individual_error):
-                            logger.info(f"Skipping duplicate lead with ID: {record.get('id')}")
-                        else:
-                            logger.error(f"Failed to insert individual lead {record.get('id')}: {individual_error}")
-                
+            logger.error(f"Lead insertion error: {str(e)}")
+            
+            # If upsert fails because of particular rows, retry in halves to isolate them
+            if not _is_row_error(e):
+                raise
+            
+            logger.warning(f"Upsert of {len(lead_records)} leads failed, retrying in halves to isolate the rejected rows")
+            inserted: List[Dict[str, Any]] = []
+            rejected: List[Dict[str, Any]] = []
+            try:
+                await self._bisect_insert(lead_records, e, inserted, rejected)
+            except Exception as retry_error:
+                record_dependency_error("supabase")
+                logger.error(f"Retrying the upsert in halves failed after {len(inserted)} rows were written: {str(retry_error)}")
                 return {
-                    "success": True,
-                    "data": successful_inserts,
-                    "count": len(successful_inserts)
+                    "success": False,
+                    "data": inserted,
+                    "count": len(inserted),
+                    "rejected": rejected,
+                    "error": str(retry_error)
                 }
             
-            raise
+            for rejection in rejected:
+                if rejection["duplicate"]:
+                    logger.info(f"Skipping duplicate lead with ID: {rejection['id']}")
+                else:
+                    logger.error(f"Failed to insert lead {rejection['id']}: {rejection['reason']}")
+            
+            return {
+                "success": True,
+                "data": inserted,
+                "count": len(inserted),
+                "rejected": rejected
+            }
+    
+    async def _upsert_leads(self, lead_records: List[Dict[str, Any]]):
+        """Upsert lead records, ignoring ids that already exist"""
+        return await self.client.table("leads").upsert(
+            lead_records,
+            on_conflict="id",
+            ignore_duplicates=True
+        ).execute()
+    
+    async def _bisect_insert(
+        self,
+        lead_records: List[Dict[str, Any]],
+        error: Exception,
+        inserted: List[Dict[str, Any]],
+        rejected: List[Dict[str, Any]]
+    ):
+        """
+        Retry a failed upsert in halves until each failure is narrowed to one row
+        
+        One bad row in n costs about 2 * log2(n) requests instead of n. Results
+        are appended as each half completes, so when an error that is not a row
+        error is raised the lists still show what was already written.
+        
+        Args:
+            lead_records: Records whose upsert failed together
+            error: The error their upsert failed with
+            inserted: Receives the inserted rows
+            rejected: Receives the rejected rows as {"id", "reason", "duplicate"}
+        """
+        if len(lead_records) == 1:
+            rejected.append({
+                "id": lead_records[0].get("id"),
+                "reason": getattr(error, "message", None) or str(error),
+                "duplicate": _is_duplicate_error(error)
+            })
+            return
+        
+        middle = len(lead_records) // 2
+        for half in (lead_records[:middle], lead_records[middle:]):
+            try:
+                result = await self._upsert_leads(half)
+                inserted.extend(result.data or [])
+            except Exception as e:
+                if not _is_row_error(e):
+                    raise
+                await self._bisect_insert(half, e, inserted, rejected)
     
     async def get_user_lead_count(self, user_id: str, tab: str = None) -> int:
         """
@@ -175,10 +440,7 @@ class SupabaseService:
             if tab:
                 query = query.eq("tab", tab)
             
-            result = await asyncio.get_event_loop().run_in_executor(
-                self.executor,
-                lambda: query.execute()
-            )
+            result = await self._execute(query.execute)
             
             return result.count or 0
             
@@ -190,6 +452,9 @@ class SupabaseService:
         """
         Get user statistics
         
+        Reads the trigger-maintained counters in one call to get_user_lead_stats,
+        or counts each tab when that function is not deployed.
+        
         Args:
             user_id: User identifier
             
@@ -197,6 +462,10 @@ class SupabaseService:
             User statistics dictionary
         """
         try:
+            result = await self._rpc("get_user_lead_stats", {"p_user_id": user_id}, stage="stats")
+            if result is not None:
+                return {key: int(result.get(key, 0)) for key in USER_STATS_KEYS}
+            
             # Get counts for each tab
             stats = {}
             
@@ -211,8 +480,7 @@ class SupabaseService:
             from datetime import timedelta
             recent_date = (datetime.utcnow() - timedelta(days=7)).isoformat()
             
-            recent_result = await asyncio.get_event_loop().run_in_executor(
-                self.executor,
+            recent_result = await self._execute(
                 lambda: self.client.table("leads")
                 .select("id", count="exact")
                 .eq("user_id", user_id)
@@ -226,13 +494,22 @@ class SupabaseService:
             
         except Exception as e:
             logger.error(f"Error getting user stats: {str(e)}")
-            return {
-                "new_count": 0,
-                "saved_count": 0,
-                "archived_count": 0,
-                "total_count": 0,
-                "recent_count": 0
-            }
+            return {key: 0 for key in USER_STATS_KEYS}
+    
+    async def reconcile_lead_counts(self, user_id: Optional[str] = None) -> Optional[int]:
+        """
+        Recompute the per-tab lead counters from the leads table
+        
+        Args:
+            user_id: Only this user's counters; all users when omitted
+            
+        Returns:
+            Number of counters corrected, or None when reconciliation is unavailable
+        """
+        result = await self._rpc("reconcile_user_lead_counts", {"p_user_id": user_id}, stage="reconcile_counts")
+        if result:
+            logger.warning(f"Corrected {result} drifted lead counters" + (f" for user {user_id}" if user_id else ""))
+        return result
     
     async def check_duplicate_leads(
         self, 
@@ -250,16 +527,17 @@ class SupabaseService:
             List of duplicate email addresses
         """
         try:
+            emails = await self._filter_candidates(user_id, emails, email_key, "emails")
             if not emails:
                 return []
             
-            result = await asyncio.get_event_loop().run_in_executor(
-                self.executor,
+            result = await self._execute(
                 lambda: self.client.table("leads")
                 .select("email")
                 .eq("user_id", user_id)
                 .in_("email", emails)
-                .execute()
+                .execute(),
+                stage="dedupe_emails"
             )
             
             existing_emails = [row["email"] for row in result.data if row.get("email")]
@@ -285,6 +563,7 @@ class SupabaseService:
             List of duplicate lead IDs (only from 'new' and 'saved' tabs)
         """
         try:
+            lead_ids = await self._filter_candidates(user_id, lead_ids, id_key, "ids")
             if not lead_ids:
                 return []
             
@@ -295,10 +574,7 @@ class SupabaseService:
                 query = query.in_("id", lead_ids)
                 return query.execute()
             
-            result = await asyncio.get_event_loop().run_in_executor(
-                self.executor,
-                query_active
-            )
+            result = await self._execute(query_active, stage="dedupe_ids")
             
             logger.info(f"Active tabs query result: {result.data}")
             
@@ -329,6 +605,10 @@ class SupabaseService:
                 logger.info("No lead IDs provided for archived check")
                 return []
             
+            lead_ids = await self._filter_candidates(user_id, lead_ids, id_key, "archived")
+            if not lead_ids:
+                return []
+            
             logger.info(f"Checking for archived leads: user_id={user_id}, lead_ids={lead_ids}")
             
             def query_archived():
@@ -338,10 +618,7 @@ class SupabaseService:
                 query = query.in_("id", lead_ids)
                 return query.execute()
             
-            result = await asyncio.get_event_loop().run_in_executor(
-                self.executor,
-                query_archived
-            )
+            result = await self._execute(query_archived, stage="dedupe_archived")
             
             logger.info(f"Archived query result: {result.data}")
             
@@ -372,14 +649,14 @@ class SupabaseService:
             if not lead_ids:
                 return True
             
-            result = await asyncio.get_event_loop().run_in_executor(
-                self.executor,
+            result = await self._execute(
                 lambda: self.client.table("leads")
                 .update({"tab": "new"})
                 .eq("user_id", user_id)
                 .in_("id", lead_ids)
                 .eq("tab", "archived")
-                .execute()
+                .execute(),
+                stage="restore_archived"
             )
             
             logger.info(f"Restored {len(lead_ids)} leads from archived to new tab")
@@ -389,10 +666,127 @@ class SupabaseService:
             logger.error(f"Error restoring archived leads: {str(e)}")
             return False
     
+    async def _filter_candidates(
+        self,
+        user_id: str,
+        values: List[str],
+        key: Callable[[str], str],
+        check: str
+    ) -> List[str]:
+        """
+        Narrow a duplicate check to the values the user's lead filter cannot rule out
+        
+        Args:
+            user_id: User identifier
+            values: Lead IDs or emails about to be looked up
+            key: id_key or email_key
+            check: Check name for leadgen_dedupe_lookups_total
+            
+        Returns:
+            Values still worth asking the database about
+        """
+        if not values:
+            return values
+        if self.lead_filters is not None:
+            values = await self.lead_filters.candidates(user_id, values, key)
+        DEDUPE_LOOKUPS.inc(check=check, outcome="queried" if values else "skipped")
+        return values
+    
+    def _remember_leads(self, user_id: str, lead_records: List[Dict[str, Any]]):
+        """Add saved lead rows to the user's lead filter"""
+        if self.lead_filters is not None:
+            self.lead_filters.add(user_id, lead_records)
+    
+    async def _load_lead_keys(self, user_id: str) -> List[Tuple[str, Optional[str]]]:
+        """
+        Every (id, email) pair the user has stored, for building their lead filter
+        
+        Pages by id (keyset) so deletes during the scan cannot shift rows past it.
+        
+        Args:
+            user_id: User identifier
+            
+        Returns:
+            List of (id, email) tuples across all tabs
+        """
+        keys = []
+        last_id = None
+        while True:
+            def query_page():
+                query = self.client.table("leads").select("id, email").eq("user_id", user_id)
+                if last_id is not None:
+                    query = query.gt("id", last_id)
+                return query.order("id").limit(1000).execute()
+            
+            result = await self._execute(query_page, stage="lead_filter_load")
+            # Stop only on an empty page: the server's max-rows may be below the requested limit
+            if not result.data:
+                return keys
+            keys.extend((row["id"], row.get("email")) for row in result.data)
+            last_id = result.data[-1]["id"]
+    
+    async def delete_leads_batch(
+        self,
+        lead_ids: List[str],
+        user_id: str
+    ) -> Dict[str, Any]:
+        """
+        Delete a user's leads
+        
+        Args:
+            lead_ids: List of lead IDs to delete
+            user_id: User identifier
+            
+        Returns:
+            Dictionary with the deleted count and IDs
+        """
+        try:
+            if not lead_ids:
+                return {"success": True, "deleted_count": 0, "deleted_ids": []}
+            
+            result = await self._execute(
+                lambda: self.client.table("leads")
+                .delete()
+                .eq("user_id", user_id)
+                .in_("id", lead_ids)
+                .execute(),
+                stage="delete"
+            )
+            
+            deleted_ids = [row["id"] for row in result.data if row.get("id")]
+            if self.lead_filters is not None:
+                self.lead_filters.remove(user_id, len(deleted_ids))
+            
+            logger.info(f"Deleted {len(deleted_ids)} leads for user {user_id}")
+            return {"success": True, "deleted_count": len(deleted_ids), "deleted_ids": deleted_ids}
+            
+        except Exception as e:
+            logger.error(f"Error deleting leads batch: {str(e)}")
+            return {
+                "success": False,
+                "error": str(e),
+                "deleted_count": 0
+            }
+    
     async def close(self):
         """Close the service and cleanup resources"""
-        if hasattr(self, 'executor'):
-            self.executor.shutdown(wait=True)
+        await self.http_client.aclose()
+        if self.bulk_loader is not None:
+            await self.bulk_loader.close()
+
+async def reconcile_lead_counts_periodically(interval: float):
+    """
+    Reconcile every user's lead counters every `interval` seconds until cancelled
+    
+    Args:
+        interval: Seconds between reconciliations
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await get_supabase_service().reconcile_lead_counts()
+        except Exception as e:
+            logger.error(f"Error reconciling lead counters: {str(e)}")
 
 # Global Supabase service instance - initialized lazily
 supabase_service = None
@@ -402,4 +796,11 @@ def get_supabase_service():
     global supabase_service
     if supabase_service is None:
         supabase_service = SupabaseService()
-    return supabase_service
\ No newline at end of file
+    return supabase_service
+
+async def close_supabase_service():
+    """Close the global Supabase service's connections if it was created"""
+    global supabase_service
+    if supabase_service is not None:
+        await supabase_service.close()
+        supabase_service = None
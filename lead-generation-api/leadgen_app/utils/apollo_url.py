@@ -0,0 +1,458 @@
+"""
+Apollo.io search URL utilities
+"""
+
+import hashlib
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+from leadgen_app.models.request_models import LeadFilters, LeadSearchRequest
+from leadgen_app.utils.helpers import format_apollo_url_params, parse_company_size_range
+
+APOLLO_PEOPLE_BASE_URL = "https://app.apollo.io/#/people"
+
+FILTER_FIELDS = ['job_title', 'industry', 'location', 'company_size', 'company_names', 'general_keywords']
+
+# Parameters every generated search URL must carry
+REQUIRED_APOLLO_PARAMS = {"contactEmailStatusV2": ["verified"]}
+
+# Apollo Industry ID Mapping (from n8n workflow)
+APOLLO_INDUSTRY_IDS = {
+    "information technology & services": "5567cd4773696439b10b0000",
+    "construction": "5567cd4773696439dd350000",
+    "marketing & advertising": "5567cd467369644d39040000",
+    "health, wellness & fitness": "5567cddb7369644d250c0000",
+    "pharmaceuticals": "5567e0eb73696410e4bd1200",
+    "biotechnology": "5567d08e7369645dbc4b0000",
+    "real estate": "5567cd477369645401010000",
+    "management consulting": "5567cdd47369643dbf260000",
+    "computer software": "5567cd4e7369643b70010000",
+    "internet": "5567cd4d736964397e020000",
+    "semiconductors": "5567e0d87369640e5aa30c00",
+    "retail": "5567ced173696450cb580000",
+    "financial services": "5567cdd67369643e64020000",
+    "consumer services": "5567d1127261697f2b1d0000",
+    "hospital & health care": "5567cdde73696439812c0000",
+    "automotive": "5567cdf27369644cfd800000",
+    "restaurants": "5567e0e0736964198de70700",
+    "education management": "5567ce9e736964540d540000",
+    "food & beverages": "5567ce1e7369643b806a0000",
+    "design": "5567cdbc73696439d90b0000",
+    "apparel & fashion": "5567cd82736964540d0b0000",
+    "import & export": "5567ce9d7369645430c50000",
+    "hospitality": "5567ce9d7369643bc19c0000",
+    "accounting": "5567ce1f7369643b78570000",
+    "events services": "5567cd8e7369645409450000",
+    "luxury goods & jewelry": "5567cda97369644cfd3e0000",
+    "cosmetics": "5567e1ae73696423dc040000",
+    "logistics & supply chain": "5567cd4973696439b9010000",
+    "warehousing": "5567e127736964181e700200",
+    "package/freight delivery": "5567e8bb7369641a658f0000"
+}
+
+def _normalize_text(value: str) -> str:
+    """Lowercase and collapse whitespace"""
+    return re.sub(r'\s+', ' ', value).strip().lower()
+
+def canonical_request_key(request: LeadSearchRequest) -> str:
+    """
+    Build a cache key for a search request
+
+    Equivalent requests (differing only in whitespace, case or the order of
+    comma-separated filter values) produce the same key.
+
+    Args:
+        request: Lead search request
+
+    Returns:
+        Hex digest identifying the canonical request
+    """
+    filters = {}
+    for field in FILTER_FIELDS:
+        value = getattr(request.filters, field, None)
+        if value is None:
+            continue
+        parts = value if isinstance(value, list) else str(value).split(',')
+        normalized = sorted({_normalize_text(str(part)) for part in parts if str(part).strip()})
+        if normalized:
+            filters[field] = normalized
+
+    canonical = {
+        "main_query": _normalize_text(request.main_query or ""),
+        "filters": filters
+    }
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True).encode()).hexdigest()
+
+def parse_apollo_url_params(url: str) -> List[Tuple[str, str]]:
+    """
+    Split an Apollo URL into decoded (key, value) pairs
+
+    Apollo keeps the query inside the fragment (``#/people?...``).
+
+    Args:
+        url: Apollo search URL
+
+    Returns:
+        List of decoded parameter pairs in original order
+    """
+    _, _, fragment = url.partition('#')
+    _, _, query = (fragment or url).partition('?')
+
+    params = []
+    for part in query.split('&'):
+        if not part:
+            continue
+        key, _, value = part.partition('=')
+        params.append((unquote(key).strip(), unquote(value).strip()))
+    return params
+
+def build_apollo_url(params: List[Tuple[str, str]]) -> str:
+    """
+    Assemble an Apollo people-search URL from decoded parameter pairs
+
+    Args:
+        params: Decoded (key, value) pairs
+
+    Returns:
+        Encoded Apollo URL
+    """
+    query = '&'.join(f"{key}={quote(value, safe='')}" for key, value in params)
+    return f"{APOLLO_PEOPLE_BASE_URL}?{query}"
+
+def canonicalize_apollo_url(url: str) -> str:
+    """
+    Normalize an Apollo URL so equivalent searches share one string
+
+    Parameters are decoded, de-duplicated, sorted (``page`` first) and
+    re-encoded consistently.
+
+    Args:
+        url: Apollo search URL
+
+    Returns:
+        Canonical Apollo URL
+    """
+    params = sorted(
+        set(parse_apollo_url_params(url)),
+        key=lambda pair: (pair[0] != 'page', pair[0], pair[1])
+    )
+    return build_apollo_url(params)
+
+def _split_values(value: str) -> List[str]:
+    """Split a comma-separated filter value into trimmed, non-empty parts"""
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+def _lookup_industry_ids(industry: str) -> Optional[List[str]]:
+    """Map industry names to Apollo tag IDs, or None if any name is unknown"""
+    name = _normalize_text(industry.replace('_', ' '))
+    if name in APOLLO_INDUSTRY_IDS:
+        return [APOLLO_INDUSTRY_IDS[name]]
+
+    ids = []
+    for part in _split_values(name):
+        industry_id = APOLLO_INDUSTRY_IDS.get(part)
+        if not industry_id:
+            return None
+        ids.append(industry_id)
+    return ids or None
+
+def compile_apollo_params(
+    filters: LeadFilters,
+    main_query: Optional[str] = None
+) -> Tuple[Dict[str, List[str]], List[str]]:
+    """
+    Translate structured filters into Apollo URL parameters without the LLM
+
+    Args:
+        filters: Structured lead filters (advanced input mode)
+        main_query: Optional free-text context that accompanies the filters
+
+    Returns:
+        Tuple of (decoded parameter values keyed by Apollo parameter name,
+        names of inputs that could not be mapped deterministically)
+    """
+    params: Dict[str, List[str]] = {}
+    unmapped: List[str] = []
+
+    if filters.job_title:
+        params["personTitles"] = _split_values(filters.job_title)
+
+    if filters.location:
+        # "Taipei, Taiwan" may be one place or two; leave that call to the LLM
+        if ',' in filters.location:
+            unmapped.append("location")
+        else:
+            params["personLocations"] = [filters.location.strip()]
+
+    if filters.industry:
+        industry_ids = _lookup_industry_ids(filters.industry)
+        if industry_ids:
+            params["organizationIndustryTagIds"] = industry_ids
+        else:
+            unmapped.append("industry")
+
+    if filters.company_size:
+        ranges = []
+        for size in _split_values(filters.company_size):
+            size_range = parse_company_size_range(size)
+            if not size_range:
+                ranges = None
+                break
+            ranges.append(f"{size_range['min']},{size_range['max'] or ''}")
+        if ranges:
+            params["organizationNumEmployeesRanges"] = ranges
+        else:
+            unmapped.append("company_size")
+
+    if filters.company_names:
+        params["qOrganizationKeywordTags"] = _split_values(filters.company_names)
+        params["includedOrganizationKeywordFields"] = ["name"]
+
+    if filters.general_keywords:
+        params["qAndedOrganizationKeywordTags"] = _split_values(filters.general_keywords)
+        params["includedAndedOrganizationKeywordFields"] = ["name", "tags"]
+
+    if main_query and main_query.strip():
+        unmapped.append("main_query")
+
+    return params, unmapped
+
+def _render_params(params: Dict[str, List[str]]) -> str:
+    """Encode decoded parameter values and format them for an Apollo URL"""
+    return format_apollo_url_params({
+        key: [quote(value, safe='') for value in values]
+        for key, values in params.items()
+    })
+
+def compile_apollo_url(params: Dict[str, List[str]]) -> str:
+    """
+    Build a canonical Apollo search URL from compiled parameters
+
+    Args:
+        params: Parameters from compile_apollo_params
+
+    Returns:
+        Canonical Apollo URL including the required parameters
+    """
+    rendered = _render_params({**REQUIRED_APOLLO_PARAMS, **params})
+    return canonicalize_apollo_url(f"{APOLLO_PEOPLE_BASE_URL}?page=1&{rendered}")
+
+def merge_apollo_params(apollo_url: str, params: Dict[str, List[str]]) -> str:
+    """
+    Add compiled parameters to an (LLM-generated) Apollo URL
+
+    Compiled parameters win: any values the URL already has for a compiled
+    parameter are dropped rather than combined with the compiled ones.
+
+    Args:
+        apollo_url: Existing Apollo URL
+        params: Parameters from compile_apollo_params
+
+    Returns:
+        Canonical Apollo URL with the URL's other parameters and the compiled ones
+    """
+    if not params:
+        return canonicalize_apollo_url(apollo_url)
+    kept = [
+        (key, value) for key, value in parse_apollo_url_params(apollo_url)
+        if key.replace("[]", "") not in params
+    ]
+    return canonicalize_apollo_url(f"{build_apollo_url(kept)}&{_render_params(params)}")
+
+# Apollo people-search parameters the generator may emit, by canonical name
+APOLLO_LIST_PARAMS = (
+    "contactEmailStatusV2",
+    "personTitles",
+    "personNotTitles",
+    "personSeniorities",
+    "personLocations",
+    "organizationLocations",
+    "organizationIndustryTagIds",
+    "organizationNumEmployeesRanges",
+    "qOrganizationKeywordTags",
+    "includedOrganizationKeywordFields",
+    "qAndedOrganizationKeywordTags",
+    "includedAndedOrganizationKeywordFields",
+)
+APOLLO_SCALAR_PARAMS = ("page", "qKeywords", "sortByField", "sortAscending")
+
+# Filter parameters (everything except paging, sorting and required flags)
+_SEARCH_PARAMS = set(APOLLO_LIST_PARAMS) - {"contactEmailStatusV2"} | {"qKeywords"}
+
+# Parameters Apollo needs alongside another one
+_COMPANION_PARAMS = {
+    "qOrganizationKeywordTags": ("includedOrganizationKeywordFields", ["name"]),
+    "qAndedOrganizationKeywordTags": ("includedAndedOrganizationKeywordFields", ["name", "tags"]),
+}
+
+_PARAM_NAMES = {name.lower(): name for name in APOLLO_LIST_PARAMS + APOLLO_SCALAR_PARAMS}
+_INDUSTRY_ID_SET = set(APOLLO_INDUSTRY_IDS.values())
+_EMPLOYEE_RANGE = re.compile(r"^\d+,\d*$")
+_SEARCH_URL_FIELD = re.compile(r'"?searchUrl"?\s*[:=]\s*"((?:[^"\\]|\\.)*)"', re.IGNORECASE)
+_APOLLO_URL = re.compile(r"""(?:https?://)?(?:app\.)?apollo\.io[^\s"'<>`)}]*""", re.IGNORECASE)
+_PERCENT_ESCAPE = re.compile(r"%[0-9A-Fa-f]{2}")
+
+class ApolloUrlError(ValueError):
+    """An LLM response that contains no usable Apollo search URL"""
+
+def _extract_apollo_url(text: str) -> Tuple[Optional[str], List[str]]:
+    """Find the search URL in a JSON, near-JSON or plain-text LLM response"""
+    repairs: List[str] = []
+    candidate = None
+
+    try:
+        result = json.loads(text)
+        if isinstance(result, dict) and isinstance(result.get("searchUrl"), str):
+            candidate = result["searchUrl"]
+    except (json.JSONDecodeError, TypeError):
+        pass
+
+    if candidate is None:
+        match = _SEARCH_URL_FIELD.search(text)
+        if match:
+            repairs.append("extracted searchUrl from malformed JSON")
+            try:
+                candidate = json.loads(f'"{match.group(1)}"')
+            except json.JSONDecodeError:
+                candidate = match.group(1)
+
+    if candidate is None or "apollo.io" not in candidate.lower():
+        match = _APOLLO_URL.search(text)
+        if not match:
+            return None, repairs
+        repairs.append("extracted URL from free text")
+        candidate = match.group(0)
+
+    cleaned = candidate.strip().replace("\\/", "/").replace("&amp;", "&")
+    if not cleaned.startswith(APOLLO_PEOPLE_BASE_URL):
+        repairs.append("rebuilt URL on the Apollo people-search base")
+    return cleaned, repairs
+
+def _decode_fully(value: str) -> str:
+    """Undo double encoding such as %2520"""
+    for _ in range(3):
+        if not _PERCENT_ESCAPE.search(value):
+            break
+        value = unquote(value)
+    return value
+
+def _repair_value(name: str, value: str, repairs: List[str]) -> Optional[str]:
+    """Validate one parameter value, fixing it where possible"""
+    if name == "organizationIndustryTagIds":
+        if value in _INDUSTRY_ID_SET:
+            return value
+        industry_ids = _lookup_industry_ids(value)
+        if industry_ids and len(industry_ids) == 1:
+            repairs.append(f"mapped industry name {value!r} to its ID")
+            return industry_ids[0]
+        repairs.append(f"dropped unknown industry ID {value!r}")
+        return None
+
+    if name == "organizationNumEmployeesRanges":
+        if _EMPLOYEE_RANGE.match(value):
+            return value
+        size_range = parse_company_size_range(value)
+        if size_range:
+            repairs.append(f"rewrote employee range {value!r}")
+            return f"{size_range['min']},{size_range['max'] or ''}"
+        repairs.append(f"dropped invalid employee range {value!r}")
+        return None
+
+    if name == "page" and not value.isdigit():
+        repairs.append(f"reset invalid page {value!r}")
+        return "1"
+
+    return value
+
+def repair_apollo_url(text: str) -> Tuple[str, List[str]]:
+    """
+    Turn an LLM response into a valid Apollo search URL without re-prompting
+
+    Pulls the URL out of JSON, near-JSON or plain text, keeps only known
+    Apollo parameters (fixing their names and checking industry IDs and
+    employee ranges), undoes broken encoding and adds the required
+    parameters.
+
+    Args:
+        text: Raw LLM response
+
+    Returns:
+        Tuple of (canonical Apollo URL, descriptions of the repairs applied)
+
+    Raises:
+        ApolloUrlError: If no Apollo URL with search filters can be recovered
+    """
+    url, repairs = _extract_apollo_url(text.strip())
+    if url is None:
+        raise ApolloUrlError("LLM response contains no Apollo URL")
+
+    values: Dict[str, List[str]] = {}
+    for key, raw_value in parse_apollo_url_params(url):
+        name = _PARAM_NAMES.get(key.replace("[]", "").strip().lower())
+        if name is None:
+            repairs.append(f"dropped unknown parameter {key!r}")
+            continue
+
+        value = _decode_fully(raw_value)
+        if value != raw_value:
+            repairs.append(f"decoded double-encoded {name}")
+        if not value:
+            continue
+
+        value = _repair_value(name, value, repairs)
+        if value is None:
+            continue
+        if name in APOLLO_SCALAR_PARAMS and name in values:
+            continue
+        values.setdefault(name, []).append(value)
+
+    if not _SEARCH_PARAMS & values.keys():
+        raise ApolloUrlError(f"Apollo URL has no valid search filters: {url}")
+
+    for name, required in REQUIRED_APOLLO_PARAMS.items():
+        if values.get(name) != required:
+            repairs.append(f"set required {name}")
+            values[name] = list(required)
+    for name, (companion, companion_values) in _COMPANION_PARAMS.items():
+        if name in values and companion not in values:
+            repairs.append(f"added {companion}")
+            values[companion] = list(companion_values)
+    values.setdefault("page", ["1"])
+
+    params = [
+        (name if name in APOLLO_SCALAR_PARAMS else f"{name}[]", value)
+        for name, name_values in values.items()
+        for value in name_values
+    ]
+    return canonicalize_apollo_url(build_apollo_url(params)), repairs
+
+def complete_search_url_json(partial: str) -> Optional[str]:
+    """
+    Check a streaming LLM response for a finished, usable searchUrl value
+
+    Used as the stop condition when streaming URL generation: everything
+    after the closing quote of the URL is irrelevant.
+
+    Args:
+        partial: Response text received so far
+
+    Returns:
+        A minimal JSON object holding the URL once its closing quote has
+        arrived and it can be repaired into a valid Apollo URL, else None
+    """
+    match = _SEARCH_URL_FIELD.search(partial)
+    if not match:
+        return None
+    try:
+        value = json.loads(f'"{match.group(1)}"')
+    except json.JSONDecodeError:
+        return None
+
+    candidate = json.dumps({"searchUrl": value})
+    try:
+        repair_apollo_url(candidate)
+    except ApolloUrlError:
+        return None
+    return candidate
@@ -0,0 +1,95 @@
+"""
+Bloom filter for approximate set membership
+"""
+
+import hashlib
+import math
+import struct
+import time
+from typing import Iterable, Optional
+
+# magic, version, bit count, hash count, items added, build time (epoch seconds)
+_HEADER = struct.Struct("<4sBQBQd")
+_MAGIC = b"LGBF"
+_VERSION = 1
+
+class BloomFilter:
+    """
+    Set of strings that may report false positives but never false negatives
+
+    Items cannot be removed. Filters with the same geometry (bit and hash
+    counts) can be merged, giving the union of what each one holds.
+    """
+
+    def __init__(self, num_bits: int, num_hashes: int, bits: Optional[bytearray] = None, count: int = 0, built_at: Optional[float] = None):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.bits = bits if bits is not None else bytearray((num_bits + 7) // 8)
+        self.count = count
+        self.built_at = time.time() if built_at is None else built_at
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float = 0.01) -> "BloomFilter":
+        """
+        Size a filter for `capacity` items at the given false positive rate
+
+        Args:
+            capacity: Items expected before the false positive rate degrades
+            error_rate: Target false positive rate at capacity
+
+        Returns:
+            An empty filter
+        """
+        capacity = max(capacity, 1)
+        num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        return cls(num_bits, num_hashes)
+
+    @property
+    def capacity(self) -> int:
+        """Items this filter holds before exceeding its target false positive rate"""
+        return int(self.num_bits * math.log(2) / self.num_hashes)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        # Double hashing (Kirsch-Mitzenmacher) over one 128-bit digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first, second = struct.unpack("<QQ", digest)
+        second |= 1
+        return ((first + i * second) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def same_geometry(self, other: "BloomFilter") -> bool:
+        return self.num_bits == other.num_bits and self.num_hashes == other.num_hashes
+
+    def merge(self, other: "BloomFilter"):
+        """
+        Add everything `other` holds (this filter keeps its build time)
+
+        Args:
+            other: Filter with the same geometry
+        """
+        if not self.same_geometry(other):
+            raise ValueError("Cannot merge Bloom filters of different geometry")
+        merged = int.from_bytes(self.bits, "little") | int.from_bytes(other.bits, "little")
+        self.bits = bytearray(merged.to_bytes(len(self.bits), "little"))
+        self.count = max(self.count, other.count)
+
+    def to_bytes(self) -> bytes:
+        return _HEADER.pack(_MAGIC, _VERSION, self.num_bits, self.num_hashes, self.count, self.built_at) + bytes(self.bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BloomFilter":
+        magic, version, num_bits, num_hashes, count, built_at = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Not a Bloom filter snapshot")
+        bits = bytearray(data[_HEADER.size:])
+        if len(bits) != (num_bits + 7) // 8:
+            raise ValueError("Truncated Bloom filter snapshot")
+        return cls(num_bits, num_hashes, bits, count, built_at)
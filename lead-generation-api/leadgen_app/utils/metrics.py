@@ -0,0 +1,326 @@
+"""
+Latency histograms and Prometheus-style service metrics
+"""
+
+import bisect
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from leadgen_app.utils.tracing import span
+
+# Seconds; covers fast cached completions through stalled calls near the timeout
+DEFAULT_LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 13.0, 21.0, 34.0, 60.0)
+
+# Seconds; pipeline stages range from millisecond serialization to multi-minute actor runs
+STAGE_LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+class LatencyHistogram:
+    """
+    Cumulative bucketed latency histogram with a window of recent samples
+
+    Buckets count every observation since startup (for dashboards); percentiles
+    are computed from the most recent `window` samples so they follow the
+    provider's current behaviour.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS, window: int = 500):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._recent = deque(maxlen=window)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        """Record one call's latency"""
+        self._counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self._recent.append(seconds)
+        self.count += 1
+        self.sum += seconds
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        Latency at quantile q (0-1) over the recent window
+
+        Returns:
+            Latency in seconds, or None before any observation
+        """
+        if not self._recent:
+            return None
+        ordered = sorted(self._recent)
+        index = min(int(q * len(ordered)), len(ordered) - 1)
+        return ordered[index]
+
+    @property
+    def samples(self) -> int:
+        """Number of samples in the recent window"""
+        return len(self._recent)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Serializable histogram with cumulative bucket counts and recent percentiles"""
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets, self._counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = self.count
+
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 3),
+            "buckets": buckets,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99)
+        }
+
+LabelValues = Tuple[str, ...]
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+class _Metric:
+    """Base for labelled metrics rendered in the Prometheus text format"""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[Tuple[str, Sequence[str], Sequence[str], float]]:
+        """(suffix, label names, label values, value) for every series"""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for suffix, names, values, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(names, values)} {_format_value(value)}")
+        return "\n".join(lines)
+
+class Counter(_Metric):
+    """Monotonically increasing count per label set"""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        return [("", self.labelnames, key, value) for key, value in sorted(self._values.items())]
+
+class Gauge(_Metric):
+    """
+    Current value per label set
+
+    Series are either set directly or tracked with a callback that is read at
+    scrape time (e.g. an executor's queue length).
+    """
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._callbacks: Dict[LabelValues, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels: str):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str):
+        self.inc(-amount, **labels)
+
+    def track(self, callback: Callable[[], float], **labels: str):
+        """Report callback() for this label set at every scrape"""
+        self._callbacks[self._key(labels)] = callback
+
+    @contextmanager
+    def track_in_progress(self, **labels: str) -> Iterator[None]:
+        """Count the enclosed block while it runs"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def value(self, **labels: str) -> float:
+        key = self._key(labels)
+        if key in self._callbacks:
+            return float(self._callbacks[key]())
+        return self._values.get(key, 0.0)
+
+    def samples(self):
+        values = dict(self._values)
+        for key, callback in list(self._callbacks.items()):
+            try:
+                values[key] = float(callback())
+            except Exception:
+                # A collector for a torn-down resource must not break the scrape
+                continue
+        return [("", self.labelnames, key, value) for key, value in sorted(values.items())]
+
+class Histogram(_Metric):
+    """Bucketed latency per label set, backed by LatencyHistogram"""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = STAGE_LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelValues, LatencyHistogram] = {}
+
+    def series(self, **labels: str) -> LatencyHistogram:
+        key = self._key(labels)
+        with self._lock:
+            histogram = self._series.get(key)
+            if histogram is None:
+                histogram = self._series[key] = LatencyHistogram(self.buckets)
+        return histogram
+
+    def observe(self, seconds: float, **labels: str):
+        self.series(**labels).observe(seconds)
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the wall-clock duration of the enclosed block, including awaits"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        samples = []
+        bucket_names = self.labelnames + ("le",)
+        for key, histogram in sorted(self._series.items()):
+            snapshot = histogram.snapshot()
+            for bound, count in snapshot["buckets"].items():
+                samples.append(("_bucket", bucket_names, key + (bound,), count))
+            samples.append(("_sum", self.labelnames, key, histogram.sum))
+            samples.append(("_count", self.labelnames, key, histogram.count))
+        return samples
+
+class MetricsRegistry:
+    """Named metrics rendered together for the /metrics endpoint"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                raise ValueError(f"Metric {metric.name} is already registered differently")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = STAGE_LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+# Global registry and the service's pipeline metrics
+registry = MetricsRegistry()
+
+STAGE_DURATION = registry.histogram(
+    "leadgen_stage_duration_seconds",
+    "Duration of each lead search pipeline stage",
+    ("stage",)
+)
+DEPENDENCY_ERRORS = registry.counter(
+    "leadgen_dependency_errors_total",
+    "Failed calls to external dependencies",
+    ("dependency",)
+)
+SEARCHES_IN_FLIGHT = registry.gauge(
+    "leadgen_searches_in_flight",
+    "Lead searches currently running",
+    ("mode",)
+)
+POOL_TASKS = registry.gauge(
+    "leadgen_pool_tasks",
+    "Calls submitted to a bounded pool, by state (running or queued)",
+    ("pool", "state")
+)
+POOL_LIMIT = registry.gauge(
+    "leadgen_pool_limit",
+    "Calls a bounded pool runs at once",
+    ("pool",)
+)
+DEDUPE_LOOKUPS = registry.counter(
+    "leadgen_dedupe_lookups_total",
+    "Duplicate-check lookups by outcome (queried, or skipped because the lead filter ruled out every key)",
+    ("check", "outcome")
+)
+
+@contextmanager
+def time_stage(stage: str) -> Iterator[None]:
+    """Time a pipeline stage into leadgen_stage_duration_seconds and the request's trace"""
+    with span(stage), STAGE_DURATION.time(stage=stage):
+        yield
+
+def record_dependency_error(dependency: str):
+    """Count one failed call to an external dependency"""
+    DEPENDENCY_ERRORS.inc(dependency=dependency)
@@ -0,0 +1,51 @@
+"""
+Single-flight coalescing of concurrent identical async calls
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time; concurrent callers with the same
+    key await the in-flight call and share its result (or exception)
+
+    The shared call is shielded, so one caller being cancelled (e.g. a client
+    disconnect) does not cancel the work the other callers are waiting on.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run fn for key, or join the call already in flight for key
+
+        Args:
+            key: Coalescing key
+            fn: Zero-argument coroutine function doing the work
+
+        Returns:
+            Tuple of (result, whether this caller joined an existing call)
+        """
+        future = self._calls.get(key)
+        shared = future is not None
+
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._calls[key] = future
+
+            def _forget(done: asyncio.Future):
+                if self._calls.get(key) is done:
+                    del self._calls[key]
+                # Retrieve the exception so an abandoned call never logs "never retrieved"
+                if not done.cancelled():
+                    done.exception()
+
+            future.add_done_callback(_forget)
+
+        return await asyncio.shield(future), shared
+
+    def __len__(self) -> int:
+        """Number of calls currently in flight"""
+        return len(self._calls)
@@ -0,0 +1,159 @@
+"""
+Lightweight per-request tracing with nested spans
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from leadgen_app.config import settings
+
+logger = logging.getLogger(__name__)
+
+class Span:
+    """One timed operation inside a trace"""
+
+    def __init__(self, trace: "Trace", name: str, parent: Optional["Span"]):
+        self.trace = trace
+        self.name = name
+        self.parent = parent
+        self.path = f"{parent.path}.{name}" if parent and parent.parent else name
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        """Seconds elapsed, up to now for a span that is still open"""
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def to_dict(self) -> Dict[str, Any]:
+        span = {
+            "name": self.name,
+            "path": self.path,
+            "offset": round(self.start - self.trace.root.start, 4),
+            "duration": round(self.duration, 4)
+        }
+        if self.error:
+            span["error"] = self.error
+        return span
+
+class Trace:
+    """Spans recorded for one request; the root span covers the whole request"""
+
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.attributes = attributes or {}
+        self.started_at = datetime.now(timezone.utc)
+        self.spans: List[Span] = []
+        self.root = Span(self, name, None)
+
+    def timings(self) -> Dict[str, float]:
+        """
+        Seconds per span path, e.g. {"total": 9.1, "crawl": 7.4, "save.upsert": 0.3}
+
+        Spans that repeat (a conversion per streamed page) are summed.
+        """
+        timings = {"total": round(self.root.duration, 3)}
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            totals[span.path] = totals.get(span.path, 0.0) + span.duration
+        timings.update({path: round(seconds, 3) for path, seconds in totals.items()})
+        return timings
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at.isoformat(),
+            "duration": round(self.root.duration, 4),
+            "attributes": self.attributes,
+            "spans": [span.to_dict() for span in self.spans]
+        }
+
+class JsonlTraceExporter:
+    """Appends each finished trace as one JSON line to a local file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, trace: Trace):
+        line = json.dumps(trace.to_dict(), default=str)
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as file:
+                file.write(line + "\n")
+        except OSError as e:
+            logger.warning(f"Could not export trace {trace.trace_id} to {self.path}: {str(e)}")
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_exporter: Optional[JsonlTraceExporter] = None
+
+def _restore(token):
+    try:
+        _current_span.reset(token)
+    except ValueError:
+        # A streaming generator finalized from another task; that context is gone anyway
+        pass
+
+def get_exporter() -> Optional[JsonlTraceExporter]:
+    """Exporter for TRACE_EXPORT_PATH, or None when trace export is off"""
+    global _exporter
+    if not settings.TRACE_EXPORT_PATH:
+        return None
+    if _exporter is None or _exporter.path != settings.TRACE_EXPORT_PATH:
+        _exporter = JsonlTraceExporter(settings.TRACE_EXPORT_PATH)
+    return _exporter
+
+def current_trace() -> Optional[Trace]:
+    """Trace of the request running in this context, if any"""
+    span = _current_span.get()
+    return span.trace if span else None
+
+@contextmanager
+def start_trace(name: str, **attributes: Any) -> Iterator[Trace]:
+    """
+    Trace the enclosed request; spans opened inside it are recorded on the trace
+
+    The finished trace is exported when TRACE_EXPORT_PATH is set.
+    """
+    trace = Trace(name, attributes)
+    token = _current_span.set(trace.root)
+    try:
+        yield trace
+    except BaseException as e:
+        trace.root.error = type(e).__name__
+        raise
+    finally:
+        trace.root.end = time.perf_counter()
+        _restore(token)
+        exporter = get_exporter()
+        if exporter:
+            exporter.export(trace)
+
+@contextmanager
+def span(name: str) -> Iterator[Optional[Span]]:
+    """Record the enclosed block as a child of the current span; a no-op outside a trace"""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+
+    child = Span(parent.trace, name, parent)
+    parent.trace.spans.append(child)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = type(e).__name__
+        raise
+    finally:
+        child.end = time.perf_counter()
+        _restore(token)
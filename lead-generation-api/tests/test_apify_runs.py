@@ -0,0 +1,85 @@
+"""
+Tests for shared actor runs and streaming dataset reads
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from leadgen_app.services.apify_dataset import ApifyDatasetReader
+from leadgen_app.services.apify_runs import ActorRunRegistry
+
+class FakeApify:
+    """In-memory stand-in for ApifyClientAsync: one actor writing one dataset"""
+
+    def __init__(self):
+        self.items = []
+        self.starts = 0
+        self.run_done = asyncio.Event()
+
+    def actor(self, actor_id):
+        async def start(run_input):
+            self.starts += 1
+            return {"id": "run-1", "defaultDatasetId": "dataset-1"}
+        return SimpleNamespace(start=start)
+
+    def run(self, run_id):
+        async def wait_for_finish():
+            await self.run_done.wait()
+            return {"id": run_id, "status": "SUCCEEDED"}
+        return SimpleNamespace(wait_for_finish=wait_for_finish)
+
+    def dataset(self, dataset_id):
+        async def list_items(offset, limit, fields):
+            items = self.items[offset:offset + limit]
+            return SimpleNamespace(items=items, total=len(self.items))
+        return SimpleNamespace(list_items=list_items)
+
+@pytest.mark.asyncio
+async def test_identical_runs_are_shared_until_finished():
+    apify = FakeApify()
+    registry = ActorRunRegistry(apify, "actor")
+
+    (first, first_shared), (second, second_shared) = await asyncio.gather(
+        registry.acquire(("url", 25), {}),
+        registry.acquire(("url", 25), {})
+    )
+    late, late_shared = await registry.acquire(("url", 25), {})
+
+    assert apify.starts == 1
+    assert first is second is late
+    assert (first_shared, second_shared, late_shared) == (False, True, True)
+    assert first.dataset_id == "dataset-1"
+
+    apify.run_done.set()
+    await asyncio.wait_for(first.finished.wait(), timeout=1)
+    assert first.status == "SUCCEEDED"
+    assert len(registry) == 0
+
+@pytest.mark.asyncio
+async def test_live_pages_stream_while_run_is_writing():
+    apify = FakeApify()
+    reader = ApifyDatasetReader(apify, page_size=2)
+    finished = asyncio.Event()
+    apify.items = [{"id": "1"}, {"id": "2"}, {"id": "3"}]
+
+    pages = reader.iter_live_pages("dataset-1", finished, poll_interval=0.01)
+    assert await pages.__anext__() == [{"id": "1"}, {"id": "2"}]
+    assert await pages.__anext__() == [{"id": "3"}]
+
+    # The actor writes more, then finishes; the reader drains the rest
+    apify.items.append({"id": "4"})
+    finished.set()
+    remaining = [page async for page in pages]
+    assert remaining == [[{"id": "4"}]]
+
+@pytest.mark.asyncio
+async def test_live_pages_respect_limit():
+    apify = FakeApify()
+    reader = ApifyDatasetReader(apify, page_size=10)
+    finished = asyncio.Event()
+    apify.items = [{"id": str(i)} for i in range(5)]
+
+    pages = [page async for page in reader.iter_live_pages("dataset-1", finished, limit=3)]
+    assert pages == [[{"id": "0"}, {"id": "1"}, {"id": "2"}]]
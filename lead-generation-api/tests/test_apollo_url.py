@@ -0,0 +1,153 @@
+"""
+Tests for Apollo URL canonicalization, compilation and caching
+"""
+
+import time
+
+import pytest
+
+from leadgen_app.models.request_models import LeadFilters, LeadSearchRequest
+from leadgen_app.utils.apollo_url import (
+    APOLLO_INDUSTRY_IDS,
+    canonical_request_key,
+    canonicalize_apollo_url,
+    compile_apollo_params,
+    compile_apollo_url,
+    merge_apollo_params,
+    repair_apollo_url,
+    ApolloUrlError
+)
+from leadgen_app.utils.cache import TTLCache
+
+def test_equivalent_requests_share_key():
+    """Whitespace, case and filter order do not change the key"""
+    first = LeadSearchRequest(
+        main_query="  Marketing   managers in Taiwan ",
+        filters={"jobTitle": "CEO, Marketing Manager", "location": "Taiwan"}
+    )
+    second = LeadSearchRequest(
+        main_query="marketing managers in taiwan",
+        filters={"jobTitle": "marketing manager,ceo", "location": " taiwan"}
+    )
+    assert canonical_request_key(first) == canonical_request_key(second)
+
+def test_different_requests_differ():
+    first = LeadSearchRequest(main_query="Marketing managers in Taiwan")
+    second = LeadSearchRequest(main_query="Marketing managers in Japan")
+    assert canonical_request_key(first) != canonical_request_key(second)
+
+def test_canonicalize_apollo_url():
+    """Parameter order and encoding are normalized"""
+    first = (
+        "https://app.apollo.io/#/people?page=1&personTitles[]=ceo"
+        "&contactEmailStatusV2[]=verified&personLocations[]=United%20States"
+    )
+    second = (
+        "https://app.apollo.io/#/people?contactEmailStatusV2[]=verified"
+        "&personLocations[]=United States&page=1&personTitles[]=ceo&personTitles[]=ceo"
+    )
+    canonical = canonicalize_apollo_url(first)
+    assert canonical == canonicalize_apollo_url(second)
+    assert canonical.startswith("https://app.apollo.io/#/people?page=1&")
+    assert "personLocations[]=United%20States" in canonical
+
+def test_compile_advanced_filters():
+    """Fully structured filters compile without the LLM"""
+    filters = LeadFilters(
+        job_title="CEO, Marketing Manager",
+        industry="Cosmetics",
+        location="Taiwan",
+        company_size="51-200",
+        company_names="O'right",
+        general_keywords="skincare"
+    )
+    params, unmapped = compile_apollo_params(filters)
+    assert unmapped == []
+
+    url = compile_apollo_url(params)
+    assert url.startswith("https://app.apollo.io/#/people?page=1&")
+    assert "contactEmailStatusV2[]=verified" in url
+    assert "personTitles[]=CEO" in url
+    assert "personTitles[]=Marketing%20Manager" in url
+    assert f"organizationIndustryTagIds[]={APOLLO_INDUSTRY_IDS['cosmetics']}" in url
+    assert "organizationNumEmployeesRanges[]=51%2C200" in url
+    assert "qOrganizationKeywordTags[]=O%27right" in url
+    assert "includedOrganizationKeywordFields[]=name" in url
+    assert "includedAndedOrganizationKeywordFields[]=tags" in url
+
+def test_compile_reports_unmapped_inputs():
+    filters = LeadFilters(job_title="CTO", industry="space mining", company_size="10001+")
+    params, unmapped = compile_apollo_params(filters, main_query="fast growing startups")
+    assert unmapped == ["industry", "main_query"]
+    assert params["organizationNumEmployeesRanges"] == ["10001,"]
+
+    merged = merge_apollo_params(
+        "https://app.apollo.io/#/people?page=1&contactEmailStatusV2[]=verified&qAndedOrganizationKeywordTags[]=startup",
+        params
+    )
+    assert "personTitles[]=CTO" in merged
+    assert "qAndedOrganizationKeywordTags[]=startup" in merged
+
+def test_merge_keeps_compiled_values_over_llm_values():
+    merged = merge_apollo_params(
+        "https://app.apollo.io/#/people?page=1&contactEmailStatusV2[]=verified"
+        "&personTitles[]=VP%20Engineering&organizationNumEmployeesRanges[]=1%2C10",
+        {"personTitles": ["CTO"]}
+    )
+    assert "personTitles[]=CTO" in merged
+    assert "VP%20Engineering" not in merged
+    assert "organizationNumEmployeesRanges[]=1%2C10" in merged
+
+def test_repair_keeps_valid_urls_unchanged():
+    url = "https://app.apollo.io/#/people?page=1&contactEmailStatusV2[]=verified&personTitles[]=cto"
+    repaired, repairs = repair_apollo_url('{"searchUrl": "%s"}' % url)
+    assert repaired == url
+    assert repairs == []
+
+def test_repair_near_json_output():
+    response = (
+        'Here is the URL:\n```json\n{searchUrl: "app.apollo.io\\/#\\/people?page=x'
+        '&personTitles=head%2520of%2520sales&organizationIndustryTagIds[]=computer software'
+        '&organizationIndustryTagIds[]=123&organizationNumEmployeesRanges[]=51-200'
+        '&qOrganizationKeywordTags[]=OpenAI&amp;foo=bar"}\n```'
+    )
+    repaired, repairs = repair_apollo_url(response)
+
+    assert repaired == (
+        "https://app.apollo.io/#/people?page=1"
+        "&contactEmailStatusV2[]=verified"
+        "&includedOrganizationKeywordFields[]=name"
+        f"&organizationIndustryTagIds[]={APOLLO_INDUSTRY_IDS['computer software']}"
+        "&organizationNumEmployeesRanges[]=51%2C200"
+        "&personTitles[]=head%20of%20sales"
+        "&qOrganizationKeywordTags[]=OpenAI"
+    )
+    assert "dropped unknown parameter 'foo'" in repairs
+    assert "dropped unknown industry ID '123'" in repairs
+
+@pytest.mark.parametrize("response", [
+    "I cannot help with that.",
+    '{"searchUrl": "https://app.apollo.io/#/people?page=1&contactEmailStatusV2[]=verified"}',
+    '{"searchUrl": "https://app.apollo.io/#/people?page=1&organizationIndustryTagIds[]=unknown"}',
+])
+def test_unrepairable_responses(response):
+    with pytest.raises(ApolloUrlError):
+        repair_apollo_url(response)
+
+def test_ttl_cache_lru_and_expiry():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts "b", the least recently used
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+    cache.set("short", 4, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("short") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
+    assert stats["evictions"] >= 1
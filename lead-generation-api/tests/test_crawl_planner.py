@@ -0,0 +1,112 @@
+"""
+Tests for crawl sizing
+"""
+
+import pytest
+
+from leadgen_app.models.lead_models import apify_lead_id
+from leadgen_app.models.request_models import LeadSearchRequest
+from leadgen_app.services import ai_service as ai_service_module
+from leadgen_app.services.ai_service import AIService
+from leadgen_app.services.crawl_planner import CrawlPlanner, crawl_planner
+
+def test_plan_scales_with_max_results():
+    planner = CrawlPlanner(overscan_factor=1.2, min_records=25, max_records=500, default_loss_rate=0.1)
+    assert planner.plan("user-a", 10)["planned_records"] == 25
+    assert planner.plan("user-a", 50)["planned_records"] == 67
+    assert planner.plan("user-a", 500)["planned_records"] == 500
+
+def test_plan_grows_with_user_loss_rate():
+    planner = CrawlPlanner(overscan_factor=1.0, min_records=1, max_records=500, default_loss_rate=0.0)
+    assert planner.plan("user-b", 50)["planned_records"] == 50
+
+    planner.record_dedupe("user-b", total=50, duplicates=25)
+    assert planner.loss_rate("user-b") == 0.5
+    assert planner.plan("user-b", 50)["planned_records"] == 100
+
+    # Other users keep the default
+    assert planner.plan("user-c", 50)["planned_records"] == 50
+
+class KnownLeads:
+    """Supabase double holding stored emails and lead IDs, counting duplicate checks"""
+
+    def __init__(self, emails, lead_ids, lead_filters=None):
+        self.emails = emails
+        self.lead_ids = lead_ids
+        self.lead_filters = lead_filters
+        self.checks = 0
+
+    async def check_duplicate_leads(self, user_id, emails):
+        self.checks += 1
+        return [email for email in emails if email in self.emails]
+
+    async def check_duplicate_ids(self, user_id, lead_ids):
+        self.checks += 1
+        return [lead_id for lead_id in lead_ids if lead_id in self.lead_ids]
+
+@pytest.mark.asyncio
+async def test_search_picks_new_leads_before_known_ones(monkeypatch):
+    service = AIService()
+    raw_leads = [{"id": f"p{i}", "email": f"p{i}@example.com", "firstName": "Alex"} for i in range(6)]
+
+    async def convert_to_apollo_url(request, stage_metrics):
+        return "https://app.apollo.io/#/people?page=1&personTitles[]=cto"
+
+    async def run_apify_crawler(apollo_url, total_records, user_id):
+        return raw_leads, {}
+
+    known = KnownLeads({"p0@example.com"}, {apify_lead_id("user-d", "p1")})
+    monkeypatch.setattr(ai_service_module, "get_supabase_service", lambda: known)
+    monkeypatch.setattr(service, "_convert_to_apollo_url", convert_to_apollo_url)
+    monkeypatch.setattr(service, "_run_apify_crawler", run_apify_crawler)
+
+    leads, metrics = await service.process_lead_search(LeadSearchRequest(main_query="CTOs", max_results=3), "user-d", "r1")
+
+    assert [lead.email for lead in leads] == ["p2@example.com", "p3@example.com", "p4@example.com"]
+    assert metrics["crawl_known_records"] == 2
+    assert metrics["surplus_buffered"] == 1
+    assert crawl_planner.loss_rate("user-d") == pytest.approx(2 / 6)
+
+class LivePages:
+    """Dataset reader double serving a finished crawl two records per page"""
+
+    def __init__(self, records):
+        self.records = records
+
+    async def iter_live_pages(self, dataset_id, finished, limit, page_size):
+        for start in range(0, len(self.records), 2):
+            yield self.records[start:start + 2]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("lead_filters, emails, checks, loss_rate", [
+    (None, ["p0@example.com", "p1@example.com", "p2@example.com"], 0, None),
+    (object(), ["p2@example.com", "p3@example.com", "p4@example.com"], 6, 2 / 6),
+])
+async def test_stream_prechecks_pages_only_with_a_lead_filter(monkeypatch, lead_filters, emails, checks, loss_rate):
+    service = AIService()
+    raw_leads = [{"id": f"p{i}", "email": f"p{i}@example.com", "firstName": "Alex"} for i in range(6)]
+    user_id = f"user-stream-{checks}"
+
+    async def convert_to_apollo_url(request, stage_metrics):
+        return "https://app.apollo.io/#/people?page=1&personTitles[]=cto"
+
+    async def start_apify_run(apollo_url, planned_records, user_id):
+        return type("Handle", (), {"dataset_id": "d1", "finished": None, "ticket": None})(), False
+
+    known = KnownLeads({"p0@example.com"}, {apify_lead_id(user_id, "p1")}, lead_filters)
+    monkeypatch.setattr(ai_service_module, "get_supabase_service", lambda: known)
+    monkeypatch.setattr(service, "_convert_to_apollo_url", convert_to_apollo_url)
+    monkeypatch.setattr(service, "_start_apify_run", start_apify_run)
+    service.dataset_reader = LivePages(raw_leads)
+
+    frames = [frame async for frame in service.stream_lead_search(LeadSearchRequest(main_query="CTOs", max_results=3), user_id, "r1")]
+
+    leads = [lead for frame_type, batch in frames if frame_type == "leads" for lead in batch]
+    metrics = frames[-1][1]
+    assert [lead.email for lead in leads] == emails
+    assert known.checks == checks
+    assert metrics["crawl_prechecked"] is (lead_filters is not None)
+    if loss_rate is None:
+        assert crawl_planner.loss_rate(user_id) == crawl_planner.default_loss_rate
+    else:
+        assert crawl_planner.loss_rate(user_id) == pytest.approx(loss_rate)
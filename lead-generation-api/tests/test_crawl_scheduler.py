@@ -0,0 +1,72 @@
+"""
+Tests for bounded, per-user fair crawl scheduling
+"""
+
+import asyncio
+
+import pytest
+
+from leadgen_app.services.crawl_scheduler import CrawlScheduler
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+@pytest.mark.asyncio
+async def test_global_and_per_user_caps():
+    scheduler = CrawlScheduler(max_concurrent=3, max_per_user=2)
+
+    heavy = [await scheduler.acquire("heavy") for _ in range(2)]
+    third = asyncio.create_task(scheduler.acquire("heavy"))
+    await _settle()
+
+    # The heavy user is at their cap even though a global slot is free
+    assert not third.done()
+    assert scheduler.stats("heavy") == {
+        "running": 2, "queued": 1, "max_concurrent": 3, "max_per_user": 2,
+        "user_running": 2, "user_queued": 1
+    }
+
+    light = await scheduler.acquire("light")
+    assert light.queue_depth == 1
+
+    scheduler.release(heavy[0])
+    ticket = await asyncio.wait_for(third, timeout=1)
+    assert ticket.wait_time > 0
+    assert scheduler.stats()["running"] == 3
+
+@pytest.mark.asyncio
+async def test_fair_ordering_across_users():
+    scheduler = CrawlScheduler(max_concurrent=1, max_per_user=1)
+    blocker = await scheduler.acquire("other")
+
+    order = []
+
+    async def crawl(user_id):
+        async with scheduler.slot(user_id, cost=100):
+            order.append(user_id)
+
+    # A heavy user queues a backlog before an interactive user arrives
+    tasks = [asyncio.create_task(crawl("heavy")) for _ in range(3)]
+    await _settle()
+    tasks.append(asyncio.create_task(crawl("interactive")))
+    await _settle()
+
+    scheduler.release(blocker)
+    await asyncio.gather(*tasks)
+
+    assert order.index("interactive") <= 1
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_queue():
+    scheduler = CrawlScheduler(max_concurrent=1, max_per_user=1)
+    ticket = await scheduler.acquire("a")
+
+    waiter = asyncio.create_task(scheduler.acquire("b"))
+    await _settle()
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    scheduler.release(ticket)
+    assert scheduler.stats() == {"running": 0, "queued": 0, "max_concurrent": 1, "max_per_user": 1}
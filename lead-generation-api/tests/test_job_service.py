@@ -0,0 +1,35 @@
+"""
+Tests for background search jobs
+"""
+
+import asyncio
+
+import pytest
+
+from leadgen_app.models.response_models import JobStatus
+from leadgen_app.services.job_service import SearchJobManager
+
+@pytest.mark.asyncio
+async def test_running_jobs_survive_a_burst_of_finished_ones():
+    manager = SearchJobManager(retention=60, max_jobs=2)
+    release = asyncio.Event()
+
+    async def slow(job):
+        await release.wait()
+        return {"success": True}
+
+    async def fast(job):
+        return {"success": True}
+
+    running = manager.submit("u1", slow)
+    finished = [manager.submit("u1", fast) for _ in range(5)]
+    await asyncio.sleep(0.01)
+
+    assert manager.get("u1", running.id) is running
+    assert sum(manager.get("u1", job.id) is not None for job in finished) == 2
+
+    release.set()
+    await asyncio.sleep(0.01)
+    job = manager.get("u1", running.id)
+    assert job is running and job.status == JobStatus.SUCCEEDED
+    assert manager.get("u2", running.id) is None
@@ -0,0 +1,94 @@
+"""
+Tests for the single-pass Apify-to-LeadData converter
+"""
+
+import hashlib
+
+import pytest
+
+from leadgen_app.models.lead_models import (
+    ApifyLeadData,
+    convert_apify_batch,
+    convert_apify_to_lead_data,
+    convert_apify_to_processed
+)
+from leadgen_app.models.request_models import LeadSearchRequest
+from leadgen_app.services.ai_service import AIService
+
+SOURCE = {"mainQuery": "fintech CTOs", "filters": {"location": "Taipei"}}
+
+RAW_LEADS = [
+    {
+        "id": "p1", "firstName": "Alice", "lastName": "Chen", "email": "alice@beautyco.com",
+        "linkedin_url": "linkedin.com/in/alicechen", "title": "CTO",
+        "organization": {"name": "Beauty Co", "estimated_num_employees": 120, "phone": "+886"},
+        "organizationNumEmployees": "120", "city": "Taipei", "country": "Taiwan",
+        "industry": "cosmetics", "organizationIndustry": "cosmetics",
+        "keywords": "skincare, beauty ,", "organizationKeywords": ["beauty", "retail"]
+    },
+    {"id": "p2", "lastName": "Lin", "organization": "Acme", "keywords": ["a", "b", "a"]},
+    {"id": "p3", "name": "", "firstName": "Bo", "organization": {"organization_name": "Org"}},
+]
+
+INVALID_LEADS = [
+    {"id": 5},
+    {"id": "p4", "organizationNumEmployees": "many"},
+    {"id": "p5", "organizationKeywords": "a,b"},
+    {"id": "p6", "organization": {"name": "Org", "phone": {"work": "+1"}}},
+]
+
+def _legacy_fields(raw):
+    processed = convert_apify_to_processed(ApifyLeadData(**raw), SOURCE)
+    return {
+        "first_name": processed.first_name,
+        "last_name": processed.last_name,
+        "name": processed.name,
+        "email": processed.email,
+        "phone": processed.phone,
+        "linkedin_url": processed.linkedin_url,
+        "job_title": processed.job_title,
+        "company_name": processed.company_name,
+        "company_size": processed.company_size,
+        "industry": processed.industry,
+        "location": processed.location,
+        "keywords": sorted(processed.keywords),
+    }
+
+@pytest.mark.parametrize("raw", RAW_LEADS)
+def test_matches_legacy_conversion(raw):
+    lead = convert_apify_to_lead_data(raw, "user-1", SOURCE)
+    fields = {key: getattr(lead, key) for key in _legacy_fields(raw)}
+    fields["keywords"] = sorted(fields["keywords"])
+
+    assert fields == _legacy_fields(raw)
+    assert lead.id == hashlib.md5(f"user-1_{raw['id']}".encode()).hexdigest()
+    assert lead.confidence_score == 0.8
+    assert lead.source_query_criteria == SOURCE
+
+def test_keywords_keep_first_seen_order():
+    lead = convert_apify_to_lead_data(RAW_LEADS[0], "user-1", SOURCE)
+    assert lead.keywords == ["skincare", "beauty", "retail"]
+    assert lead.confidence_level.value == "high"
+
+def test_batch_skips_records_the_legacy_models_reject():
+    for raw in INVALID_LEADS:
+        with pytest.raises(Exception):
+            convert_apify_to_processed(ApifyLeadData(**raw), SOURCE)
+
+    leads, errors = convert_apify_batch(RAW_LEADS + INVALID_LEADS, "user-1", SOURCE)
+    assert [lead.last_name for lead in leads] == ["Chen", "Lin", None]
+    assert len(errors) == len(INVALID_LEADS)
+
+@pytest.mark.asyncio
+async def test_batches_convert_in_order_with_user_specific_ids():
+    service = AIService()
+    raw_leads = [dict(RAW_LEADS[0], id=f"p{i}") for i in range(25)]
+    request = LeadSearchRequest(main_query="fintech CTOs in Taipei")
+    try:
+        leads = await service._process_apify_leads(raw_leads, request, "user-1")
+    finally:
+        await service.close()
+
+    assert [lead.id for lead in leads] == [
+        hashlib.md5(f"user-1_p{i}".encode()).hexdigest() for i in range(25)
+    ]
@@ -0,0 +1,210 @@
+"""
+Tests for the per-user lead membership filters in front of duplicate checks
+"""
+
+import asyncio
+import os
+import time
+
+import pytest
+import pytest_asyncio
+
+from leadgen_app.config import settings
+from leadgen_app.services.lead_filter import LeadFilters, email_key, id_key
+from leadgen_app.services.supabase_service import SupabaseService
+from leadgen_app.utils.bloom import BloomFilter
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter.for_capacity(10_000, error_rate=0.01)
+    for i in range(10_000):
+        bloom.add(f"id:lead-{i}")
+
+    assert all(f"id:lead-{i}" in bloom for i in range(10_000))
+    false_positives = sum(f"id:other-{i}" in bloom for i in range(10_000))
+    assert false_positives < 200
+
+def test_bloom_filter_round_trips_and_merges():
+    first = BloomFilter.for_capacity(100)
+    first.add("a")
+    second = BloomFilter.from_bytes(first.to_bytes())
+    second.add("b")
+
+    first.merge(second)
+
+    assert "a" in first and "b" in first
+    with pytest.raises(ValueError):
+        first.merge(BloomFilter.for_capacity(10_000))
+    with pytest.raises(ValueError):
+        BloomFilter.from_bytes(first.to_bytes()[:-1])
+
+class KeyStore:
+    """Stand-in for the leads table, counting full key loads"""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.loads = 0
+        self.during_load = None
+
+    async def load(self, user_id):
+        self.loads += 1
+        rows = list(self.rows)
+        if self.during_load:
+            self.during_load()
+        await asyncio.sleep(0)
+        return rows
+
+def _filters(store, tmp_path, **options):
+    return LeadFilters(store.load, snapshot_dir=str(tmp_path), **options)
+
+@pytest.mark.asyncio
+async def test_filter_loads_lazily_once_and_rules_out_unknown_keys(tmp_path):
+    store = KeyStore([("lead-1", "Alex@Example.com"), ("lead-2", None)])
+    filters = _filters(store, tmp_path)
+
+    assert await filters.candidates("u1", ["lead-1", "lead-3"]) == ["lead-1"]
+    assert await filters.candidates("u1", [" alex@example.COM", "new@example.com"], email_key) == [" alex@example.COM"]
+    assert store.loads == 1
+
+@pytest.mark.asyncio
+async def test_saves_update_the_filter_and_are_shared_through_the_snapshot(tmp_path):
+    store = KeyStore([("lead-1", None)])
+    worker_a = _filters(store, tmp_path)
+    worker_b = _filters(store, tmp_path)
+    await worker_a.candidates("u1", ["lead-1"])
+    await worker_b.candidates("u1", ["lead-1"])
+
+    worker_a.add("u1", [{"id": "lead-2", "email": "b@example.com"}])
+
+    assert await worker_b.candidates("u1", ["lead-2"]) == ["lead-2"]
+    assert await worker_b.candidates("u1", ["b@example.com"], email_key) == ["b@example.com"]
+    assert store.loads == 1
+
+@pytest.mark.asyncio
+async def test_rebuild_discards_itself_when_a_save_lands_mid_build(tmp_path):
+    store = KeyStore([("lead-1", None)])
+    builder = _filters(store, tmp_path)
+    saver = _filters(store, tmp_path)
+    # Another worker saves lead-2 after the database read, before the snapshot is written
+    store.during_load = lambda: saver.add("u1", [{"id": "lead-2"}])
+
+    assert await builder.candidates("u1", ["lead-2", "lead-9"]) == ["lead-2", "lead-9"]
+
+    store.rows.append(("lead-2", None))
+    store.during_load = None
+    past = time.time() - 5
+    os.utime(tmp_path / "u1.pending", (past, past))
+    assert await builder.candidates("u1", ["lead-2", "lead-9"]) == ["lead-2"]
+
+@pytest.mark.asyncio
+async def test_rebuild_merges_keys_added_to_a_newer_snapshot(tmp_path):
+    store = KeyStore([("lead-1", None)])
+    builder = _filters(store, tmp_path)
+    saver = _filters(store, tmp_path)
+    await saver.candidates("u1", ["lead-1"])
+    store.during_load = lambda: saver.add("u1", [{"id": "lead-2"}])
+
+    bloom = await builder._rebuild("u1")
+
+    assert id_key("lead-1") in bloom and id_key("lead-2") in bloom
+    assert await saver.candidates("u1", ["lead-2"]) == ["lead-2"]
+
+@pytest.mark.asyncio
+async def test_deletes_force_a_rebuild_once_they_pile_up(tmp_path):
+    store = KeyStore([(f"lead-{i}", None) for i in range(8)])
+    filters = _filters(store, tmp_path, rebuild_deleted_share=0.25)
+    await filters.candidates("u1", ["lead-0"])
+
+    filters.remove("u1", 1)
+    await filters.candidates("u1", ["lead-0"])
+    assert store.loads == 1
+
+    store.rows = store.rows[:4]
+    filters.remove("u1", 3)
+    assert await filters.candidates("u1", ["lead-5"]) == []
+    assert store.loads == 2
+
+@pytest.mark.asyncio
+async def test_unavailable_filter_falls_back_to_every_value(tmp_path):
+    async def failing_load(user_id):
+        raise ConnectionError("connection refused")
+
+    filters = LeadFilters(failing_load, snapshot_dir=str(tmp_path))
+
+    assert await filters.candidates("u1", ["lead-1", "lead-2"]) == ["lead-1", "lead-2"]
+
+class PagedLeads:
+    """PostgREST client double serving leads keyset pages and recording dedupe queries"""
+
+    def __init__(self, rows, page_size):
+        self.rows = sorted(rows)
+        self.page_size = page_size
+        self.queries = []
+
+    def table(self, name):
+        return Query(self)
+
+class Query:
+    def __init__(self, client):
+        self.client = client
+        self.filters = {}
+
+    def select(self, columns):
+        self.columns = columns
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = value
+        return self
+
+    def in_(self, column, values):
+        self.filters[column] = list(values)
+        return self
+
+    def gt(self, column, value):
+        self.after = value
+        return self
+
+    def order(self, column):
+        return self
+
+    def limit(self, count):
+        return self
+
+    async def execute(self):
+        if self.columns == "id, email":
+            after = getattr(self, "after", None)
+            page = [row for row in self.client.rows if after is None or row[0] > after][:self.client.page_size]
+            data = [{"id": lead_id, "email": email} for lead_id, email in page]
+        else:
+            self.client.queries.append(self.filters)
+            data = []
+        return type("Response", (), {"data": data})()
+
+@pytest_asyncio.fixture
+async def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "LEAD_FILTER_SNAPSHOT_DIR", str(tmp_path))
+    service = SupabaseService()
+    # Server max-rows (3) below the requested page size
+    service.client = PagedLeads([(f"lead-{i:02}", f"lead{i}@example.com") for i in range(10)], page_size=3)
+    yield service
+    await service.close()
+
+@pytest.mark.asyncio
+async def test_duplicate_checks_only_query_possible_matches(service):
+    assert await service.check_duplicate_leads("u1", ["fresh@example.com"]) == []
+    assert await service.check_duplicate_ids("u1", ["fresh-1", "fresh-2"]) == []
+    assert await service.check_archived_leads("u1", ["fresh-1"]) == []
+    assert service.client.queries == []
+
+    await service.check_duplicate_ids("u1", ["lead-09", "fresh-1"])
+    assert service.client.queries == [{"user_id": "u1", "tab": ["new", "saved"], "id": ["lead-09"]}]
+
+@pytest.mark.asyncio
+async def test_saved_leads_are_checked_against_the_database(service):
+    await service.check_duplicate_ids("u1", ["lead-00"])
+    service.client.queries.clear()
+
+    service._remember_leads("u1", [{"id": "fresh-1", "email": "Fresh@example.com"}])
+    await service.check_duplicate_leads("u1", ["fresh@example.com"])
+
+    assert service.client.queries == [{"user_id": "u1", "email": ["fresh@example.com"]}]
@@ -0,0 +1,221 @@
+"""
+Tests for saving a search's leads in one round trip with a step-by-step fallback
+"""
+
+import pytest
+from postgrest.exceptions import APIError
+
+from leadgen_app.models.response_models import LeadData
+from leadgen_app.routers import leads
+from leadgen_app.services.supabase_service import SupabaseService
+
+class InMemorySupabase:
+    """Step-by-step Supabase calls over a list of rows; no save_search_leads function"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    async def save_search_leads(self, leads_data, user_id, source_query_criteria):
+        self.calls.append("save_search_leads")
+        return None
+
+    def _owned(self, user_id):
+        return [row for row in self.rows if row["user_id"] == user_id]
+
+    async def check_duplicate_leads(self, user_id, emails):
+        self.calls.append("check_duplicate_leads")
+        return [row["email"] for row in self._owned(user_id) if row["email"] in emails]
+
+    async def check_duplicate_ids(self, user_id, lead_ids):
+        self.calls.append("check_duplicate_ids")
+        return [row["id"] for row in self._owned(user_id) if row["tab"] in ("new", "saved") and row["id"] in lead_ids]
+
+    async def check_archived_leads(self, user_id, lead_ids):
+        self.calls.append("check_archived_leads")
+        return [row["id"] for row in self._owned(user_id) if row["tab"] == "archived" and row["id"] in lead_ids]
+
+    async def restore_archived_leads(self, user_id, lead_ids):
+        self.calls.append("restore_archived_leads")
+        for row in self._owned(user_id):
+            if row["tab"] == "archived" and row["id"] in lead_ids:
+                row["tab"] = "new"
+        return True
+
+    async def save_leads_batch(self, leads_data, user_id, source_query_criteria):
+        self.calls.append("save_leads_batch")
+        self.rows.extend({"id": lead.id, "user_id": user_id, "email": lead.email, "tab": "new"} for lead in leads_data)
+        return {"success": True, "inserted_count": len(leads_data)}
+
+def _existing_rows():
+    return [
+        {"id": "a", "user_id": "u1", "email": "taken@example.com", "tab": "archived"},
+        {"id": "b", "user_id": "u1", "email": "b@example.com", "tab": "saved"},
+        {"id": "c", "user_id": "u1", "email": "c@example.com", "tab": "archived"},
+        {"id": "d", "user_id": "u2", "email": "d@example.com", "tab": "new"},
+    ]
+
+def _search_results():
+    return [
+        LeadData(id="x", email="taken@example.com"),  # email already stored (any tab)
+        LeadData(id="b", email="other-b@example.com"),  # id in an active tab
+        LeadData(id="c", email="other-c@example.com"),  # archived: restored, not inserted
+        LeadData(id="d", email="d@example.com"),  # another user's lead
+        LeadData(id="e", email=None),
+        LeadData(id="e", email="e-again@example.com"),  # same id twice in the batch
+    ]
+
+@pytest.mark.asyncio
+async def test_stepwise_fallback_dedupes_restores_and_inserts(monkeypatch):
+    service = InMemorySupabase(_existing_rows())
+    monkeypatch.setattr(leads, "get_supabase_service", lambda: service)
+
+    summary = await leads.save_leads_background(_search_results(), "u1", {}, "r1")
+
+    assert summary == {"saved": 2, "restored": 1, "email_duplicates": 1, "id_duplicates": 1}
+    assert service.calls[0] == "save_search_leads" and service.calls[-1] == "save_leads_batch"
+    assert {row["id"]: row["tab"] for row in service.rows if row["user_id"] == "u1"} == {
+        "a": "archived", "b": "saved", "c": "new", "d": "new", "e": "new"
+    }
+
+@pytest.mark.asyncio
+async def test_one_round_trip_save_skips_the_stepwise_queries(monkeypatch):
+    class RpcSupabase(InMemorySupabase):
+        async def save_search_leads(self, leads_data, user_id, source_query_criteria):
+            self.calls.append("save_search_leads")
+            return {"saved": 2, "restored": 1, "email_duplicates": 1, "id_duplicates": 1}
+
+    service = RpcSupabase(_existing_rows())
+    monkeypatch.setattr(leads, "get_supabase_service", lambda: service)
+
+    summary = await leads.save_leads_background(_search_results(), "u1", {}, "r1")
+
+    assert summary == {"saved": 2, "restored": 1, "email_duplicates": 1, "id_duplicates": 1}
+    assert service.calls == ["save_search_leads"]
+
+class FakeRpc:
+    def __init__(self, outcome):
+        self.outcome = outcome
+        self.calls = []
+
+    def rpc(self, name, params):
+        self.calls.append((name, params))
+        return self
+
+    async def execute(self):
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return type("Response", (), {"data": self.outcome})()
+
+@pytest.mark.asyncio
+async def test_save_search_leads_sends_lead_records():
+    service = SupabaseService()
+    service.client = FakeRpc({"saved": 1, "restored": 0, "email_duplicates": 0, "id_duplicates": 0})
+    try:
+        counts = await service.save_search_leads([LeadData(id="a", email="a@example.com")], "u1", {"mainQuery": "CTOs"})
+    finally:
+        await service.close()
+
+    assert counts == {"saved": 1, "restored": 0, "email_duplicates": 0, "id_duplicates": 0}
+    (name, params), = service.client.calls
+    assert name == "save_search_leads" and params["p_user_id"] == "u1"
+    record, = params["p_leads"]
+    assert record["id"] == "a" and record["tab"] == "new" and record["user_id"] == "u1"
+    assert record["source_query_criteria"]["mainQuery"] == "CTOs"
+
+@pytest.mark.asyncio
+async def test_missing_function_falls_back_for_good():
+    service = SupabaseService()
+    service.client = FakeRpc(APIError({"code": "PGRST202", "message": "Could not find the function"}))
+    try:
+        assert await service.save_search_leads([LeadData(id="a")], "u1", {}) is None
+        assert await service.save_search_leads([LeadData(id="a")], "u1", {}) is None
+    finally:
+        await service.close()
+
+    assert len(service.client.calls) == 1
+
+@pytest.mark.asyncio
+async def test_other_function_errors_fall_back_once():
+    service = SupabaseService()
+    service.client = FakeRpc(APIError({"code": "57014", "message": "canceling statement due to statement timeout"}))
+    try:
+        assert await service.save_search_leads([LeadData(id="a")], "u1", {}) is None
+        assert await service.save_search_leads([LeadData(id="a")], "u1", {}) is None
+    finally:
+        await service.close()
+
+    assert len(service.client.calls) == 2
+
+class FlakyTable:
+    """PostgREST table double whose upserts fail while a batch contains a bad row"""
+
+    def __init__(self, bad_rows):
+        self.bad_rows = bad_rows
+        self.requests = []
+
+    def table(self, name):
+        return self
+
+    def upsert(self, records, **options):
+        self.records = records
+        return self
+
+    async def execute(self):
+        self.requests.append(len(self.records))
+        for record in self.records:
+            if record["id"] in self.bad_rows:
+                raise self.bad_rows[record["id"]]
+        return type("Response", (), {"data": list(self.records)})()
+
+@pytest.mark.asyncio
+async def test_failed_upsert_bisects_to_the_rejected_rows():
+    service = SupabaseService()
+    service.client = FlakyTable({
+        "lead-17": APIError({"code": "23505", "message": "duplicate key value violates unique constraint \"leads_user_email_key\""}),
+        "lead-40": APIError({"code": "22001", "message": "value too long for type character varying(255)"}),
+    })
+    try:
+        result = await service.save_leads_batch([LeadData(id=f"lead-{i}") for i in range(64)], "u1", {})
+    finally:
+        await service.close()
+
+    assert result["success"]
+    assert [(r["id"], r["duplicate"]) for r in result["rejected"]] == [("lead-17", True), ("lead-40", False)]
+    assert result["rejected"][1]["reason"] == "value too long for type character varying(255)"
+    # The whole batch, then two halves per level down to each bad row
+    assert len(service.client.requests) <= 1 + 2 * 2 * 6
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("error", [
+    APIError({"code": "57014", "message": "canceling statement due to statement timeout"}),
+    APIError({"message": "upsert failed: connection reset by peer"}),
+])
+async def test_connection_errors_are_not_bisected(error):
+    service = SupabaseService()
+    service.client = FlakyTable({"lead-3": error})
+    try:
+        result = await service.save_leads_batch([LeadData(id=f"lead-{i}") for i in range(8)], "u1", {})
+    finally:
+        await service.close()
+
+    assert not result["success"]
+    assert service.client.requests == [8]
+
+@pytest.mark.asyncio
+async def test_failure_partway_through_bisecting_reports_the_rows_written():
+    service = SupabaseService()
+    service.client = FlakyTable({
+        "lead-1": APIError({"code": "22001", "message": "value too long for type character varying(255)"}),
+        "lead-6": APIError({"code": "57014", "message": "canceling statement due to statement timeout"}),
+    })
+    try:
+        result = await service.save_leads_batch([LeadData(id=f"lead-{i}") for i in range(8)], "u1", {})
+    finally:
+        await service.close()
+
+    assert not result["success"]
+    assert "statement timeout" in result["error"]
+    assert result["inserted_count"] == 3
+    assert result["lead_ids"] == ["lead-0", "lead-2", "lead-3"]
+    assert [r["id"] for r in result["rejected"]] == ["lead-1"]
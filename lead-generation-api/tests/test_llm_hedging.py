@@ -0,0 +1,274 @@
+"""
+Tests for hedged LLM calls and latency histograms
+"""
+
+import asyncio
+
+import pytest
+
+from leadgen_app.models.request_models import LeadFilters, LeadSearchRequest
+from leadgen_app.services.ai_service import AIService
+from leadgen_app.services.llm_client import HedgedLLMRouter, LLMClient
+from leadgen_app.utils.metrics import LatencyHistogram
+
+class FakeProvider(LLMClient):
+    provider = "fake"
+
+    def __init__(self, model, delay, response):
+        super().__init__(model, max_concurrency=4, timeout=5)
+        self.delay = delay
+        self.response = response
+        self.cancelled = False
+
+    async def _complete(self, prompt, max_tokens, system, usage):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if usage is not None:
+            usage["llm_prompt_tokens"] = 10
+        return self.response
+
+    async def _stream(self, prompt, max_tokens, system, usage):
+        yield await self._complete(prompt, max_tokens, system, usage)
+
+def _parse(response):
+    if not response.startswith("https://app.apollo.io"):
+        raise ValueError(f"invalid URL: {response}")
+    return response
+
+def _router(primary, secondary, delay=0.05):
+    return HedgedLLMRouter(
+        [primary, secondary],
+        hedge_enabled=True,
+        hedge_percentile=0.95,
+        default_delay=delay,
+        min_delay=0.01,
+        min_samples=20
+    )
+
+@pytest.mark.asyncio
+async def test_stalled_primary_is_hedged_and_cancelled():
+    primary = FakeProvider("slow", 2.0, "https://app.apollo.io/#/people?a")
+    secondary = FakeProvider("fast", 0.01, "https://app.apollo.io/#/people?b")
+    router = _router(primary, secondary)
+    usage = {}
+
+    result = await router.complete("prompt", _parse, usage=usage)
+    await asyncio.sleep(0)
+
+    assert result.endswith("?b")
+    assert primary.cancelled
+    assert usage == {"llm_prompt_tokens": 10, "llm_provider": "fake:fast", "llm_hedged": True, "llm_calls": 2}
+    assert (router.hedges_sent, router.hedges_won) == (1, 1)
+    assert primary.latency.count == 1 and primary.latency.sum >= 0.05
+    assert secondary.latency.count == 1
+
+@pytest.mark.asyncio
+async def test_cancelled_primaries_keep_the_hedge_delay_from_shrinking():
+    primary = FakeProvider("flaky", 0.0, "https://app.apollo.io/#/people?a")
+    secondary = FakeProvider("fast", 0.01, "https://app.apollo.io/#/people?b")
+    router = _router(primary, secondary)
+
+    # Every other call stalls and loses to the hedge
+    for i in range(24):
+        primary.delay = 2.0 if i % 2 else 0.001
+        await router.complete("prompt", _parse)
+
+    assert router.hedges_sent == 12
+    assert primary.latency.samples == 24
+    assert router.hedge_delay() >= 0.05
+
+@pytest.mark.asyncio
+async def test_call_cancelled_while_queued_never_starts():
+    provider = FakeProvider("busy", 0.0, "https://app.apollo.io/#/people?a")
+    started = []
+    provider._complete = lambda *args: started.append(args)
+
+    for _ in range(4):
+        await provider._semaphore.acquire()
+    queued = asyncio.create_task(provider.complete("prompt"))
+    await asyncio.sleep(0)
+    queued.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await queued
+    for _ in range(4):
+        provider._semaphore.release()
+
+    assert started == []
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged():
+    primary = FakeProvider("fast", 0.0, "https://app.apollo.io/#/people?a")
+    secondary = FakeProvider("other", 0.0, "https://app.apollo.io/#/people?b")
+    usage = {}
+
+    result = await _router(primary, secondary).complete("prompt", _parse, usage=usage)
+
+    assert result.endswith("?a")
+    assert usage["llm_calls"] == 1 and usage["llm_hedged"] is False
+    assert secondary.latency.count == 0
+
+@pytest.mark.asyncio
+async def test_invalid_response_fails_over_immediately():
+    primary = FakeProvider("broken", 0.0, "not a url")
+    secondary = FakeProvider("good", 0.0, "https://app.apollo.io/#/people?b")
+    router = _router(primary, secondary, delay=10)
+    usage = {}
+
+    result = await asyncio.wait_for(router.complete("prompt", _parse, usage=usage), timeout=1)
+
+    assert result.endswith("?b")
+    assert usage["llm_hedged"] is False and usage["llm_calls"] == 2
+
+@pytest.mark.asyncio
+async def test_all_providers_failing_raises_last_error():
+    router = _router(FakeProvider("a", 0.0, "bad a"), FakeProvider("b", 0.0, "bad b"))
+
+    with pytest.raises(ValueError, match="bad b"):
+        await router.complete("prompt", _parse)
+
+def test_hedge_delay_follows_primary_percentile():
+    primary = FakeProvider("p", 0, "")
+    router = _router(primary, FakeProvider("s", 0, ""), delay=8.0)
+    assert router.hedge_delay() == 8.0
+
+    for i in range(100):
+        primary.latency.observe(0.1 * (i + 1))
+    assert router.hedge_delay() == pytest.approx(9.6)
+
+def test_providers_must_implement_both_calls():
+    class CompleteOnly(LLMClient):
+        async def _complete(self, prompt, max_tokens, system, usage):
+            return ""
+
+    with pytest.raises(TypeError):
+        CompleteOnly("model")
+
+def test_latency_histogram_snapshot():
+    histogram = LatencyHistogram(buckets=(1.0, 5.0))
+    for seconds in (0.5, 2.0, 7.0):
+        histogram.observe(seconds)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"1.0": 1, "5.0": 2, "+Inf": 3}
+    assert snapshot["count"] == 3 and snapshot["sum"] == 9.5
+    assert snapshot["p50"] == 2.0
+
+class ScriptedProvider(LLMClient):
+    provider = "scripted"
+
+    def __init__(self, responses):
+        super().__init__("model", max_concurrency=4, timeout=5)
+        self.responses = list(responses)
+        self.prompts = []
+
+    async def _complete(self, prompt, max_tokens, system, usage):
+        self.prompts.append(prompt)
+        return self.responses.pop(0)
+
+    async def _stream(self, prompt, max_tokens, system, usage):
+        self.prompts.append(prompt)
+        response = self.responses.pop(0)
+        self.streamed = ""
+        self.stream_closed = False
+        try:
+            for offset in range(0, len(response), 8):
+                self.streamed += response[offset:offset + 8]
+                yield response[offset:offset + 8]
+        finally:
+            self.stream_closed = True
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("responses, calls, reprompted", [
+    (['searchUrl: "https://app.apollo.io/#/people?personTitles[]=cto"'], 1, False),
+    (["Sorry, no URL.", '{"searchUrl": "https://app.apollo.io/#/people?page=1&personTitles[]=cto"}'], 2, True),
+])
+async def test_url_generation_repairs_before_reprompting(responses, calls, reprompted):
+    provider = ScriptedProvider(responses)
+    service = AIService()
+    service.llm = HedgedLLMRouter([provider], hedge_enabled=False)
+    metrics = {}
+
+    url = await service._generate_apollo_url(LeadSearchRequest(main_query="CTOs"), "key", metrics)
+
+    assert url == "https://app.apollo.io/#/people?page=1&contactEmailStatusV2[]=verified&personTitles[]=cto"
+    assert metrics["ai_queries_used"] == calls
+    assert metrics.get("url_reprompted", False) is reprompted
+    assert len(provider.prompts) == calls
+    if reprompted:
+        assert "could not be used" in provider.prompts[-1]
+
+@pytest.mark.asyncio
+async def test_stream_closes_once_search_url_is_complete():
+    url = "https://app.apollo.io/#/people?page=1&contactEmailStatusV2[]=verified&personTitles[]=cto"
+    response = '{"searchUrl": "%s", "explanation": "%s"}' % (url, "x" * 2000)
+    provider = ScriptedProvider([response])
+    service = AIService()
+    service.llm = HedgedLLMRouter([provider], hedge_enabled=False)
+    metrics = {}
+
+    result = await service._generate_apollo_url(LeadSearchRequest(main_query="CTOs"), "key", metrics)
+
+    assert result == url
+    assert provider.stream_closed
+    assert len(provider.streamed) < len(url) + 40
+    assert metrics["llm_stream_closed_early"] is True
+    assert metrics["url_repairs"] == []
+    assert "time_to_url" in metrics and "llm_time_to_result" in metrics
+
+@pytest.mark.asyncio
+async def test_stream_without_complete_url_uses_full_completion():
+    provider = ScriptedProvider(['searchUrl: https://app.apollo.io/#/people?personTitles[]=cto'])
+    service = AIService()
+    service.llm = HedgedLLMRouter([provider], hedge_enabled=False)
+    metrics = {}
+
+    result = await service._generate_apollo_url(LeadSearchRequest(main_query="CTOs"), "key", metrics)
+
+    assert result.endswith("personTitles[]=cto")
+    assert metrics["llm_stream_closed_early"] is False
+
+@pytest.mark.asyncio
+async def test_free_text_next_to_mapped_filters_compiles_without_llm():
+    provider = ScriptedProvider([])
+    service = AIService()
+    service.llm = HedgedLLMRouter([provider], hedge_enabled=False)
+    request = LeadSearchRequest(
+        main_query="CTOs at fintech startups in Berlin",
+        filters=LeadFilters(job_title="CTO", industry="Financial Services")
+    )
+    metrics = {}
+
+    url = await service._generate_apollo_url(request, "key", metrics)
+
+    assert provider.prompts == []
+    assert metrics["url_source"] == "compiler"
+    assert "personTitles[]=CTO" in url
+    assert "personLocations" not in url
+
+@pytest.mark.asyncio
+async def test_llm_fallback_stays_in_advanced_mode_and_keeps_compiled_filters():
+    llm_url = (
+        "https://app.apollo.io/#/people?page=1&personTitles[]=founder&personLocations[]=Berlin"
+        "&qAndedOrganizationKeywordTags[]=space%20mining"
+    )
+    provider = ScriptedProvider(['{"searchUrl": "%s"}' % llm_url])
+    service = AIService()
+    service.llm = HedgedLLMRouter([provider], hedge_enabled=False)
+    request = LeadSearchRequest(
+        main_query="CTOs at space startups",
+        filters=LeadFilters(job_title="CTO", industry="space mining")
+    )
+    metrics = {}
+
+    url = await service._generate_apollo_url(request, "key", metrics)
+
+    assert metrics["prompt_mode"] == "advanced"
+    assert "Additional context from regular input" in provider.prompts[0]
+    assert "- Industry: space mining" in provider.prompts[0]
+    assert "- Job Title: Not specified" in provider.prompts[0]
+    assert "personTitles[]=CTO" in url
+    assert "founder" not in url
+    assert metrics["url_source"] == "compiler+llm"
@@ -0,0 +1,107 @@
+"""
+Tests for the Prometheus-style metrics registry and /metrics endpoint
+"""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from leadgen_app.config import settings
+from leadgen_app.main import app
+from leadgen_app.services.supabase_service import SupabaseService
+from leadgen_app.utils.metrics import (
+    DEPENDENCY_ERRORS,
+    POOL_LIMIT,
+    POOL_TASKS,
+    STAGE_DURATION,
+    MetricsRegistry,
+    time_stage
+)
+
+def test_text_exposition_format():
+    registry = MetricsRegistry()
+    errors = registry.counter("errors_total", "Errors", ("dependency",))
+    in_flight = registry.gauge("in_flight", "In flight")
+    stages = registry.histogram("stage_seconds", "Stages", ("stage",), buckets=(0.1, 1.0))
+
+    errors.inc(dependency='say "hi"')
+    in_flight.set(3)
+    stages.observe(0.05, stage="upsert")
+    stages.observe(0.5, stage="upsert")
+
+    assert registry.render().splitlines() == [
+        "# HELP errors_total Errors",
+        "# TYPE errors_total counter",
+        'errors_total{dependency="say \\"hi\\""} 1',
+        "# HELP in_flight In flight",
+        "# TYPE in_flight gauge",
+        "in_flight 3",
+        "# HELP stage_seconds Stages",
+        "# TYPE stage_seconds histogram",
+        'stage_seconds_bucket{stage="upsert",le="0.1"} 1',
+        'stage_seconds_bucket{stage="upsert",le="1.0"} 2',
+        'stage_seconds_bucket{stage="upsert",le="+Inf"} 2',
+        'stage_seconds_sum{stage="upsert"} 0.55',
+        'stage_seconds_count{stage="upsert"} 2',
+    ]
+
+def test_label_mismatch_and_failing_callbacks():
+    registry = MetricsRegistry()
+    gauge = registry.gauge("pool", "Pool", ("state",))
+
+    with pytest.raises(ValueError):
+        gauge.inc(pool="x")
+
+    gauge.track(lambda: 1 / 0, state="running")
+    gauge.track(lambda: 2, state="queued")
+    assert registry.render().endswith('pool{state="queued"} 2\n')
+    assert registry.gauge("pool", "Pool", ("state",)) is gauge
+
+@pytest.mark.asyncio
+async def test_time_stage_covers_awaits():
+    before = STAGE_DURATION.series(stage="test_stage").count
+
+    with time_stage("test_stage"):
+        await asyncio.sleep(0.02)
+
+    series = STAGE_DURATION.series(stage="test_stage")
+    assert series.count == before + 1
+    assert series.sum >= 0.02
+
+@pytest.mark.asyncio
+async def test_supabase_calls_report_pool_use_and_errors(monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_POOL_SIZE", 2)
+    monkeypatch.setattr(settings, "DATABASE_MAX_OVERFLOW", 1)
+    service = SupabaseService()
+    release = asyncio.Event()
+    errors_before = DEPENDENCY_ERRORS.value(dependency="supabase")
+
+    async def failing_query():
+        raise RuntimeError("connection reset")
+
+    try:
+        calls = [asyncio.create_task(service._execute(release.wait, stage="upsert")) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        assert POOL_LIMIT.value(pool="supabase") == 3
+        assert POOL_TASKS.value(pool="supabase", state="running") == 3
+        assert POOL_TASKS.value(pool="supabase", state="queued") == 2
+
+        release.set()
+        await asyncio.gather(*calls)
+        assert POOL_TASKS.value(pool="supabase", state="running") == 0
+
+        with pytest.raises(RuntimeError):
+            await service._execute(failing_query)
+        assert DEPENDENCY_ERRORS.value(dependency="supabase") == errors_before + 1
+    finally:
+        await service.close()
+
+def test_metrics_endpoint():
+    response = TestClient(app).get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE leadgen_stage_duration_seconds histogram" in response.text
+    assert "# TYPE leadgen_searches_in_flight gauge" in response.text
+    assert 'leadgen_crawl_runs{state="running"} 0' in response.text
@@ -0,0 +1,87 @@
+"""
+Tests for single-flight coalescing of identical searches
+"""
+
+import asyncio
+
+import pytest
+
+from leadgen_app.models.request_models import LeadSearchRequest
+from leadgen_app.services.ai_service import AIService
+from leadgen_app.utils.singleflight import SingleFlight
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    calls = 0
+
+    async def crawl():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return [{"id": "lead-1"}]
+
+    results = await asyncio.gather(*[flights.do(("url", 25), crawl) for _ in range(5)])
+
+    assert calls == 1
+    assert all(result == [{"id": "lead-1"}] for result, _ in results)
+    assert sum(shared for _, shared in results) == 4
+    assert len(flights) == 0
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_call():
+    flights = SingleFlight()
+
+    async def crawl():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    first = asyncio.ensure_future(flights.do("key", crawl))
+    second = asyncio.ensure_future(flights.do("key", crawl))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == ("done", True)
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_all_callers():
+    flights = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ValueError("actor failed")
+
+    results = await asyncio.gather(
+        flights.do("key", failing),
+        flights.do("key", failing),
+        return_exceptions=True
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+
+@pytest.mark.asyncio
+async def test_joined_url_generation_reports_the_leaders_metrics(monkeypatch):
+    service = AIService()
+    release = asyncio.Event()
+
+    async def generate_apollo_url(request, cache_key, stage_metrics):
+        stage_metrics.update({"url_source": "llm", "prompt_bytes": 1200, "llm_provider": "openai"})
+        await release.wait()
+        return "https://app.apollo.io/#/people?page=1&personTitles[]=cto"
+
+    monkeypatch.setattr(service, "_generate_apollo_url", generate_apollo_url)
+    request = LeadSearchRequest(main_query="CTOs")
+    leader_metrics, joiner_metrics = {}, {}
+
+    calls = asyncio.gather(
+        service._convert_to_apollo_url(request, leader_metrics),
+        service._convert_to_apollo_url(request, joiner_metrics)
+    )
+    await asyncio.sleep(0)
+    release.set()
+    await calls
+
+    assert leader_metrics["url_coalesced"] is False and joiner_metrics["url_coalesced"] is True
+    for metrics in (leader_metrics, joiner_metrics):
+        assert metrics["url_source"] == "llm"
+        assert metrics["prompt_bytes"] == 1200
+        assert metrics["llm_provider"] == "openai"
@@ -0,0 +1,90 @@
+"""
+Tests for per-request tracing spans and search timings
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from leadgen_app.config import settings
+from leadgen_app.models.request_models import LeadSearchRequest
+from leadgen_app.models.response_models import LeadData
+from leadgen_app.routers import leads
+from leadgen_app.utils.metrics import time_stage
+from leadgen_app.utils.tracing import current_trace, span, start_trace
+
+@pytest.mark.asyncio
+async def test_nested_spans_build_timings():
+    with start_trace("search", request_id="r1") as trace:
+        with span("crawl"):
+            with time_stage("dataset_download"):
+                await asyncio.sleep(0.01)
+        for _ in range(2):
+            with span("conversion"):
+                await asyncio.sleep(0.005)
+
+    timings = trace.timings()
+    assert set(timings) == {"total", "crawl", "crawl.dataset_download", "conversion"}
+    assert timings["crawl"] >= timings["crawl.dataset_download"] >= 0.01
+    assert timings["conversion"] >= 0.01
+    # Each path is rounded separately, so allow for rounding in the sum
+    assert timings["total"] >= timings["crawl"] + timings["conversion"] - 0.002
+    assert current_trace() is None
+
+def test_spans_outside_a_trace_are_no_ops():
+    with span("orphan") as orphan:
+        assert orphan is None
+
+def test_failed_span_is_marked_and_exported(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(settings, "TRACE_EXPORT_PATH", str(path))
+
+    with pytest.raises(RuntimeError):
+        with start_trace("search", user_id="u1"):
+            with span("upsert"):
+                raise RuntimeError("boom")
+    with start_trace("next_page"):
+        pass
+
+    first, second = [json.loads(line) for line in path.read_text().splitlines()]
+    assert first["name"] == "search" and first["attributes"] == {"user_id": "u1"}
+    assert first["spans"][0]["path"] == "upsert"
+    assert first["spans"][0]["error"] == "RuntimeError"
+    assert second["name"] == "next_page" and second["spans"] == []
+
+class FakeSupabase:
+    async def save_search_leads(self, leads_data, user_id, source_query_criteria):
+        return None
+
+    async def check_duplicate_leads(self, user_id, emails):
+        with time_stage("dedupe_emails"):
+            return []
+
+    async def check_duplicate_ids(self, user_id, lead_ids):
+        return []
+
+    async def check_archived_leads(self, user_id, lead_ids):
+        return []
+
+    async def save_leads_batch(self, leads_data, user_id, source_query_criteria):
+        with time_stage("upsert"):
+            return {"success": True, "inserted_count": len(leads_data)}
+
+@pytest.mark.asyncio
+async def test_search_response_carries_timings(monkeypatch):
+    async def process_lead_search(request, user_id, request_id, progress=None):
+        with time_stage("url_generation"):
+            pass
+        return [LeadData(id="lead-1", email="a@example.com")], {"total_found": 1}
+
+    monkeypatch.setattr(leads.ai_service, "process_lead_search", process_lead_search)
+    monkeypatch.setattr(leads, "get_supabase_service", lambda: FakeSupabase())
+
+    with start_trace("search"):
+        status_code, content = await leads._execute_search(LeadSearchRequest(main_query="CTOs"), "u1", "r1")
+
+    assert status_code == 200
+    assert set(content["metrics"]["timings"]) == {
+        "total", "url_generation", "save", "save.dedupe_emails", "save.upsert"
+    }
@@ -0,0 +1,107 @@
+"""
+Tests for counter-backed user stats and their periodic reconciliation
+"""
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+from postgrest.exceptions import APIError
+
+from leadgen_app.services import supabase_service
+from leadgen_app.services.supabase_service import SupabaseService
+
+class FakeQuery:
+    """Records table queries and answers each count with a fixed number"""
+
+    def __init__(self, client):
+        self.client = client
+        self.filters = []
+
+    def select(self, *columns, count=None):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append((column, value))
+        return self
+
+    def gte(self, column, value):
+        self.filters.append((column, ">=", value))
+        return self
+
+    async def execute(self):
+        self.client.queries.append(self.filters)
+        return type("Response", (), {"data": [], "count": 3})()
+
+class FakeClient:
+    def __init__(self, function_result):
+        self.function_result = function_result
+        self.functions = []
+        self.queries = []
+
+    def rpc(self, name, params):
+        self.functions.append((name, params))
+        return self
+
+    def table(self, name):
+        return FakeQuery(self)
+
+    async def execute(self):
+        if isinstance(self.function_result, Exception):
+            raise self.function_result
+        return type("Response", (), {"data": self.function_result})()
+
+@pytest_asyncio.fixture
+async def service():
+    service = SupabaseService()
+    yield service
+    await service.close()
+
+@pytest.mark.asyncio
+async def test_stats_come_from_one_counter_read(service):
+    service.client = FakeClient({
+        "new_count": 4, "saved_count": 2, "archived_count": 1, "total_count": 7, "recent_count": 5
+    })
+
+    stats = await service.get_user_stats("u1")
+
+    assert stats == {"new_count": 4, "saved_count": 2, "archived_count": 1, "total_count": 7, "recent_count": 5}
+    assert service.client.functions == [("get_user_lead_stats", {"p_user_id": "u1"})]
+    assert service.client.queries == []
+
+@pytest.mark.asyncio
+async def test_stats_count_each_tab_without_the_counters(service):
+    service.client = FakeClient(APIError({"code": "PGRST202", "message": "Could not find the function"}))
+
+    first = await service.get_user_stats("u1")
+    second = await service.get_user_stats("u1")
+
+    assert first == second == {"new_count": 3, "saved_count": 3, "archived_count": 3, "total_count": 3, "recent_count": 3}
+    assert len(service.client.functions) == 1
+    assert len(service.client.queries) == 10
+
+@pytest.mark.asyncio
+async def test_reconciliation_reports_corrections(service):
+    service.client = FakeClient(2)
+
+    assert await service.reconcile_lead_counts("u1") == 2
+    assert service.client.functions == [("reconcile_user_lead_counts", {"p_user_id": "u1"})]
+
+@pytest.mark.asyncio
+async def test_periodic_reconciliation_survives_errors(monkeypatch):
+    calls = []
+
+    class FlakyService:
+        async def reconcile_lead_counts(self):
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("connection reset")
+            return 0
+
+    monkeypatch.setattr(supabase_service, "get_supabase_service", lambda: FlakyService())
+    task = asyncio.create_task(supabase_service.reconcile_lead_counts_periodically(0.01))
+    while len(calls) < 3:
+        await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
@@ -0,0 +1,87 @@
+-- Save one search's leads in a single round trip.
+--
+-- Applies the same rules as the API's step-by-step save
+-- (leadgen_app/routers/leads.py, save_leads_background):
+--   1. skip leads whose email the user already has in any tab
+--   2. skip leads whose id is already in the user's new or saved tab
+--   3. move leads found in the user's archived tab back to new instead of inserting them
+--   4. insert the rest, first occurrence per id, ignoring id conflicts
+--
+-- p_leads is the array of lead records the API would otherwise upsert.
+-- Returns {"saved", "restored", "email_duplicates", "id_duplicates"}.
+
+create or replace function public.save_search_leads(
+  p_user_id public.leads.user_id%type,
+  p_leads jsonb
+)
+returns jsonb
+language sql
+set search_path = public
+as $$
+  with incoming as (
+    select lead.*, item.ord
+    from jsonb_array_elements(p_leads) with ordinality as item(record, ord)
+    cross join lateral jsonb_populate_record(null::public.leads, item.record) as lead
+  ),
+  email_matches as (
+    select existing.email
+    from public.leads existing
+    where existing.user_id = p_user_id
+      and existing.email in (select email from incoming where coalesce(email, '') <> '')
+  ),
+  after_emails as (
+    select *
+    from incoming
+    where coalesce(email, '') = ''
+       or email not in (select email from email_matches)
+  ),
+  id_matches as (
+    select existing.id
+    from public.leads existing
+    where existing.user_id = p_user_id
+      and existing.tab in ('new', 'saved')
+      and existing.id in (select id from after_emails)
+  ),
+  after_ids as (
+    select *
+    from after_emails
+    where id not in (select id from id_matches)
+  ),
+  restored as (
+    update public.leads existing
+    set tab = 'new'
+    where existing.user_id = p_user_id
+      and existing.tab = 'archived'
+      and existing.id in (select id from after_ids)
+    returning existing.id
+  ),
+  to_insert as (
+    select distinct on (id) *
+    from after_ids
+    where id not in (select id from restored)
+    order by id, ord
+  ),
+  inserted as (
+    insert into public.leads (
+      id, user_id, tab, lead_status, first_name, last_name, name, email, phone,
+      linkedin_url, job_title, company_name, company_size, industry, location,
+      keywords, source_query_criteria, created_at
+    )
+    select
+      id, user_id, tab, lead_status, first_name, last_name, name, email, phone,
+      linkedin_url, job_title, company_name, company_size, industry, location,
+      keywords, source_query_criteria, created_at
+    from to_insert
+    on conflict (id) do nothing
+  )
+  select jsonb_build_object(
+    -- Rows sent for insertion, as the step-by-step path reports them
+    'saved', (select count(*) from to_insert),
+    'restored', (select count(*) from restored),
+    'email_duplicates', (select count(*) from email_matches),
+    'id_duplicates', (select count(*) from id_matches)
+  );
+$$;
+
+revoke all on function public.save_search_leads(public.leads.user_id%type, jsonb) from public, anon, authenticated;
+grant execute on function public.save_search_leads(public.leads.user_id%type, jsonb) to service_role;
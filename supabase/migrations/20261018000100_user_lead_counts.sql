@@ -0,0 +1,171 @@
+-- Per-user, per-tab lead counters so lead stats are one indexed read.
+--
+-- user_lead_counts is kept current by statement-level triggers on leads
+-- (inserts, deletes, tab moves and restores). reconcile_user_lead_counts()
+-- recomputes it from leads to correct any drift, e.g. after a TRUNCATE or a
+-- bulk load with triggers disabled; the API runs it periodically
+-- (LEAD_COUNTS_RECONCILE_INTERVAL), or schedule it with pg_cron:
+--
+--   select cron.schedule('reconcile-lead-counts', '17 */6 * * *',
+--                        'select public.reconcile_user_lead_counts()');
+
+-- Keep writers out until the backfill and triggers are in place
+lock table public.leads in share row exclusive mode;
+
+create table if not exists public.user_lead_counts as
+  select user_id, coalesce(tab, '') as tab, count(*) as lead_count
+  from public.leads
+  group by 1, 2;
+
+alter table public.user_lead_counts
+  alter column user_id set not null,
+  alter column tab set not null,
+  alter column lead_count set not null,
+  add primary key (user_id, tab);
+
+-- Only the service role reads the counters (through get_user_lead_stats)
+alter table public.user_lead_counts enable row level security;
+
+-- recent_count in get_user_lead_stats is a range scan on this index
+create index if not exists leads_user_id_created_at_idx on public.leads (user_id, created_at);
+
+-- Security definer: tab moves made with a user's token must still update the counters
+create or replace function public.apply_lead_count_deltas()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  if tg_op = 'INSERT' then
+    insert into public.user_lead_counts as counts (user_id, tab, lead_count)
+    select user_id, coalesce(tab, ''), count(*)
+    from new_rows
+    group by 1, 2
+    order by 1, 2
+    on conflict (user_id, tab) do update set lead_count = counts.lead_count + excluded.lead_count;
+  elsif tg_op = 'DELETE' then
+    insert into public.user_lead_counts as counts (user_id, tab, lead_count)
+    select user_id, coalesce(tab, ''), -count(*)
+    from old_rows
+    group by 1, 2
+    order by 1, 2
+    on conflict (user_id, tab) do update set lead_count = counts.lead_count + excluded.lead_count;
+  else
+    -- Net change per (user, tab); updates that keep the tab touch no counters
+    insert into public.user_lead_counts as counts (user_id, tab, lead_count)
+    select user_id, tab, sum(delta)
+    from (
+      select user_id, coalesce(tab, '') as tab, 1 as delta from new_rows
+      union all
+      select user_id, coalesce(tab, '') as tab, -1 as delta from old_rows
+    ) as moves
+    group by 1, 2
+    having sum(delta) <> 0
+    order by 1, 2
+    on conflict (user_id, tab) do update set lead_count = counts.lead_count + excluded.lead_count;
+  end if;
+  return null;
+end;
+$$;
+
+drop trigger if exists leads_count_insert on public.leads;
+create trigger leads_count_insert
+  after insert on public.leads
+  referencing new table as new_rows
+  for each statement execute function public.apply_lead_count_deltas();
+
+drop trigger if exists leads_count_update on public.leads;
+create trigger leads_count_update
+  after update on public.leads
+  referencing old table as old_rows new table as new_rows
+  for each statement execute function public.apply_lead_count_deltas();
+
+drop trigger if exists leads_count_delete on public.leads;
+create trigger leads_count_delete
+  after delete on public.leads
+  referencing old table as old_rows
+  for each statement execute function public.apply_lead_count_deltas();
+
+-- Same keys as the API's per-tab count queries:
+-- {"new_count", "saved_count", "archived_count", "total_count", "recent_count"}
+create or replace function public.get_user_lead_stats(p_user_id public.leads.user_id%type)
+returns jsonb
+language sql
+stable
+set search_path = public
+as $$
+  select jsonb_build_object(
+    'new_count', coalesce(sum(lead_count) filter (where tab = 'new'), 0),
+    'saved_count', coalesce(sum(lead_count) filter (where tab = 'saved'), 0),
+    'archived_count', coalesce(sum(lead_count) filter (where tab = 'archived'), 0),
+    'total_count', coalesce(sum(lead_count), 0),
+    'recent_count', (
+      select count(*)
+      from public.leads
+      where user_id = p_user_id
+        and created_at >= now() - interval '7 days'
+    )
+  )
+  from public.user_lead_counts
+  where user_id = p_user_id;
+$$;
+
+-- Recompute counters from leads for one user, or everyone when p_user_id is null.
+-- Returns the number of counters corrected.
+create or replace function public.reconcile_user_lead_counts(
+  p_user_id public.leads.user_id%type default null
+)
+returns integer
+language plpgsql
+set search_path = public
+as $$
+declare
+  v_corrected integer;
+begin
+  -- One full reconciliation at a time across API workers
+  if p_user_id is null and not pg_try_advisory_xact_lock(hashtext('reconcile_user_lead_counts')) then
+    return 0;
+  end if;
+
+  -- Blocks counter writes (not reads) so that no trigger delta lands between
+  -- the recount's snapshot and the overwrite below
+  lock table public.user_lead_counts in exclusive mode;
+
+  with actual as (
+    select user_id, coalesce(tab, '') as tab, count(*) as lead_count
+    from public.leads
+    where p_user_id is null or user_id = p_user_id
+    group by 1, 2
+  ),
+  stored as (
+    select user_id, tab, lead_count
+    from public.user_lead_counts
+    where p_user_id is null or user_id = p_user_id
+  ),
+  drift as (
+    select
+      coalesce(actual.user_id, stored.user_id) as user_id,
+      coalesce(actual.tab, stored.tab) as tab,
+      coalesce(actual.lead_count, 0) as lead_count
+    from actual
+    full join stored on stored.user_id = actual.user_id and stored.tab = actual.tab
+    where coalesce(actual.lead_count, 0) is distinct from stored.lead_count
+  ),
+  corrected as (
+    insert into public.user_lead_counts as counts (user_id, tab, lead_count)
+    select user_id, tab, lead_count from drift
+    on conflict (user_id, tab) do update set lead_count = excluded.lead_count
+    returning 1
+  )
+  select count(*) into v_corrected from corrected;
+
+  return v_corrected;
+end;
+$$;
+
+revoke all on function public.get_user_lead_stats(public.leads.user_id%type) from public, anon, authenticated;
+grant execute on function public.get_user_lead_stats(public.leads.user_id%type) to service_role;
+revoke all on function public.reconcile_user_lead_counts(public.leads.user_id%type) from public, anon, authenticated;
+grant execute on function public.reconcile_user_lead_counts(public.leads.user_id%type) to service_role;
+revoke all on function public.apply_lead_count_deltas() from public, anon, authenticated;